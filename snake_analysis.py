@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Outcome log analysis.
+Memory-maps the columns of an outcome log (see snake_outcomes.py) as NumPy
+arrays and computes, in a few vectorized passes over each column:
+survival-time histograms and curves, death-cause breakdowns by rules, score
+against survival time, and grouped aggregates (count, mean, spread, range)
+of any column over any other. Only the columns a statistic needs are read,
+straight from the page cache, so millions of games scan in seconds.
+
+NumPy is optional for the rest of the project but required here:
+    pip install numpy
+
+    python snake_analysis.py report outcomes
+    python snake_analysis.py group outcomes --by speed --value ticks
+    python snake_analysis.py bench --records 10000000 --out /tmp/outcomes
+"""
+
+import argparse
+import time
+
+try:
+    import numpy as np
+except ImportError:  # Only the analysis needs NumPy
+    np = None
+
+from snake_engine import RULES
+from snake_outcomes import CAUSES, COLUMNS, DTYPES, RULE_CODES, RULE_NAMES, OutcomeLog, column_path, record_count
+
+# Names shown for coded columns
+LABELS = {'cause': CAUSES, 'rules': RULE_NAMES}
+
+def open_log(path):
+    """The log's columns as read-only memory-mapped arrays of equal length."""
+    if np is None:
+        raise ImportError("Outcome analysis needs NumPy (pip install numpy)")
+    count = record_count(path)
+    columns = {}
+    for name, typecode in COLUMNS:
+        dtype = np.dtype('<' + DTYPES[typecode])
+        if count:
+            columns[name] = np.memmap(column_path(path, name), dtype=dtype, mode='r', shape=(count,))
+        else:
+            columns[name] = np.zeros(0, dtype=dtype)
+    return columns
+
+def group_codes(key):
+    """(distinct values, group index of every record) for a key column."""
+    if key.dtype.kind == 'u' and key.dtype.itemsize <= 2:
+        # Small codes: count them directly instead of sorting
+        present = np.flatnonzero(np.bincount(key))
+        lookup = np.zeros(present[-1] + 1 if len(present) else 1, dtype=np.intp)
+        lookup[present] = np.arange(len(present))
+        return present.astype(key.dtype), lookup[key]
+    return np.unique(key, return_inverse=True)
+
+def aggregate(key, value):
+    """Per distinct key: count, mean, standard deviation, min and max of value.
+
+    Returns a dict of arrays, all indexed like its 'key' array.
+    """
+    keys, groups = group_codes(key)
+    size = len(keys)
+    count = np.bincount(groups, minlength=size)
+    value = np.asarray(value, dtype=np.float64)
+    total = np.bincount(groups, weights=value, minlength=size)
+    squares = np.bincount(groups, weights=value * value, minlength=size)
+    mean = total / np.maximum(count, 1)
+    std = np.sqrt(np.maximum(squares / np.maximum(count, 1) - mean * mean, 0.0))
+    low = np.full(size, np.inf)
+    high = np.full(size, -np.inf)
+    np.minimum.at(low, groups, value)
+    np.maximum.at(high, groups, value)
+    return {'key': keys, 'count': count, 'mean': mean, 'std': std, 'min': low, 'max': high}
+
+def survival(ticks, bins=20):
+    """Survival-time histogram: (bin edges, games per bin, share of games still alive at each edge)."""
+    ticks = np.asarray(ticks)
+    top = int(ticks.max()) + 1 if len(ticks) else 1
+    counts, edges = np.histogram(ticks, bins=bins, range=(0, top))
+    alive = 1.0 - np.concatenate(([0], np.cumsum(counts))) / max(len(ticks), 1)
+    return edges, counts, alive
+
+def death_causes(cause, rules):
+    """Games per (rules code, cause code), as a RULE_NAMES x CAUSES count matrix."""
+    width = len(CAUSES)
+    cells = rules.astype(np.intp) * width + cause
+    counts = np.bincount(cells, minlength=len(RULE_NAMES) * width)
+    return counts[:len(RULE_NAMES) * width].reshape(len(RULE_NAMES), width)
+
+def score_vs_ticks(ticks, score, bins=20):
+    """Mean score of the games in each survival-time bin: (bin edges, games, mean score)."""
+    ticks = np.asarray(ticks)
+    top = int(ticks.max()) + 1 if len(ticks) else 1
+    edges = np.linspace(0, top, bins + 1)
+    groups = np.minimum((ticks * (bins / top)).astype(np.intp), bins - 1)
+    games = np.bincount(groups, minlength=bins)
+    total = np.bincount(groups, weights=score, minlength=bins)
+    return edges, games, total / np.maximum(games, 1)
+
+def report(columns, bins=20):
+    """Text report of the standard statistics for a log's columns."""
+    ticks = columns['ticks']
+    games = len(ticks)
+    lines = [f"{games:,} games"]
+    if not games:
+        return lines
+
+    lines.append("")
+    lines.append("Death causes by rules:")
+    matrix = death_causes(columns['cause'], columns['rules'])
+    lines.append(f"  {'rules':<10}" + ''.join(f"{cause:>10}" for cause in CAUSES) + f"{'games':>12}")
+    for code, row in enumerate(matrix):
+        if row.sum():
+            shares = ''.join(f"{count / row.sum():>10.1%}" for count in row)
+            lines.append(f"  {RULE_NAMES[code]:<10}{shares}{int(row.sum()):>12,}")
+
+    lines.append("")
+    p50, p90, p99 = np.percentile(ticks, (50, 90, 99))
+    lines.append(f"Survival (ticks): mean {ticks.mean():.1f}  p50 {p50:.0f}  p90 {p90:.0f}  "
+                 f"p99 {p99:.0f}  max {int(ticks.max())}")
+    edges, counts, alive = survival(ticks, bins)
+    _, _, scores = score_vs_ticks(ticks, columns['score'], bins)
+    lines.append(f"  {'ticks':>17}{'games':>12}{'alive':>9}{'score':>9}")
+    for i, count in enumerate(counts):
+        lines.append(f"  {edges[i]:>8.0f}-{edges[i + 1]:<8.0f}{count:>12,}{alive[i]:>9.1%}{scores[i]:>9.1f}")
+
+    lines.append("")
+    lines.append("Final speed (seconds per tick):")
+    stats = aggregate(columns['speed'], ticks)
+    lines.extend(format_groups(stats, 'speed', 'ticks', limit=bins))
+    return lines
+
+def format_groups(stats, key_name, value_name, limit=None):
+    """Table rows for aggregate() output, biggest groups first when limited."""
+    order = np.arange(len(stats['key']))
+    if limit is not None and len(order) > limit:
+        order = np.sort(np.argsort(stats['count'])[::-1][:limit])
+    lines = [f"  {key_name:>10}{'games':>12}{'mean ' + value_name:>14}{'std':>10}{'min':>10}{'max':>10}"]
+    for i in order:
+        key = stats['key'][i]
+        if key_name in LABELS and key < len(LABELS[key_name]):
+            key_text = LABELS[key_name][key]
+        elif np.issubdtype(type(key), np.floating):
+            key_text = f"{key:.4f}"
+        else:
+            key_text = str(key)
+        lines.append(f"  {key_text:>10}{stats['count'][i]:>12,}{stats['mean'][i]:>14.1f}"
+                     f"{stats['std'][i]:>10.1f}{stats['min'][i]:>10.0f}{stats['max'][i]:>10.0f}")
+    return lines
+
+def synthetic_columns(records, seed=0):
+    """Made-up but plausible outcomes for benchmarking: games under both rule sets."""
+    rng = np.random.default_rng(seed)
+    rules = rng.integers(1, len(RULE_NAMES), records).astype(np.uint8)
+    ticks = rng.geometric(1 / 400, records).astype(np.uint32)
+    foods = rng.binomial(ticks, 1 / 40).astype(np.uint32)
+    speed = np.empty(records, dtype=np.float32)
+    for name, code in RULE_CODES.items():
+        if name in RULES:
+            rule = RULES[name]
+            chosen = rules == code
+            speed[chosen] = np.maximum(rule['min_speed'],
+                                       rule['start_speed'] - rule['speed_step'] * foods[chosen])
+    sizes = np.array([[RULES[name]['width'], RULES[name]['height']] if name in RULES else [0, 0]
+                      for name in RULE_NAMES], dtype=np.uint16)
+    return {
+        'ticks': ticks,
+        'score': foods * 10,
+        'length': foods + 3,
+        'speed': speed,
+        'cause': rng.choice([1, 2, 4], records, p=[0.6, 0.39, 0.01]).astype(np.uint8),
+        'rules': rules,
+        'width': sizes[rules, 0],
+        'height': sizes[rules, 1],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistics over snake outcome logs.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    show = commands.add_parser('report', help="survival, death causes, score vs ticks and speed")
+    show.add_argument('log')
+    show.add_argument('--bins', type=int, default=20)
+
+    group = commands.add_parser('group', help="aggregate one column grouped by another")
+    group.add_argument('log')
+    group.add_argument('--by', default='rules', choices=[name for name, _ in COLUMNS])
+    group.add_argument('--value', default='ticks', choices=[name for name, _ in COLUMNS])
+    group.add_argument('--limit', type=int, default=50, help="show at most this many of the biggest groups")
+
+    bench = commands.add_parser('bench', help="write synthetic outcomes, then time a full report")
+    bench.add_argument('--records', type=int, default=10_000_000)
+    bench.add_argument('--out', required=True, help="log directory (appended to)")
+    bench.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == 'bench':
+        start = time.perf_counter()
+        with OutcomeLog(args.out) as log:
+            log.extend(synthetic_columns(args.records, args.seed))
+        print(f"Wrote {args.records:,} records in {time.perf_counter() - start:.2f}s")
+        args.bins = 20
+        args.log = args.out
+
+    start = time.perf_counter()
+    columns = open_log(args.log)
+    if args.command == 'group':
+        lines = format_groups(aggregate(columns[args.by], columns[args.value]),
+                              args.by, args.value, args.limit)
+    else:
+        lines = report(columns, args.bins)
+    elapsed = time.perf_counter() - start
+    print('\n'.join(lines))
+    size = sum(column.nbytes for column in columns.values())
+    print(f"\nScanned {len(columns['ticks']):,} records ({size / 1e6:,.0f} MB) in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+Snake autopilot.
+Steers a game along a BFS distance field to the food. The field is patched
+incrementally as the head fills a cell and the tail frees one, and only
+recomputed in full when the food moves. A move is taken only if the head can
+still reach the tail afterwards; when no such path to the food exists the
+snake follows a precomputed Hamiltonian cycle instead. While the free cells
+form one connected piece, a move that doesn't locally split them needs no
+search at all to prove the tail is still reachable.
+
+    pilot = Autopilot(game)
+    direction = pilot.decide()      # pilot.last_latency: seconds spent deciding
+    if direction is not None:
+        game.change_direction(direction)
+
+Running the module plays headless games and reports decision latency:
+
+    python snake_autopilot.py --games 20 --size 60x25
+
+Wall-clock latency includes any time the OS ran something else; --cpu-time
+times decisions in thread CPU time instead, which shows the search's own
+worst case. The cyclic garbage collector is paused while deciding, so a
+collection set off by the rest of the game never lands inside a decision,
+and the searches mark cells in buffers allocated once per pilot.
+"""
+
+import argparse
+import gc
+import heapq
+import random
+import time
+from array import array
+from collections import deque
+
+from snake_engine import RULES, Direction, SnakeEngine
+from snake_profiler import PhaseTimings
+
+# Distance of cells the food cannot be reached from (or that are blocked)
+UNREACHABLE = 2 ** 31 - 1
+
+# The 8 cells around a cell, clockwise from north (orthogonals at even indices)
+RING = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
+
+def hamiltonian_cycle(rows, cols):
+    """Return a closed path visiting every cell of a rows x cols grid once.
+
+    Needs an even number of rows or columns; with both odd the last column
+    is left out of the cycle.
+    """
+    if cols % 2:
+        if rows % 2 == 0:
+            return [(r, c) for c, r in hamiltonian_cycle(cols, rows)]
+        cols -= 1
+    path = []
+    for c in range(cols):
+        rows_down = range(1, rows) if c % 2 == 0 else range(rows - 1, 0, -1)
+        path.extend((r, c) for r in rows_down)
+    path.extend((0, c) for c in range(cols - 1, -1, -1))
+    return path
+
+class DistanceField:
+    """BFS distance from every free playable cell to one source cell.
+
+    Cells are flat board indices (y * width + x) and grid is the engine's
+    occupancy bytearray. block() and unblock() patch the field after a
+    single cell fills or empties; rebuild() starts over from a new source.
+    A patch that would touch more than patch_limit cells is abandoned for a
+    rebuild, which is cheaper per cell. reached counts the cells with a
+    distance: the free cells connected to the source.
+    """
+
+    def __init__(self, width, height, margin):
+        size = width * height
+        self.blank = array('i', [UNREACHABLE]) * size
+        self.dist = array('i', self.blank)
+        self.patch_limit = max(16, (width - 2 * margin) * (height - 2 * margin) // 32)
+        self.neighbors = [()] * size
+        for y in range(margin, height - margin):
+            for x in range(margin, width - margin):
+                cell = y * width + x
+                self.neighbors[cell] = tuple(
+                    (y + dy) * width + x + dx
+                    for dy, dx in (direction.value for direction in Direction)
+                    if margin <= y + dy < height - margin and margin <= x + dx < width - margin)
+        self.source = None
+        self.reached = 0
+
+    def rebuild(self, grid, source):
+        """Recompute every distance from source."""
+        dist = self.dist
+        neighbors = self.neighbors
+        dist[:] = self.blank
+        self.source = source
+        self.reached = 0
+        if source is None:
+            return
+        dist[source] = 0
+        seen = bytearray(grid)
+        seen[source] = 1
+        frontier = [source]
+        reached = 1
+        d = 0
+        while frontier:
+            d += 1
+            grown = []
+            for cell in frontier:
+                for n in neighbors[cell]:
+                    if not seen[n]:
+                        seen[n] = 1
+                        dist[n] = d
+                        grown.append(n)
+            reached += len(grown)
+            frontier = grown
+        self.reached = reached
+
+    def block(self, grid, cell):
+        """Cell has filled: raise the distances of cells whose paths ran through it.
+
+        Returns True if the patch gave way to a rebuild, which also covers
+        any other cell that changed since.
+        """
+        dist = self.dist
+        neighbors = self.neighbors
+        if dist[cell] == UNREACHABLE:
+            return False
+        # Find the cells that lost every shortest path (in BFS order, so
+        # each cell's parents are settled before it is checked)
+        affected = {cell}
+        queue = deque([cell])
+        limit = self.patch_limit
+        while queue:
+            u = queue.popleft()
+            parent = dist[u]
+            child = parent + 1
+            for v in neighbors[u]:
+                if dist[v] != child or v in affected:
+                    continue
+                for w in neighbors[v]:
+                    if dist[w] == parent and w not in affected and not grid[w]:
+                        break
+                else:
+                    affected.add(v)
+                    queue.append(v)
+            if len(affected) > limit:
+                self.rebuild(grid, self.source)
+                return True
+        for v in affected:
+            dist[v] = UNREACHABLE
+        reached = self.reached - len(affected)
+
+        # Reseed the affected region from its unaffected border
+        heap = []
+        for v in affected:
+            if grid[v]:
+                continue
+            best = min((dist[w] for w in neighbors[v] if not grid[w]), default=UNREACHABLE)
+            if best != UNREACHABLE:
+                heap.append((best + 1, v))
+        heapq.heapify(heap)
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d >= dist[v]:
+                continue
+            if dist[v] == UNREACHABLE:
+                reached += 1
+            dist[v] = d
+            for n in neighbors[v]:
+                if d + 1 < dist[n] and not grid[n]:
+                    heapq.heappush(heap, (d + 1, n))
+        self.reached = reached
+        return False
+
+    def unblock(self, grid, cell):
+        """Cell has emptied: lower the distances it now gives a shortcut to."""
+        dist = self.dist
+        neighbors = self.neighbors
+        best = min((dist[w] for w in neighbors[cell] if not grid[w]), default=UNREACHABLE)
+        if best == UNREACHABLE or best + 1 >= dist[cell]:
+            return
+        reached = self.reached + (dist[cell] == UNREACHABLE)
+        dist[cell] = best + 1
+        queue = deque([cell])
+        lowered = 1
+        limit = self.patch_limit
+        while queue:
+            u = queue.popleft()
+            d = dist[u] + 1
+            for n in neighbors[u]:
+                if d < dist[n] and not grid[n]:
+                    if dist[n] == UNREACHABLE:
+                        reached += 1
+                    dist[n] = d
+                    queue.append(n)
+                    lowered += 1
+            if lowered > limit:
+                self.rebuild(grid, self.source)
+                return
+        self.reached = reached
+
+class Autopilot:
+    """Chooses a direction for each tick of an engine (or SnakeGame).
+
+    Ties between equally good moves are broken with the pilot's own rng (not
+    the engine's, so food placement is unaffected), which keeps the snake
+    from locking into a loop. Every decision is timed: last_latency holds
+    the most recent one in seconds and latency keeps a ring buffer for
+    percentiles.
+    """
+
+    def __init__(self, engine, history=1024, seed=None, clock=time.perf_counter):
+        if engine.level is not None:
+            # The cycle fallback needs an open rectangle, not walls and portals
+            raise ValueError("The autopilot only plays open boards, not levels")
+        self.engine = engine
+        self.rng = random.Random(engine.seed if seed is None else seed)
+        self.clock = clock
+        width, height, margin = engine.width, engine.height, engine.margin
+        self.field = DistanceField(width, height, margin)
+        self.moves = {-width: Direction.UP, width: Direction.DOWN, -1: Direction.LEFT, 1: Direction.RIGHT}
+
+        cycle = [(y + margin) * width + x + margin
+                 for y, x in hamiltonian_cycle(height - 2 * margin, width - 2 * margin)]
+        self.cycle_next = array('i', [-1]) * (width * height)
+        for i, cell in enumerate(cycle):
+            self.cycle_next[cell] = cycle[(i + 1) % len(cycle)]
+
+        self.playable = (width - 2 * margin) * (height - 2 * margin)
+        self.ring = [()] * (width * height)
+        for y in range(margin, height - margin):
+            for x in range(margin, width - margin):
+                self.ring[y * width + x] = tuple(
+                    (y + dy) * width + x + dx
+                    if margin <= y + dy < height - margin and margin <= x + dx < width - margin else -1
+                    for dy, dx in RING)
+
+        self.latency = PhaseTimings(history)
+        self.last_latency = 0.0
+        self._synced = None
+
+        # Search marks, refilled from the occupancy grid instead of copied per search
+        self._reach_mark = bytearray(width * height)
+        self._component_mark = bytearray(width * height)
+
+        # Ticks between floods that try to prove the free cells connected again
+        self.reconnect_interval = 8
+        # Free cells (plus the tail) are known to be one connected piece
+        self._connected = False
+        self._component = None
+        self._next_connected = False
+        self._expected_head = None
+
+    def _flat(self, cell):
+        return cell[0] * self.engine.width + cell[1]
+
+    def sync(self):
+        """Bring the distance field up to date with the engine.
+
+        One tick with the same food is patched incrementally; anything else
+        (new food, a reset, a restore, skipped ticks) rebuilds the field.
+        Returns True if exactly one tick has passed since the last sync.
+        """
+        engine = self.engine
+        grid = engine.occupancy
+        body = engine.snake
+        food = None if engine.food is None else self._flat(engine.food)
+        state = (grid, engine.ticks, self._flat(body[0]), self._flat(body[-1]), food)
+        previous = self._synced
+        self._synced = state
+        one_tick = previous is not None and previous[0] is grid and previous[1] + 1 == engine.ticks
+        if one_tick and previous[4] == food:
+            if not self.field.block(grid, state[2]) and not grid[previous[3]]:
+                self.field.unblock(grid, previous[3])
+        elif previous is None or previous[1:] != state[1:] or previous[0] is not grid:
+            self.field.rebuild(grid, food)
+        return one_tick
+
+    def _splits(self, cell, tail):
+        """Would filling cell split the open cells around it (the tail counts as open)?
+
+        Looks only at the 8 surrounding cells: if the open orthogonal
+        neighbours are joined through open diagonals, they stay connected.
+        """
+        grid = self.engine.occupancy
+        around = [n >= 0 and (n == tail or not grid[n]) for n in self.ring[cell]]
+        runs = 0
+        for i in (0, 2, 4, 6):
+            if around[i] and not (around[i - 1] and around[i - 2]):
+                runs += 1
+        if runs == 0:
+            # Either no way out at all, or every side joined in a loop
+            return not (around[0] or around[2] or around[4] or around[6])
+        return runs > 1
+
+    def _tail_reachable(self, start, tail):
+        """Can a head moved onto start still reach the tail through free cells?
+
+        Searches from both ends, always growing the smaller frontier, so a
+        sealed-off pocket on either side is exhausted quickly. Cells are
+        marked in a copy of the occupancy grid (2: head side, 3: tail side).
+        """
+        mark = self._reach_mark
+        mark[:] = self.engine.occupancy
+        neighbors = self.field.neighbors
+        mark[start] = 2
+        mark[tail] = 3
+        front_head, front_tail = [start], [tail]
+        while front_head and front_tail:
+            if len(front_head) <= len(front_tail):
+                front, own, other = front_head, 2, 3
+            else:
+                front, own, other = front_tail, 3, 2
+            grown = []
+            for cell in front:
+                for n in neighbors[cell]:
+                    seen = mark[n]
+                    if seen == other:
+                        return True
+                    if not seen:
+                        mark[n] = own
+                        grown.append(n)
+            if own == 2:
+                front_head = grown
+            else:
+                front_tail = grown
+        return False
+
+    def _field_component(self, tail):
+        """The tail's component as the distance field already knows it, or None.
+
+        When the food can be reached from every free cell around the tail,
+        the cells reachable from the tail are exactly the ones with a
+        distance. Returns (contains, size) like _tail_component.
+        """
+        field = self.field
+        dist = field.dist
+        grid = self.engine.occupancy
+        around = [n for n in field.neighbors[tail] if not grid[n]]
+        if not around or any(dist[n] == UNREACHABLE for n in around):
+            return None
+        return (lambda cell: dist[cell] != UNREACHABLE), field.reached + 1
+
+    def _tail_component(self, tail):
+        """Every cell reachable from the tail through free cells.
+
+        Returns (contains, size), contains(cell) telling whether cell is in
+        it; computed at most once per decision, and only flooded (marking
+        the component with 2) when the distance field can't answer.
+        """
+        if self._component is None:
+            self._component = self._field_component(tail)
+        if self._component is None:
+            mark = self._component_mark
+            mark[:] = self.engine.occupancy
+            neighbors = self.field.neighbors
+            mark[tail] = 2
+            size = 1
+            frontier = [tail]
+            while frontier:
+                grown = []
+                for cell in frontier:
+                    for n in neighbors[cell]:
+                        if not mark[n]:
+                            mark[n] = 2
+                            grown.append(n)
+                size += len(grown)
+                frontier = grown
+            self._component = (lambda cell: mark[cell] == 2), size
+        return self._component
+
+    def _keeps_tail(self, cell, tail):
+        """Can a head moved onto cell still reach the tail?
+
+        While the open cells are known to be connected, a move that doesn't
+        split them locally keeps them so and needs no search. Otherwise the
+        tail's component answers, since a free cell keeps the tail in reach
+        exactly when it lies in it. The distance field already holds that
+        component whenever the tail only borders the food's region; if not, a
+        two-ended search answers, until one fails (or every
+        reconnect_interval ticks): then a single flood from the tail
+        answers for every remaining move this tick. The component also
+        shows whether the open cells are connected again.
+        """
+        if self._connected and not self._splits(cell, tail):
+            self._next_connected = True
+            return True
+        self._next_connected = False
+        if self._component is None:
+            self._component = self._field_component(tail)
+        if self._component is None and (self._connected or self.engine.ticks % self.reconnect_interval):
+            if self._tail_reachable(cell, tail):
+                return True
+        contains, size = self._tail_component(tail)
+        if not contains(cell):
+            return False
+        # Every free cell plus the tail is in the component: connected unless cell splits it
+        whole = size == self.playable - len(self.engine.snake) + 1
+        self._next_connected = whole and not self._splits(cell, tail)
+        return True
+
+    def _move(self, head, cell, checked):
+        self._connected = checked and self._next_connected
+        self._expected_head = cell
+        return self.moves[cell - head]
+
+    def _choose(self):
+        engine = self.engine
+        if engine.game_over:
+            return None
+        one_tick = self.sync()
+        grid = engine.occupancy
+        dist = self.field.dist
+        body = engine.snake
+        head = self._flat(body[0])
+        tail = self._flat(body[-1])
+        if not one_tick or head != self._expected_head:
+            self._connected = False
+        self._component = None
+        rng = self.rng
+        options = sorted((dist[n], rng.random(), n) for n in self.field.neighbors[head] if not grid[n])
+        if not options:
+            return None
+
+        # Shortest path to the food, unless it cuts the head off from the tail
+        distance, _, cell = options[0]
+        if distance != UNREACHABLE and self._keeps_tail(cell, tail):
+            return self._move(head, cell, True)
+
+        # No safe path: follow the Hamiltonian cycle
+        cell = self.cycle_next[head]
+        if cell >= 0 and not grid[cell] and self._keeps_tail(cell, tail):
+            return self._move(head, cell, True)
+
+        # Off the cycle: any move that keeps the tail in reach, else the closest to food
+        for distance, _, cell in options[1:]:
+            if self._keeps_tail(cell, tail):
+                return self._move(head, cell, True)
+        return self._move(head, options[0][2], False)
+
+    def decide(self):
+        """Return the direction to take this tick (None to keep going).
+
+        The garbage collector is paused meanwhile; any collection that falls
+        due runs after the decision instead.
+        """
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            start = self.clock()
+            direction = self._choose()
+            self.last_latency = self.clock() - start
+            self.latency.add(self.last_latency)
+        finally:
+            if collecting:
+                gc.enable()
+        return direction
+
+    def steer(self):
+        """Decide and apply the direction to the engine."""
+        direction = self.decide()
+        if direction is not None:
+            self.engine.change_direction(direction)
+        return direction
+
+    def summary(self):
+        p50, p99 = self.latency.percentiles((50, 99))
+        return f"autopilot: last {self.last_latency * 1000:.2f} ms, p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless autopilot games and report decision latency.")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--size', default='60x25', metavar='WIDTHxHEIGHT')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-ticks', type=int, default=200_000)
+    parser.add_argument('--cpu-time', action='store_true',
+                        help="time decisions in thread CPU time, leaving out time the OS ran something else")
+    args = parser.parse_args()
+    width, height = (int(n) for n in args.size.lower().split('x'))
+
+    rules = dict(RULES['visual'], width=width, height=height)
+    worst = []
+    for game in range(args.games):
+        engine = SnakeEngine(seed=args.seed + game, **rules)
+        pilot = Autopilot(engine, history=args.max_ticks,
+                          clock=time.thread_time if args.cpu_time else time.perf_counter)
+        while not engine.game_over and engine.ticks < args.max_ticks:
+            pilot.steer()
+            engine.move_snake()
+        p50, p99, p100 = pilot.latency.percentiles((50, 99, 100))
+        worst.append(p100)
+        print(f"game {game}: score {engine.score:6d} length {len(engine.snake):5d} "
+              f"ticks {engine.ticks:7d} {engine.death_cause or 'timeout':8s} "
+              f"decision p50 {p50 * 1000:.3f} ms p99 {p99 * 1000:.3f} ms max {p100 * 1000:.3f} ms")
+    print(f"worst decision: {max(worst) * 1000:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Batched Snake engine.
+Runs N games in lockstep on NumPy arrays so policy training can advance
+thousands of games with one vectorized step() call. The rules are the same
+as SnakeEngine.move_snake and SnakeEngine.change_direction.
+
+NumPy is optional for the rest of the project but required here:
+    pip install numpy
+"""
+
+try:
+    import numpy as np
+except ImportError:  # Only the batch engine needs NumPy
+    np = None
+
+from snake_engine import Direction
+
+# Action codes index into this list (UP, DOWN, LEFT, RIGHT); -1 keeps going
+DIRECTIONS = list(Direction)
+KEEP = -1
+
+class BatchSnakeEngine:
+    """N independent snake games stored as arrays.
+
+    Each game keeps a board occupancy row, a ring buffer of body cells
+    (flat y * width + x indices, tail to head), its direction, food cell,
+    score, speed and done flag. Finished games restart automatically on the
+    next step() unless auto_reset is False.
+    """
+
+    def __init__(self, num_games, width=60, height=25, margin=2,
+                 start_speed=0.12, min_speed=0.06, speed_step=0.003,
+                 seed=None, auto_reset=True):
+        if np is None:
+            raise ImportError("BatchSnakeEngine needs NumPy (pip install numpy)")
+
+        self.num_games = num_games
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.start_speed = start_speed
+        self.min_speed = min_speed
+        self.speed_step = speed_step
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+
+        # Direction tables in DIRECTIONS order
+        self.dy = np.array([d.value[0] for d in DIRECTIONS], dtype=np.int64)
+        self.dx = np.array([d.value[1] for d in DIRECTIONS], dtype=np.int64)
+        self.opposite = np.array([DIRECTIONS.index(Direction((-d.value[0], -d.value[1])))
+                                  for d in DIRECTIONS], dtype=np.int64)
+        self.right = DIRECTIONS.index(Direction.RIGHT)
+
+        cells = width * height
+        playable = np.zeros((height, width), dtype=bool)
+        playable[margin:height - margin, margin:width - margin] = True
+        self.playable = playable.ravel()
+        self.capacity = int(self.playable.sum())
+
+        n = num_games
+        self.occupancy = np.zeros((n, cells), dtype=np.uint8)
+        self.body = np.zeros((n, self.capacity), dtype=np.int64)
+        self.head_ptr = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.direction = np.zeros(n, dtype=np.int64)
+        self.food = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.speed = np.zeros(n, dtype=np.float64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+        self.board_cleared = np.zeros(n, dtype=bool)
+
+        # Results of the most recent finished game in each slot
+        self.final_score = np.zeros(n, dtype=np.int64)
+        self.final_length = np.zeros(n, dtype=np.int64)
+        self.final_ticks = np.zeros(n, dtype=np.int64)
+
+        self.reset()
+
+    @property
+    def heads(self):
+        """Flat head cell of every game."""
+        return self.body[np.arange(self.num_games), self.head_ptr]
+
+    def boards(self):
+        """Occupancy as an (N, height, width) view."""
+        return self.occupancy.reshape(self.num_games, self.height, self.width)
+
+    def observation(self):
+        """Return the per-game state arrays (views, not copies)."""
+        return {
+            'head': self.heads,
+            'food': self.food,
+            'direction': self.direction,
+            'length': self.length,
+            'score': self.score,
+            'done': self.done,
+        }
+
+    def reset(self, games=None):
+        """Restart the given games (an index array or mask; default all)."""
+        if games is None:
+            games = np.arange(self.num_games)
+        games = np.asarray(games)
+        if games.dtype == bool:
+            games = np.flatnonzero(games)
+        if games.size == 0:
+            return self.observation()
+
+        # Snake in the center, three cells long, heading right
+        center = (self.height // 2) * self.width + self.width // 2
+        start = np.array([center - 2, center - 1, center], dtype=np.int64)
+
+        self.occupancy[games] = 0
+        self.body[games, :3] = start
+        self.occupancy[games[:, None], start[None, :]] = 1
+        self.head_ptr[games] = 2
+        self.length[games] = 3
+        self.direction[games] = self.right
+        self.score[games] = 0
+        self.speed[games] = self.start_speed
+        self.ticks[games] = 0
+        self.done[games] = False
+        self.board_cleared[games] = False
+        self._place_food(games)
+        return self.observation()
+
+    def _place_food(self, games):
+        """Put food on a uniformly random free cell of each given game."""
+        free = (self.occupancy[games] == 0) & self.playable
+        counts = free.sum(axis=1)
+        full = counts == 0
+        # Pick the r-th free cell of each row
+        r = (self.rng.random(games.size) * counts).astype(np.int64)
+        cumulative = np.cumsum(free, axis=1)
+        food = np.argmax(cumulative > r[:, None], axis=1)
+        self.food[games] = np.where(full, -1, food)
+        if full.any():
+            cleared = games[full]
+            self.board_cleared[cleared] = True
+            self.done[cleared] = True
+
+    def step(self, actions=None):
+        """Advance every game one tick.
+
+        actions holds one code per game: an index into DIRECTIONS, or KEEP (-1)
+        to keep the current direction. Returns (state, reward, done) arrays;
+        done marks games that ended on this tick. With auto_reset those games
+        have already been restarted and their results are in final_score,
+        final_length and final_ticks.
+        """
+        n = self.num_games
+        reward = np.zeros(n, dtype=np.int64)
+        finished = np.zeros(n, dtype=bool)
+        active = np.flatnonzero(~self.done)
+
+        # Change direction, preventing reverse direction
+        if actions is not None:
+            act = np.broadcast_to(np.asarray(actions, dtype=np.int64), (n,))[active]
+            current = self.direction[active]
+            turn = (act >= 0) & (act != self.opposite[current])
+            self.direction[active] = np.where(turn, act, current)
+
+        self.ticks[active] += 1
+        head = self.body[active, self.head_ptr[active]]
+        direction = self.direction[active]
+        new_y = head // self.width + self.dy[direction]
+        new_x = head % self.width + self.dx[direction]
+        new_head = new_y * self.width + new_x
+
+        # Check wall collision, then self collision (tail still in place)
+        m = self.margin
+        wall = ((new_y < m) | (new_y >= self.height - m) |
+                (new_x < m) | (new_x >= self.width - m))
+        safe_head = np.where(wall, 0, new_head)
+        dead = wall | (self.occupancy[active, safe_head] == 1)
+        finished[active[dead]] = True
+
+        # Add new head
+        alive = active[~dead]
+        new_head = new_head[~dead]
+        ptr = (self.head_ptr[alive] + 1) % self.capacity
+        self.body[alive, ptr] = new_head
+        self.head_ptr[alive] = ptr
+        self.occupancy[alive, new_head] = 1
+        self.length[alive] += 1
+
+        # Remove tail if no food eaten
+        eat = new_head == self.food[alive]
+        moved = alive[~eat]
+        tail_ptr = (self.head_ptr[moved] - self.length[moved] + 1) % self.capacity
+        self.occupancy[moved, self.body[moved, tail_ptr]] = 0
+        self.length[moved] -= 1
+
+        # Score, respawn food and speed up the games that ate
+        grew = alive[eat]
+        if grew.size:
+            self.score[grew] += 10
+            reward[grew] = 10
+            self._place_food(grew)
+            finished[grew[self.board_cleared[grew]]] = True
+            speed = self.speed[grew]
+            self.speed[grew] = np.where(speed > self.min_speed,
+                                        np.maximum(self.min_speed, speed - self.speed_step),
+                                        speed)
+
+        self.done |= finished
+        if finished.any():
+            self.final_score[finished] = self.score[finished]
+            self.final_length[finished] = self.length[finished]
+            self.final_ticks[finished] = self.ticks[finished]
+            if self.auto_reset:
+                self.reset(finished)
+
+        return self.observation(), reward, finished
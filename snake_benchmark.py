@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Snake performance benchmarks.
+Measures engine ticks, food placement, search rollouts, autopilot decisions
+and visual frame composition (whole board and a scrolling terminal-sized
+viewport) over a matrix of board sizes and snake fill ratios, without a
+terminal or keyboard (frames are rendered into memory). Results are saved as JSON and can be
+compared against a stored baseline:
+
+    python snake_benchmark.py --out bench.json
+    python snake_benchmark.py --baseline bench.json --threshold 0.2 --case-threshold frame=0.5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+
+from snake_autopilot import Autopilot, hamiltonian_cycle
+from snake_engine import Direction
+from snake_viewport import Camera
+import snake_game_visual as visual
+
+DEFAULT_SIZES = ['60x25', '200x100', '1000x1000']
+DEFAULT_FILLS = [0.01, 0.25, 0.5, 0.95]
+
+# Terminal-sized window for the scrolling viewport case
+VIEWPORT_SIZE = (80, 30)
+
+# The autopilot builds per-cell lookup tables, so it is skipped on huge boards
+AUTOPILOT_MAX_CELLS = 200 * 100
+
+# Moves per random rollout in the search cases
+ROLLOUT_DEPTH = 20
+
+class CycleRunner:
+    """Keeps a snake of a given fill ratio moving safely along a Hamiltonian cycle."""
+
+    def __init__(self, game, fill):
+        self.game = game
+        self.fill = fill
+        m = game.margin
+        rows, cols = game.height - 2 * m, game.width - 2 * m
+        self.cycle = [(y + m, x + m) for y, x in hamiltonian_cycle(rows, cols)]
+        self.next_cell = {cell: self.cycle[(i + 1) % len(self.cycle)]
+                          for i, cell in enumerate(self.cycle)}
+        self.setup()
+
+    def setup(self):
+        """Lay the snake along the cycle with its head at the end of the body."""
+        game = self.game
+        game.reset()
+        length = max(3, min(len(self.cycle) - 1, int(self.fill * len(self.cycle))))
+        body = self.cycle[length - 1::-1]
+        head, neck = body[0], body[1]
+        direction = Direction((head[0] - neck[0], head[1] - neck[1]))
+        game.restore(body, direction, None)
+        game.food = game.place_food()
+
+    def tick(self):
+        game = self.game
+        if game.game_over:
+            self.setup()
+        head_y, head_x = game.snake[0]
+        next_y, next_x = self.next_cell[(head_y, head_x)]
+        game.change_direction(Direction((next_y - head_y, next_x - head_x)))
+        game.move_snake()
+
+def undo_rollout(engine, rng, depth=ROLLOUT_DEPTH):
+    """Play up to depth random moves with apply(), then take them all back."""
+    directions = list(Direction)
+    records = []
+    for _ in range(depth):
+        if engine.game_over:
+            break
+        records.append(engine.apply(directions[rng.randrange(4)]))
+    for record in reversed(records):
+        engine.undo(record)
+
+def clone_rollout(engine, rng, depth=ROLLOUT_DEPTH):
+    """Play up to depth random moves on a clone of engine."""
+    directions = list(Direction)
+    scratch = engine.clone()
+    for _ in range(depth):
+        if scratch.game_over:
+            break
+        scratch.step(directions[rng.randrange(4)])
+
+def measure(operation, budget, min_runs=3):
+    """Run operation repeatedly for about budget seconds; return seconds per run."""
+    runs = 0
+    elapsed = 0.0
+    start = time.perf_counter()
+    while elapsed < budget or runs < min_runs:
+        operation()
+        runs += 1
+        elapsed = time.perf_counter() - start
+    return elapsed / runs
+
+def bench_case(width, height, fill, budget):
+    """Benchmark one board size and fill ratio; returns a list of result dicts."""
+    game = visual.SnakeGame(width, height)
+    runner = CycleRunner(game, fill)
+    actual_fill = len(game.snake) / len(runner.cycle)
+    results = []
+
+    def record(name, seconds):
+        results.append({
+            'case': name,
+            'width': width,
+            'height': height,
+            'fill': fill,
+            'actual_fill': round(actual_fill, 4),
+            'us_per_op': seconds * 1e6,
+            'ops_per_sec': 1.0 / seconds if seconds else float('inf'),
+        })
+
+    record('tick', measure(runner.tick, budget))
+
+    runner.setup()
+    record('place_food', measure(game.place_food, budget))
+
+    runner.setup()
+    rng = random.Random(0)
+    record('rollout', measure(lambda: undo_rollout(game, rng), budget))
+    record('clone_rollout', measure(lambda: clone_rollout(game, rng), budget))
+
+    record('compose', measure(lambda: visual.compose_frame(game), budget))
+
+    camera = Camera(*VIEWPORT_SIZE)
+    def viewport():
+        runner.tick()
+        visual.compose_frame(game, camera=camera)
+    record('viewport', measure(viewport, budget))
+
+    if width * height <= AUTOPILOT_MAX_CELLS:
+        runner.setup()
+        pilot = Autopilot(game)
+        def autopilot():
+            if game.game_over:
+                runner.setup()
+            pilot.steer()
+            game.move_snake()
+        record('autopilot', measure(autopilot, budget))
+        results[-1]['decision_p99_us'] = pilot.latency.percentiles((99,))[0] * 1e6
+
+    renderer = visual.DiffRenderer(io.StringIO())
+    def frame():
+        runner.tick()
+        visual.draw_game(game, renderer)
+    record('frame', measure(frame, budget))
+    results[-1]['bytes_per_frame'] = renderer.average_bytes
+    return results
+
+def case_key(result):
+    return f"{result['case']}/{result['width']}x{result['height']}/{result['fill']}"
+
+def compare(results, baseline, threshold, case_thresholds):
+    """Return (key, baseline us, current us, limit) for every regression."""
+    previous = {case_key(r): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(case_key(result))
+        if old is None:
+            continue
+        limit = case_thresholds.get(result['case'], threshold)
+        if result['us_per_op'] > old['us_per_op'] * (1 + limit):
+            regressions.append((case_key(result), old['us_per_op'], result['us_per_op'], limit))
+    return regressions
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ticks, food placement and frame composition.")
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="board sizes as WIDTHxHEIGHT")
+    parser.add_argument('--fills', nargs='+', type=float, default=DEFAULT_FILLS, help="snake fill ratios")
+    parser.add_argument('--budget', type=float, default=0.5, help="seconds per measurement")
+    parser.add_argument('--out', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="compare against this JSON results file")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument('--case-threshold', action='append', default=[], metavar='CASE=RATIO',
+                        help="per-case threshold, e.g. frame=0.5")
+    args = parser.parse_args()
+
+    case_thresholds = {}
+    for item in args.case_threshold:
+        name, value = item.split('=')
+        case_thresholds[name] = float(value)
+
+    results = []
+    for size in args.sizes:
+        width, height = parse_size(size)
+        for fill in args.fills:
+            # Nothing may reach the real terminal while benchmarking
+            with contextlib.redirect_stdout(io.StringIO()):
+                case_results = bench_case(width, height, fill, args.budget)
+            for result in case_results:
+                print(f"{case_key(result):<32} {result['us_per_op']:>12.2f} µs  "
+                      f"{result['ops_per_sec']:>12,.0f}/s", flush=True)
+            results.extend(case_results)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, case_thresholds)
+        for key, old, new, limit in regressions:
+            print(f"REGRESSION {key}: {old:.2f} µs -> {new:.2f} µs (limit +{limit:.0%})")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Incremental board model.
+Front-end games emit cell-change events as they play: a normal tick moves
+the head, turns the old head into body and frees the tail, and eating adds
+a food somewhere else. A BoardModel keeps the rows of cells
+(border, walls, snake and food) of one window onto the board and applies
+only those changes, so keeping it current costs a few cell writes per tick
+instead of a rebuild every frame. The window is the whole board unless a
+renderer asks for a view, and the snake comes from the engine's occupancy
+grid, so a huge board costs no more than its view. Text renderers also get
+each row's joined text, rejoined only for rows that changed.
+
+    class SnakeGame(CellEvents, SnakeEngine): ...
+
+    model = BoardModel(game, {HEAD: '●', BODY: '○', FOOD: '★'}, border_rows)
+    lines = model.lines()
+    rows = model.view(top, left, 20, 40)
+"""
+
+from snake_engine import CELL_SNAKE, SnakeEngine
+
+# Cell kinds carried by events (EMPTY shows the background again)
+EMPTY = 'empty'
+HEAD = 'head'
+BODY = 'body'
+FOOD = 'food'
+
+class CellEvents:
+    """Mixin for SnakeEngine subclasses that reports which cells each tick changed.
+
+    Listeners in cell_listeners are called with a list of (y, x, kind)
+    changes after every tick that moved the snake, or with None when the
+    whole board may have changed (a reset, a restore or a food set from
+    outside) and needs a rebuild. The changes are found by comparing the
+    head, tail and length before and after the tick, so the engine's own
+    hot path is untouched. apply() and undo() are not reported: lookahead
+    belongs on clones.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.cell_listeners = []
+        super().__init__(*args, **kwargs)
+
+    def _emit(self, changes):
+        for listener in self.cell_listeners:
+            listener(changes)
+
+    def move_snake(self):
+        """Move the snake, then report the cells that changed."""
+        body = self._body
+        old_head, tail, length = body[0], body[-1], len(body)
+        foods = len(self._foods)
+        super().move_snake()
+        head = body[0]
+        if head == old_head or not self.cell_listeners:
+            return
+        changes = [(old_head[0], old_head[1], BODY), (head[0], head[1], HEAD)]
+        if len(body) == length:
+            changes.append((tail[0], tail[1], EMPTY))
+        elif len(self._foods) == foods:
+            # Eaten food was replaced: the newest food is the new one
+            food_y, food_x = next(reversed(self._foods.values()))
+            changes.append((food_y, food_x, FOOD))
+        self._emit(changes)
+
+    def reset(self, seed=None):
+        state = super().reset(seed)
+        self._emit(None)
+        return state
+
+    def restore(self, *args, **kwargs):
+        super().restore(*args, **kwargs)
+        self._emit(None)
+
+    food = property(SnakeEngine.food.fget, doc=SnakeEngine.food.__doc__)
+
+    @food.setter
+    def food(self, cell):
+        SnakeEngine.food.fset(self, cell)
+        self._emit(None)
+
+class BoardModel:
+    """The cells of a window onto the board, kept current from a game's cell events.
+
+    rows[y][x] is what to draw at cell (top + y, left + x) of the window:
+    background(game) supplies the empty board (border, walls, portals) as
+    rows of cells, and cells maps HEAD, BODY and FOOD to what is drawn over
+    it. The rows are built on first use, for the whole board unless view()
+    picks a window first; moving the window rebuilds them from the
+    occupancy grid, so memory and rebuilds are O(window) rather than
+    O(board). Rows are updated in place, so a renderer that
+    keeps frames must copy the rows it uses. Animated decoration (like a
+    changing border) belongs in the renderer, painted over the window.
+    """
+
+    def __init__(self, game, cells, background):
+        self.game = game
+        self.cells = cells
+        self.background = background
+        self.window = None
+        self.rows = None
+        self.updates = 0
+        self.rebuilds = 0
+        game.cell_listeners.append(self.apply)
+
+    def rebuild(self):
+        """Redraw every cell of the window from the game's current state: O(window)."""
+        self.base = self.background(self.game)
+        self.rows = self._draw(*self.window)
+        self._text = [None] * len(self.rows)
+        self._dirty = set(range(len(self.rows)))
+        self.rebuilds += 1
+
+    def _draw(self, top, left, height, width):
+        """The cells of a rectangle of the board, drawn from the game's state."""
+        game, cells = self.game, self.cells
+        rows = [list(row[left:left + width]) for row in self.base[top:top + height]]
+        body_cell, grid, stride = cells[BODY], game.occupancy, game.width
+        if width < height:
+            # A strip uncovered by a sideways scroll: search it column by column
+            for c in range(width):
+                start = top * stride + left + c
+                column = grid[start:start + height * stride:stride]
+                r = column.find(CELL_SNAKE)
+                while r != -1:
+                    rows[r][c] = body_cell
+                    r = column.find(CELL_SNAKE, r + 1)
+        else:
+            for r, row in enumerate(rows):
+                start = (top + r) * stride + left
+                end = start + width
+                x = grid.find(CELL_SNAKE, start, end)
+                while x != -1:
+                    row[x - start] = body_cell
+                    x = grid.find(CELL_SNAKE, x + 1, end)
+        head_y, head_x = game.snake[0]
+        cells_in_window = [(head_y, head_x, cells[HEAD])]
+        cells_in_window.extend((food_y, food_x, cells[FOOD]) for food_y, food_x in game.foods)
+        for y, x, cell in cells_in_window:
+            if top <= y < top + height and left <= x < left + width:
+                rows[y - top][x - left] = cell
+        return rows
+
+    def view(self, top, left, height, width):
+        """Move the window and return its rows.
+
+        A scroll keeps the rows still in view and draws only the cells it
+        uncovers; any other change of window rebuilds it.
+        """
+        window = (top, left, height, width)
+        if window == self.window:
+            return self.rows
+        old = self.window
+        if old is None or old[2:] != (height, width) or \
+                abs(top - old[0]) >= height or abs(left - old[1]) >= width:
+            self.window = window
+            self.rebuild()
+            return self.rows
+        rows, old_top, old_left = self.rows, old[0], old[1]
+        dx, dy = left - old_left, top - old_top
+        if dx > 0:
+            strip = self._draw(old_top, old_left + width, height, dx)
+            rows = [row[dx:] + new for row, new in zip(rows, strip)]
+        elif dx < 0:
+            strip = self._draw(old_top, left, height, -dx)
+            rows = [new + row[:dx] for row, new in zip(rows, strip)]
+        if dy > 0:
+            rows = rows[dy:] + self._draw(old_top + height, left, dy, width)
+        elif dy < 0:
+            rows = self._draw(top, left, -dy, width) + rows[:dy]
+        self.window, self.rows = window, rows
+        self._text = [None] * height
+        self._dirty = set(range(height))
+        return rows
+
+    def apply(self, changes):
+        """Listener for CellEvents: write the changed cells in the window (None rebuilds)."""
+        if self.window is None:
+            return
+        if changes is None:
+            self.rebuild()
+            return
+        rows, base, cells, dirty = self.rows, self.base, self.cells, self._dirty
+        top, left, height, width = self.window
+        for y, x, kind in changes:
+            r, c = y - top, x - left
+            if 0 <= r < height and 0 <= c < width:
+                rows[r][c] = base[y][x] if kind == EMPTY else cells[kind]
+                dirty.add(r)
+        self.updates += len(changes)
+
+    def lines(self):
+        """Each window row joined into a string; only rows changed since the last call are rejoined."""
+        if self.window is None:
+            self.view(0, 0, self.game.height, self.game.width)
+        text, rows = self._text, self.rows
+        for y in self._dirty:
+            text[y] = ''.join(rows[y])
+        self._dirty.clear()
+        return text
+
+    def detach(self):
+        """Stop following the game."""
+        self.game.cell_listeners.remove(self.apply)
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Headless Snake engine.
+The game rules with no sleeps, no terminal output and no platform imports,
+so bots, tests and analytics can drive games as fast as the CPU allows.
+
+    engine = SnakeEngine(seed=42)
+    state = engine.reset(seed=42)
+    state, reward, done = engine.step(Direction.UP)
+"""
+
+import random
+from array import array
+from collections import deque, namedtuple
+from enum import Enum
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only makes building the free-cell index of big boards fast
+    np = None
+
+class Direction(Enum):
+    UP = (-1, 0)
+    DOWN = (1, 0)
+    LEFT = (0, -1)
+    RIGHT = (0, 1)
+
+# Rule presets matching the two front-ends
+RULES = {
+    'visual': dict(width=60, height=25, margin=2,
+                   start_speed=0.12, min_speed=0.06, speed_step=0.003),
+    'windows': dict(width=50, height=20, margin=1,
+                    start_speed=0.15, min_speed=0.08, speed_step=0.005),
+}
+
+# Values of SnakeEngine.death_cause once a game ends
+DEATH_WALL = 'wall'
+DEATH_SELF = 'self'
+DEATH_CLEARED = 'cleared'
+
+# Occupancy grid values: levels add walls and portals to the snake's cells
+CELL_EMPTY = 0
+CELL_SNAKE = 1
+CELL_WALL = 2
+CELL_PORTAL = 3
+
+# Turns buffered between ticks (e.g. a quick "up then left")
+MAX_QUEUED_TURNS = 3
+
+# Cheap snapshot of what a player (or bot) can see after each tick
+Observation = namedtuple('Observation', 'head food direction length score done')
+
+# What SnakeEngine.apply() changed, for undo(): the state before the tick, the
+# tail it dropped (None if the snake grew), the head's old free-cell slot (None
+# if the head didn't move), and the RNG state and prior foods if food was eaten
+Undo = namedtuple('Undo', 'direction ticks score speed foods game_over board_cleared death_cause '
+                          'tail head_slot rng_state')
+
+class FreeCells:
+    """Index of empty playable cells with O(1) add, remove and uniform sampling.
+
+    Cells are flat board indices (y * width + x) kept in a compact array; a
+    slot array the size of the board (-1 for occupied cells) lets remove()
+    swap the last cell into the hole instead of shifting the array.
+    """
+
+    def __init__(self, size, cells):
+        self.cells = array('i', cells)
+        if np is not None:
+            slots = np.full(size, -1, dtype=np.intc)
+            slots[np.frombuffer(self.cells, dtype=np.intc)] = np.arange(len(self.cells), dtype=np.intc)
+            self.slots = array('i', slots.tobytes())
+            return
+        self.slots = array('i', [-1]) * size
+        slots = self.slots
+        for slot, cell in enumerate(self.cells):
+            slots[cell] = slot
+
+    @classmethod
+    def from_grid(cls, grid, width, height, margin):
+        """Index of the empty cells of an occupancy grid inside margin, in row-major order."""
+        if np is None:
+            return cls(len(grid), (cell
+                                   for y in range(margin, height - margin)
+                                   for cell in range(y * width + margin, y * width + width - margin)
+                                   if not grid[cell]))
+        board = np.frombuffer(grid, dtype=np.uint8).reshape(height, width)
+        free = np.zeros((height, width), dtype=bool)
+        inner = (slice(margin, height - margin), slice(margin, width - margin))
+        free[inner] = board[inner] == CELL_EMPTY
+        return cls(len(grid), np.flatnonzero(free).astype(np.intc).tobytes())
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return self.slots[cell] >= 0
+
+    def add(self, cell):
+        """Mark a cell as free."""
+        self.slots[cell] = len(self.cells)
+        self.cells.append(cell)
+
+    def remove(self, cell):
+        """Mark a free cell as occupied."""
+        slot = self.slots[cell]
+        self.slots[cell] = -1
+        last = self.cells.pop()
+        if last != cell:
+            self.cells[slot] = last
+            self.slots[last] = slot
+
+    def restore(self, cell, slot):
+        """Undo remove(cell), given the slot the cell had, leaving the same order as before."""
+        cells = self.cells
+        if slot == len(cells):
+            cells.append(cell)
+        else:
+            moved = cells[slot]
+            cells.append(moved)
+            self.slots[moved] = len(cells) - 1
+            cells[slot] = cell
+        self.slots[cell] = slot
+
+    def copy(self):
+        other = FreeCells.__new__(FreeCells)
+        other.cells = self.cells[:]
+        other.slots = self.slots[:]
+        return other
+
+    def sample(self, rng):
+        """Pick a free cell uniformly at random, or None if the board is full."""
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+class SnakeEngine:
+    """Snake rules and state for one game.
+
+    margin is the number of wall rows/columns on each edge of the board:
+    the snake dies on any cell closer to the edge than that. A level (see
+    snake_level) replaces the board size and margin with its own walls,
+    portals, start position and number of foods.
+    """
+
+    def __init__(self, width=60, height=25, margin=2,
+                 start_speed=0.12, min_speed=0.06, speed_step=0.003, seed=None, level=None):
+        self.level = level
+        if level is not None:
+            width, height, margin = level.width, level.height, 0
+        self.width = width
+        self.height = height
+        self.margin = margin
+        if level is None and not (margin <= width // 2 - 2 and width // 2 < width - margin
+                                  and margin <= height // 2 < height - margin):
+            # The starting snake would lie in the wall, and free its cells into the food pool
+            raise ValueError(f"A {width}x{height} board with margin {margin} is too small "
+                             f"for the starting snake")
+        self.food_count = 1 if level is None else level.food_count
+        self.portals = {} if level is None else level.exits
+
+        # Game speed (seconds between moves, lower = faster)
+        self.start_speed = start_speed
+        self.min_speed = min_speed
+        self.speed_step = speed_step
+
+        self.reset(seed)
+
+    @property
+    def free_order(self):
+        """Free cells (flat indices) in the order place_food samples from (read-only)."""
+        return self._free.cells
+
+    @property
+    def snake(self):
+        """Snake segments from head to tail (read-only view for renderers)."""
+        return self._body
+
+    @property
+    def occupancy(self):
+        """Row-major bytearray of the board, CELL_SNAKE where the snake is (read-only)."""
+        return self._grid
+
+    @property
+    def foods(self):
+        """Food cells on the board, oldest first (read-only view)."""
+        return self._foods.values()
+
+    @property
+    def food(self):
+        """The oldest food cell, or None once the board is cleared."""
+        for food in self._foods.values():
+            return food
+        return None
+
+    @food.setter
+    def food(self, cell):
+        """Replace the oldest food (None removes it), keeping any others."""
+        foods = list(self._foods.values())[1:]
+        if cell is not None:
+            foods.insert(0, cell)
+        self._foods = {y * self.width + x: (y, x) for y, x in foods}
+
+    def reset(self, seed=None):
+        """Start a new game and return its first observation.
+
+        Without a seed a fresh one is drawn, so every game can be reproduced
+        from engine.seed.
+        """
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        self.score = 0
+        self.ticks = 0
+        self.game_over = False
+        self.board_cleared = False
+        self.death_cause = None
+        self.speed = self.start_speed
+        self._clear_turns()
+
+        if self.level is None:
+            # Initialize snake in the center
+            center_y, center_x = self.height // 2, self.width // 2
+            self._reset_body(center_y, center_x)
+            self.direction = Direction.RIGHT
+        else:
+            self.direction = self.level.direction
+            self._load_body(self.level.start_body())
+
+        # Place first food
+        self._foods = {}
+        self._fill_foods()
+        return self.observation()
+
+    def _reset_body(self, center_y, center_x):
+        """Lay out the starting snake."""
+        self._load_body([(center_y, center_x), (center_y, center_x - 1), (center_y, center_x - 2)])
+
+    def _load_body(self, body):
+        """Set the body and rebuild its occupancy grid and the free-cell index."""
+        self._body = deque(body)
+        w, m = self.width, self.margin
+        if self.level is None:
+            grid = self._grid = bytearray(w * self.height)
+        else:
+            grid = self._grid = bytearray(self.level.grid)
+        for y, x in self._body:
+            grid[y * w + x] = CELL_SNAKE
+        self._free = FreeCells.from_grid(grid, w, self.height, m)
+
+    def restore(self, body, direction, food, score=0, speed=None, ticks=0, foods=None,
+                free_order=None):
+        """Load a mid-game state: body from head to tail, direction and food.
+
+        Used to jump into a recorded game or set up benchmark positions. The
+        free-cell index is rebuilt, which is O(board). food is the one food
+        on the board (or None); foods lists every food instead. The index
+        is rebuilt in row-major order unless free_order (a saved
+        free_order) is given; only then does the same RNG state go on to
+        place the same food as the saved game.
+        """
+        self._load_body(body)
+        if free_order is not None:
+            if sorted(free_order) != sorted(self._free.cells):
+                raise ValueError("free_order does not match the free cells of the body")
+            self._free = FreeCells(len(self._grid), free_order)
+        self.direction = direction
+        if foods is None:
+            foods = [] if food is None else [food]
+        self._foods = {y * self.width + x: (y, x) for y, x in foods}
+        self.score = score
+        self.speed = self.start_speed if speed is None else speed
+        self.ticks = ticks
+        self.game_over = False
+        self.board_cleared = False
+        self.death_cause = None
+        self._clear_turns()
+
+    def _clear_turns(self):
+        self._turns = deque()
+        self.last_turn_stamp = None
+
+    def is_blocked(self, cell):
+        """Return True if moving the head onto cell would end the game.
+
+        Portals count as open, whatever is on the far side.
+        """
+        m = self.margin
+        y, x = cell
+        if not (m <= y < self.height - m and m <= x < self.width - m):
+            return True
+        value = self._grid[y * self.width + x]
+        return value == CELL_SNAKE or value == CELL_WALL
+
+    def observation(self):
+        """Return the current state without copying the board."""
+        return Observation(self._body[0], self.food, self.direction,
+                           len(self._body), self.score, self.game_over)
+
+    def step(self, action=None):
+        """Turn towards action (a Direction, or None to keep going) and advance one tick.
+
+        Returns (state, reward, done) where reward is the score gained this tick.
+        """
+        if action is not None:
+            self.change_direction(action)
+        score = self.score
+        self.move_snake()
+        return self.observation(), self.score - score, self.game_over
+
+    def place_food(self):
+        """Pick a random free cell without food, or return None if there is none.
+
+        Cells already holding food are redrawn; with a handful of foods on a
+        board of free cells that is rarely more than one draw.
+        """
+        free = self._free
+        if len(free) <= len(self._foods):
+            return None
+        while True:
+            cell = free.sample(self.rng)
+            if cell not in self._foods:
+                return divmod(cell, self.width)
+
+    def _fill_foods(self):
+        """Place foods until the level's food count is on the board."""
+        while len(self._foods) < self.food_count:
+            food = self.place_food()
+            if food is None:
+                return
+            self._foods[food[0] * self.width + food[1]] = food
+
+    def move_snake(self):
+        """Apply one queued turn, then move the snake in the current direction."""
+        if self.game_over:
+            return
+        if self._turns:
+            direction, self.last_turn_stamp = self._turns.popleft()
+            self.change_direction(direction)
+        self._advance()
+
+    def _target(self):
+        """Where the head moves next: ((y, x), flat cell, grid value).
+
+        A head entering a portal comes out next to its partner. Cells off the
+        board (flat cell -1) read as walls, and so does a portal straight
+        after a portal.
+        """
+        head_y, head_x = self._body[0]
+        dy, dx = self.direction.value
+        new_y, new_x = head_y + dy, head_x + dx
+        m, w = self.margin, self.width
+        if not (m <= new_y < self.height - m and m <= new_x < w - m):
+            return (new_y, new_x), -1, CELL_WALL
+        cell = new_y * w + new_x
+        value = self._grid[cell]
+        if value == CELL_PORTAL:
+            exit_y, exit_x = divmod(self.portals[cell], w)
+            new_y, new_x = exit_y + dy, exit_x + dx
+            if not (m <= new_y < self.height - m and m <= new_x < w - m):
+                return (new_y, new_x), -1, CELL_WALL
+            cell = new_y * w + new_x
+            value = self._grid[cell]
+            if value == CELL_PORTAL:
+                value = CELL_WALL
+        return (new_y, new_x), cell, value
+
+    def _advance(self, target=None):
+        """Move the snake one cell in the current direction (target: a precomputed _target())."""
+        self.ticks += 1
+        new_head, cell, value = target or self._target()
+
+        # Check wall and self collision
+        if value:
+            self.game_over = True
+            self.death_cause = DEATH_SELF if value == CELL_SNAKE else DEATH_WALL
+            return
+
+        # Add new head
+        self._body.appendleft(new_head)
+        self._grid[cell] = CELL_SNAKE
+        self._free.remove(cell)
+
+        # Check food collision
+        foods = self._foods
+        if cell in foods:
+            self.score += 10
+            del foods[cell]
+            food = self.place_food()
+            if food is not None:
+                foods[food[0] * self.width + food[1]] = food
+            if not self._free:
+                # Snake fills every playable cell
+                self.board_cleared = True
+                self.game_over = True
+                self.death_cause = DEATH_CLEARED
+            # Increase speed slightly
+            if self.speed > self.min_speed:
+                self.speed = max(self.min_speed, self.speed - self.speed_step)
+        else:
+            # Remove tail if no food eaten
+            tail_y, tail_x = self._body.pop()
+            tail = tail_y * self.width + tail_x
+            self._grid[tail] = 0
+            self._free.add(tail)
+
+    def apply(self, direction=None):
+        """Turn towards direction and play one tick, returning an Undo record.
+
+        Meant for lookahead search: queued turns and subclass behaviour (like
+        pausing) are bypassed, and undo(record) puts back the exact prior
+        state, RNG and free-cell order included. Records must be undone in
+        reverse order.
+        """
+        record_direction = self.direction
+        ticks, score, speed = self.ticks, self.score, self.speed
+        game_over, board_cleared, death_cause = self.game_over, self.board_cleared, self.death_cause
+        if game_over:
+            return Undo(record_direction, ticks, score, speed, None, game_over, board_cleared,
+                        death_cause, None, None, None)
+        if direction is not None:
+            self.change_direction(direction)
+
+        # Where the head is going, so undo knows what to put back
+        target = self._target()
+        _, cell, value = target
+        head_slot = None
+        rng_state = None
+        foods = None
+        if not value:
+            head_slot = self._free.slots[cell]
+            if cell in self._foods:
+                rng_state = self.rng.getstate()
+                foods = self._foods.copy()
+        tail = self._body[-1] if rng_state is None else None
+
+        self._advance(target)
+        return Undo(record_direction, ticks, score, speed, foods, game_over, board_cleared,
+                    death_cause, tail, head_slot, rng_state)
+
+    def undo(self, record):
+        """Reverse the apply() that returned record."""
+        if record.head_slot is not None:
+            w = self.width
+            head_y, head_x = self._body.popleft()
+            head = head_y * w + head_x
+            if record.tail is None:
+                self.rng.setstate(record.rng_state)
+            else:
+                tail_y, tail_x = record.tail
+                tail = tail_y * w + tail_x
+                self._body.append(record.tail)
+                self._grid[tail] = CELL_SNAKE
+                self._free.remove(tail)
+            self._grid[head] = CELL_EMPTY
+            self._free.restore(head, record.head_slot)
+        if record.foods is not None:
+            self._foods = record.foods
+        self.direction, self.ticks, self.score, self.speed = record[:4]
+        self.game_over, self.board_cleared, self.death_cause = record[5:8]
+
+    def clone(self):
+        """Return a plain SnakeEngine with a copy of this game's rules and state.
+
+        Only what the rules need is copied (the body deque, occupancy grid,
+        free-cell arrays, foods and RNG state); no queued turns or subclass
+        state. The level is shared, not copied.
+        """
+        other = SnakeEngine.__new__(SnakeEngine)
+        other.__dict__.update(
+            width=self.width, height=self.height, margin=self.margin,
+            level=self.level, food_count=self.food_count, portals=self.portals,
+            start_speed=self.start_speed, min_speed=self.min_speed, speed_step=self.speed_step,
+            seed=self.seed, score=self.score, ticks=self.ticks, game_over=self.game_over,
+            board_cleared=self.board_cleared, death_cause=self.death_cause, speed=self.speed,
+            direction=self.direction, _foods=self._foods.copy(),
+            _body=self._body.copy(), _grid=self._grid[:], _free=self._free.copy())
+        # Skip seeding: setstate() overwrites it anyway
+        other.rng = random.Random.__new__(random.Random)
+        other.rng.setstate(self.rng.getstate())
+        other._clear_turns()
+        return other
+
+    def queue_direction(self, new_direction, stamp=None):
+        """Queue a turn to apply on a later tick, one turn per tick.
+
+        The reverse-direction guard is checked against the last pending
+        direction, so "up then left" between two ticks is kept. stamp (e.g.
+        the keypress time) is handed back in last_turn_stamp when the turn is
+        applied. Returns False if the turn was ignored.
+        """
+        pending = self._turns[-1][0] if self._turns else self.direction
+        pending_dy, pending_dx = pending.value
+        new_dy, new_dx = new_direction.value
+        if new_direction == pending or (pending_dy, pending_dx) == (-new_dy, -new_dx):
+            return False
+        if len(self._turns) >= MAX_QUEUED_TURNS:
+            return False
+        self._turns.append((new_direction, stamp))
+        return True
+
+    def change_direction(self, new_direction):
+        """Change snake direction, preventing reverse direction."""
+        current_dy, current_dx = self.direction.value
+        new_dy, new_dx = new_direction.value
+
+        if (current_dy, current_dx) != (-new_dy, -new_dx):
+            self.direction = new_direction
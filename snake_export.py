@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Headless frame export.
+Plays games without a terminal and streams their frames to files for
+review: asciicast v2 recordings (playable with `asciinema play`) or
+newline-delimited JSON with the plain text of every frame. Game time is
+simulated, so export runs as fast as frames can be composed, and output is
+collected in memory and written in large chunks. Games are exported in
+parallel over a process pool.
+
+    for frame in frames(game, choose):
+        sink.write(frame)
+
+    python snake_export.py --games 20 --policy greedy --format cast --out exports
+    python snake_export.py --games 100 --format ndjson --fps 0 --out exports
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from snake_game_visual import ESCAPE_SEQUENCE, HUD_ROWS, RENDER_PROFILES, DiffRenderer, SnakeGame, compose_frame
+from snake_level import Level
+from snake_tournament import POLICIES, game_seed
+
+# One composed frame: seconds of game time since the start, engine tick and frame rows
+Frame = namedtuple('Frame', 'time tick rows')
+
+# Characters piled up in memory before a sink writes them out
+CHUNK_SIZE = 1 << 20
+
+def frames(game, choose=None, fps=30, max_ticks=None, overlay=(), camera=None, minimap=None):
+    """Play game headless and yield a Frame for everything the live game would draw.
+
+    As in the live game, ticks come every game.speed seconds and frames every
+    1/fps seconds, but the clock is simulated and nothing waits. With fps
+    of None (or 0) there is one frame per tick. choose(game) picks each
+    tick's direction (None keeps going). Stops after the game-over frame, or
+    the first frame at max_ticks.
+    """
+    index = 0
+    now = 0.0
+    next_tick = game.speed
+    while True:
+        yield Frame(now, game.ticks, compose_frame(game, overlay, camera, minimap))
+        if game.game_over or (max_ticks is not None and game.ticks >= max_ticks):
+            return
+        if fps:
+            index += 1
+            now = index / fps
+        else:
+            now = next_tick
+        while next_tick <= now and not game.game_over:
+            if choose is not None:
+                direction = choose(game)
+                if direction is not None:
+                    game.change_direction(direction)
+            game.move_snake()
+            next_tick += game.speed
+
+def plain_row(row):
+    """A frame row (a string or a list of board cells) as text without colors."""
+    return ESCAPE_SEQUENCE.sub('', row if isinstance(row, str) else ''.join(row))
+
+class FrameSink:
+    """Base for sinks: buffers lines and writes them chunk_size characters at a time."""
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.frames = 0
+        self._file = open(path, 'w', encoding='utf-8', newline='\n')
+        self._lines = []
+        self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_line(self, line):
+        self._lines.append(line)
+        self._pending += len(line) + 1
+        if self._pending >= self.chunk_size:
+            self.flush()
+
+    def write(self, frame):
+        raise NotImplementedError
+
+    def flush(self):
+        """Write out the buffered lines."""
+        if self._lines:
+            self._lines.append('')
+            self._file.write('\n'.join(self._lines))
+            self._lines = []
+            self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+class AsciicastSink(FrameSink):
+    """Asciicast v2: a header line, then one [time, "o", output] event per changed frame.
+
+    Output is what the diff renderer would send to a terminal of width x
+    height, so a recording costs only the cells that changed. Frames that
+    change nothing (e.g. while paused) add no event.
+    """
+
+    def __init__(self, path, width, height, profile='full', title=None, chunk_size=CHUNK_SIZE):
+        super().__init__(path, chunk_size)
+        self.renderer = DiffRenderer(profile=profile)
+        # No timestamp, so exports of the same game are byte-identical
+        header = {'version': 2, 'width': width, 'height': height, 'env': {'TERM': 'xterm-256color'}}
+        if title:
+            header['title'] = title
+        self._write_line(json.dumps(header))
+
+    def write(self, frame):
+        data = self.renderer.diff(frame.rows)
+        if not data:
+            return
+        self._write_line(json.dumps([round(frame.time, 6), 'o', data], ensure_ascii=False))
+        self.frames += 1
+
+class TextSink(FrameSink):
+    """Newline-delimited JSON: {"time", "tick", "frame"} with the frame as plain text.
+
+    Like the diff renderer, it keeps the previous frame and only converts
+    the rows that changed.
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        super().__init__(path, chunk_size)
+        self._previous = []
+        self._text = []
+
+    def write(self, frame):
+        previous, text = self._previous, self._text
+        lines = [text[y] if y < len(previous) and row == previous[y] else plain_row(row)
+                 for y, row in enumerate(frame.rows)]
+        self._previous, self._text = frame.rows, lines
+        self._write_line(json.dumps({'time': round(frame.time, 6), 'tick': frame.tick,
+                                     'frame': '\n'.join(lines)}, ensure_ascii=False))
+        self.frames += 1
+
+SINKS = {
+    'cast': AsciicastSink,
+    'ndjson': TextSink,
+}
+
+def export_game(seed, path, sink_format, policy='greedy', width=60, height=25, fps=30,
+                max_ticks=None, profile='full', level_path=None):
+    """Play one seeded game into a sink file; returns the number of frames composed."""
+    level = Level.open(level_path) if level_path else None
+    try:
+        game = SnakeGame(width, height, level=level, seed=seed)
+        choose = POLICIES[policy](random.Random(seed))
+        if sink_format == 'cast':
+            sink = AsciicastSink(path, max(game.width, 62), game.height + HUD_ROWS + 2, profile,
+                                 title=f"snake {policy} seed {seed}")
+        else:
+            sink = TextSink(path)
+        count = 0
+        with sink:
+            for frame in frames(game, choose, fps, max_ticks):
+                sink.write(frame)
+                count += 1
+        return count
+    finally:
+        if level is not None:
+            level.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Export headless games as asciicast or NDJSON frame streams.")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--policy', default='greedy', choices=sorted(POLICIES))
+    parser.add_argument('--format', default='cast', choices=sorted(SINKS))
+    parser.add_argument('--out', required=True, help="directory for game-<seed>.<format> files")
+    parser.add_argument('--seed', type=int, default=0, help="base seed for per-game seeds")
+    parser.add_argument('--size', default='60x25', metavar='WIDTHxHEIGHT')
+    parser.add_argument('--level', metavar='FILE', help="play a level file instead of the open board")
+    parser.add_argument('--fps', type=float, default=30, help="frames per second of game time (0: one per tick)")
+    parser.add_argument('--max-ticks', type=int, default=20_000)
+    parser.add_argument('--profile', default='full', choices=RENDER_PROFILES, help="render profile for asciicast output")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    if args.level and args.policy == 'autopilot':
+        parser.error("the autopilot only plays open boards, not levels")
+    width, height = (int(n) for n in args.size.lower().split('x'))
+
+    os.makedirs(args.out, exist_ok=True)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = []
+        for index in range(args.games):
+            seed = game_seed(args.seed, index)
+            path = os.path.join(args.out, f"game-{seed}.{args.format}")
+            futures.append(pool.submit(export_game, seed, path, args.format, args.policy, width, height,
+                                       args.fps, args.max_ticks, args.profile, args.level))
+        total = sum(future.result() for future in futures)
+    elapsed = time.perf_counter() - start
+    print(f"{args.games} games, {total:,} frames in {elapsed:.1f}s ({total / elapsed:,.0f} frames/s)")
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,33 @@ A stunning, colorful Snake game with amazing graphics!
 Use WASD or Arrow Keys to control the snake.
 """
 
+import argparse
 import os
+import sys
 import time
 import random
-import msvcrt
-from enum import Enum
+import re
+import unicodedata
+from functools import lru_cache
+from itertools import chain, compress, islice
+from operator import ne
+
+try:
+    import msvcrt
+except ImportError:  # Not on Windows: the game logic still imports fine
+    msvcrt = None
+
+from snake_autopilot import Autopilot
+from snake_board import BODY, FOOD, HEAD, BoardModel, CellEvents
+from snake_engine import CELL_PORTAL, CELL_WALL, SnakeEngine
+from snake_input import KEY_DIRECTIONS, InputLatency, open_input
+from snake_leaderboard import GameRecord, Leaderboard, default_player
+from snake_level import Level
+from snake_loop import GameLoop, RenderThread
+from snake_outcomes import Outcome, OutcomeLog
+from snake_profiler import FrameProfiler
+from snake_replay import ReplayRecorder
+from snake_viewport import Camera, Minimap
 
 # ANSI Color codes for beautiful terminal colors
 class Colors:
@@ -46,108 +68,102 @@ class Colors:
     BG_CYAN = '\033[46m'
     BG_WHITE = '\033[47m'
 
-class Direction(Enum):
-    UP = (-1, 0)
-    DOWN = (1, 0)
-    LEFT = (0, -1)
-    RIGHT = (0, 1)
-
-class SnakeGame:
-    def __init__(self, width=60, height=25):
-        self.width = width
-        self.height = height
-        self.score = 0
+# Cursor and screen control sequences used by the differential renderer
+HIDE_CURSOR = '\033[?25l'
+SHOW_CURSOR = '\033[?25h'
+CLEAR_SCREEN = '\033[2J\033[H'
+CLEAR_LINE = '\033[K'
+ESCAPE_SEQUENCE = re.compile(r'\033\[[0-9;?]*[A-Za-z]')
+
+# Render profiles, richest first; the auto mode steps down this list when writes fall behind
+RENDER_PROFILES = ('full', 'color16', 'ascii')
+
+# SGR parameters kept by the 16-color profile: reset, bold, foregrounds and backgrounds
+SGR_16 = frozenset(['0', '1'] + [str(n) for n in chain(range(30, 38), range(40, 48),
+                                                       range(90, 98), range(100, 108))])
+SGR_BACKGROUNDS = frozenset(str(n) for n in chain(range(40, 48), range(100, 108)))
+
+# Plain-ASCII stand-ins for the game's glyphs; any other non-ASCII character is dropped
+ASCII_GLYPHS = str.maketrans({
+    '●': '@', '◉': '@', '○': 'o', '★': '*', '⭐': '*', '✦': '+', '◆': '$',
+    '░': '#', '▒': '#', '▓': '#', '█': '#', '·': '.', '▪': 'o',
+    '┌': '+', '┐': '+', '└': '+', '┘': '+', '─': '-', '│': '|',
+    '↑': '^', '↓': 'v', '←': '<', '→': '>', '◎': 'O',
+})
+
+class SnakeGame(CellEvents, SnakeEngine):
+    """Interactive game: engine rules plus pause, high score and animation state.
+
+    board_model follows the game's cell events and holds the board
+    compose_frame draws from.
+    """
+    
+    # Food colors for variety
+    FOOD_COLORS = [
+        f"{Colors.BRIGHT_RED}★{Colors.RESET}",
+        f"{Colors.BRIGHT_YELLOW}⭐{Colors.RESET}",
+        f"{Colors.BRIGHT_MAGENTA}✦{Colors.RESET}",
+        f"{Colors.BRIGHT_CYAN}◆{Colors.RESET}",
+    ]
+    
+    def __init__(self, width=60, height=25, level=None, seed=None):
         self.high_score = 0
-        self.game_over = False
         self.paused = False
         self.frame_count = 0
+        self.on_game_end = None   # Called with the game before it resets (e.g. to save the score)
+        self.outcome_log = None   # OutcomeLog every finished game is appended to
         
         # Food colors for variety (initialize before placing food)
-        self.food_colors = [
-            f"{Colors.BRIGHT_RED}★{Colors.RESET}",
-            f"{Colors.BRIGHT_YELLOW}⭐{Colors.RESET}",
-            f"{Colors.BRIGHT_MAGENTA}✦{Colors.RESET}",
-            f"{Colors.BRIGHT_CYAN}◆{Colors.RESET}",
-        ]
+        self.food_colors = self.FOOD_COLORS
         self.current_food_color = 0
         
-        # Initialize snake in the center
-        center_y, center_x = height // 2, width // 2
-        self.snake = [(center_y, center_x), (center_y, center_x - 1), (center_y, center_x - 2)]
-        self.direction = Direction.RIGHT
-        
-        # Place first food
-        self.food = self.place_food()
-        
-        # Game speed (lower = faster)
-        self.speed = 0.12
+        # Walls sit two cells deep (or come from the level); speed ramps from 0.12 down to 0.06
+        super().__init__(width, height, margin=2,
+                         start_speed=0.12, min_speed=0.06, speed_step=0.003, seed=seed,
+                         level=level)
         
+        # Head and food are animated, so compose_frame paints them over the model every frame
+        self.board_model = BoardModel(self, {HEAD: BODY_CELLS[1], BODY: BODY_CELLS[1], FOOD: ' '},
+                                      board_background)
+    
+    def reset(self, seed=None):
+        """Start a new game; food colors get their own RNG seeded like the engine's."""
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.color_rng = random.Random(seed)
+        return super().reset(seed)
+    
     def place_food(self):
-        """Place food at a random location not occupied by the snake."""
-        while True:
-            food_pos = (random.randint(2, self.height - 3), 
-                       random.randint(2, self.width - 3))
-            if food_pos not in self.snake:
-                self.current_food_color = random.randint(0, len(self.food_colors) - 1)
-                return food_pos
+        """Place food on a random free cell and give it a random color."""
+        food_pos = super().place_food()
+        if food_pos is not None:
+            self.current_food_color = self.color_rng.randrange(len(self.food_colors))
+        return food_pos
     
     def move_snake(self):
-        """Move the snake in the current direction."""
-        if self.paused or self.game_over:
+        """Move the snake in the current direction unless paused."""
+        if self.paused:
             return
-            
-        head_y, head_x = self.snake[0]
-        dy, dx = self.direction.value
-        new_head = (head_y + dy, head_x + dx)
-        
-        # Check wall collision
-        if (new_head[0] <= 1 or new_head[0] >= self.height - 2 or
-            new_head[1] <= 1 or new_head[1] >= self.width - 2):
-            self.game_over = True
-            return
-        
-        # Check self collision
-        if new_head in self.snake:
-            self.game_over = True
-            return
-        
-        # Add new head
-        self.snake.insert(0, new_head)
-        
-        # Check food collision
-        if new_head == self.food:
-            self.score += 10
-            self.food = self.place_food()
-            # Increase speed slightly
-            if self.speed > 0.06:
-                self.speed = max(0.06, self.speed - 0.003)
-        else:
-            # Remove tail if no food eaten
-            self.snake.pop()
+        super().move_snake()
     
-    def change_direction(self, new_direction):
-        """Change snake direction, preventing reverse direction."""
-        current_dy, current_dx = self.direction.value
-        new_dy, new_dx = new_direction.value
-        
-        if (current_dy, current_dx) != (-new_dy, -new_dx):
-            self.direction = new_direction
+    def report_game(self):
+        """Hand the current game to on_game_end and the outcome log, if it got going."""
+        if not self.ticks:
+            return
+        if self.on_game_end:
+            self.on_game_end(self)
+        if self.outcome_log is not None:
+            self.outcome_log.append(Outcome.from_game(self, 'visual'))
     
     def reset_game(self):
         """Reset the game to initial state."""
         if self.score > self.high_score:
             self.high_score = self.score
         
-        self.score = 0
-        self.game_over = False
+        self.report_game()
         self.paused = False
-        self.speed = 0.12
         self.frame_count = 0
-        
-        center_y, center_x = self.height // 2, self.width // 2
-        self.snake = [(center_y, center_x), (center_y, center_x - 1), (center_y, center_x - 2)]
-        self.direction = Direction.RIGHT
-        self.food = self.place_food()
+        self.reset()
 
 def clear_screen():
     """Clear the console screen."""
@@ -168,116 +184,490 @@ def draw_border(game):
     
     print(f"{color}╚{border}╝{Colors.RESET}")
 
-def draw_game(game):
-    """Draw the game state with beautiful visuals."""
-    clear_screen()
-    game.frame_count += 1
-    
-    # Title with animation
-    title_color = [Colors.BRIGHT_RED, Colors.BRIGHT_YELLOW, Colors.BRIGHT_GREEN, Colors.BRIGHT_CYAN, Colors.BRIGHT_MAGENTA]
+# Animation tables shared by the layer builders
+TITLE_TEXT = "🐍 VISUAL SNAKE GAME 🐍"
+TITLE_COLORS = [Colors.BRIGHT_RED, Colors.BRIGHT_YELLOW, Colors.BRIGHT_GREEN, Colors.BRIGHT_CYAN, Colors.BRIGHT_MAGENTA]
+BORDER_CHARS = ['░', '▒', '▓', '█']
+BORDER_COLORS = [Colors.BRIGHT_BLUE, Colors.BRIGHT_CYAN]
+HEAD_CHARS = ['●', '◉', '●', '○']
+PAUSE_COLORS = [Colors.BRIGHT_YELLOW, Colors.YELLOW]
+GAME_OVER_COLORS = [Colors.BRIGHT_RED, Colors.RED]
+CELEBRATION_COLORS = [Colors.BRIGHT_MAGENTA, Colors.BRIGHT_YELLOW, Colors.BRIGHT_GREEN]
+
+# Pre-rendered sprite cells
+HEAD_CELLS = [f"{Colors.BRIGHT_GREEN}{Colors.BOLD}{char}{Colors.RESET}" for char in HEAD_CHARS]
+BODY_CELLS = [
+    f"{Colors.BRIGHT_GREEN}○{Colors.RESET}",
+    f"{Colors.GREEN}○{Colors.RESET}",
+]
+WALL_CELL = f"{Colors.BRIGHT_BLUE}█{Colors.RESET}"
+PORTAL_CELL = f"{Colors.BRIGHT_MAGENTA}{Colors.BOLD}◎{Colors.RESET}"
+
+# Terminal rows taken by everything but the board (title, stats, controls, messages)
+HUD_ROWS = 16
+
+# Each static layer keeps at most this many pre-rendered animation phases
+LAYER_CACHE_SIZE = 32
+
+@lru_cache(maxsize=LAYER_CACHE_SIZE)
+def title_layer(phase):
+    """Pre-render the rainbow title for one color phase."""
     animated_title = ""
-    title_text = "🐍 VISUAL SNAKE GAME 🐍"
-    for i, char in enumerate(title_text):
-        color = title_color[(game.frame_count + i) % len(title_color)]
+    for i, char in enumerate(TITLE_TEXT):
+        color = TITLE_COLORS[(phase + i) % len(TITLE_COLORS)]
         animated_title += f"{color}{char}{Colors.RESET}"
-    
-    print(f"{Colors.BOLD}{animated_title}{Colors.RESET}")
-    print()
-    
-    # Create the game board
-    board = [[' ' for _ in range(game.width)] for _ in range(game.height)]
-    
-    # Draw animated border
-    border_chars = ['░', '▒', '▓', '█']
-    border_char = border_chars[(game.frame_count // 5) % len(border_chars)]
-    border_color = [Colors.BRIGHT_BLUE, Colors.BRIGHT_CYAN][game.frame_count // 8 % 2]
-    
-    for i in range(game.height):
-        for j in range(game.width):
-            if i == 0 or i == game.height - 1 or j == 0 or j == game.width - 1:
-                board[i][j] = f"{border_color}{border_char}{Colors.RESET}"
-    
-    # Draw snake with gradient colors
-    snake_colors = [
-        f"{Colors.BRIGHT_GREEN}●{Colors.RESET}",  # Head
-        f"{Colors.GREEN}●{Colors.RESET}",         # Neck
-        f"{Colors.BRIGHT_GREEN}○{Colors.RESET}",  # Body
-        f"{Colors.GREEN}○{Colors.RESET}",         # Body
-    ]
-    
-    for i, (y, x) in enumerate(game.snake):
-        if i == 0:  # Head with special animation
-            head_chars = ['●', '◉', '●', '○']
-            head_char = head_chars[(game.frame_count // 3) % len(head_chars)]
-            board[y][x] = f"{Colors.BRIGHT_GREEN}{Colors.BOLD}{head_char}{Colors.RESET}"
-        else:  # Body
-            color_index = min(i - 1, len(snake_colors) - 1)
-            board[y][x] = snake_colors[2 + (color_index % 2)]
-    
-    # Draw animated food
-    food_y, food_x = game.food
-    food_symbol = game.food_colors[game.current_food_color]
-    # Make food pulse
-    if game.frame_count % 6 < 3:
+    return f"{Colors.BOLD}{animated_title}{Colors.RESET}"
+
+@lru_cache(maxsize=LAYER_CACHE_SIZE)
+def background_layer(char_phase, color_phase, width, height):
+    """Pre-render the animated border and empty board for one phase."""
+    border_cell = f"{BORDER_COLORS[color_phase]}{BORDER_CHARS[char_phase]}{Colors.RESET}"
+    edge_row = (border_cell,) * width
+    inner_row = (border_cell,) + (' ',) * (width - 2) + (border_cell,)
+    return (edge_row,) + (inner_row,) * (height - 2) + (edge_row,)
+
+@lru_cache(maxsize=4)
+def level_layer(level):
+    """Pre-render a level's walls and portals on an empty board."""
+    cells = {CELL_WALL: WALL_CELL, CELL_PORTAL: PORTAL_CELL}
+    width = level.width
+    grid = bytes(level.grid)
+    rows = []
+    for y in range(level.height):
+        row = [' '] * width
+        for x, value in enumerate(grid[y * width:(y + 1) * width]):
+            if value:
+                row[x] = cells[value]
+        rows.append(tuple(row))
+    return tuple(rows)
+
+def board_background(game):
+    """The empty board a game's board model starts from."""
+    if game.level is not None:
+        return level_layer(game.level)
+    return background_layer(0, 0, game.width, game.height)
+
+@lru_cache(maxsize=LAYER_CACHE_SIZE)
+def food_cell(color_index, pulse):
+    """Pre-render a food sprite, optionally in its bold pulse phase."""
+    food_symbol = SnakeGame.FOOD_COLORS[color_index]
+    if pulse:
         food_symbol = f"{Colors.BOLD}{food_symbol}{Colors.RESET}"
-    board[food_y][food_x] = food_symbol
-    
-    # Print the board
-    for row in board:
-        print(''.join(row))
-    
-    # Beautiful stats display
-    print()
-    stats_bg = Colors.BG_BLACK
-    print(f"{stats_bg}{Colors.BRIGHT_WHITE}┌────────────────────────────────────────────────────────────┐{Colors.RESET}")
-    
+    return food_symbol
+
+@lru_cache(maxsize=LAYER_CACHE_SIZE)
+def hud_layer(kind, phase):
+    """Pre-render the static HUD rows of the given kind for one phase."""
+    if kind == 'box_top':
+        return (f"{Colors.BG_BLACK}{Colors.BRIGHT_WHITE}┌────────────────────────────────────────────────────────────┐{Colors.RESET}",)
+    if kind == 'box_bottom':
+        return (f"{Colors.BG_BLACK}{Colors.BRIGHT_WHITE}└────────────────────────────────────────────────────────────┘{Colors.RESET}",)
+    if kind == 'controls':
+        return (
+            "",
+            f"{Colors.BRIGHT_WHITE}🎮 CONTROLS:{Colors.RESET}",
+            f"  {Colors.BRIGHT_GREEN}W{Colors.RESET}↑  {Colors.BRIGHT_YELLOW}A{Colors.RESET}←  {Colors.BRIGHT_RED}S{Colors.RESET}↓  {Colors.BRIGHT_BLUE}D{Colors.RESET}→  "
+            f"{Colors.BRIGHT_MAGENTA}P{Colors.RESET}⏸  {Colors.BRIGHT_CYAN}R{Colors.RESET}🔄  {Colors.BRIGHT_RED}Q{Colors.RESET}❌  "
+            f"{Colors.BRIGHT_WHITE}F{Colors.RESET}⏱️  {Colors.BRIGHT_GREEN}O{Colors.RESET}🤖",
+        )
+    if kind == 'paused':
+        pause_msg = "⏸️  GAME PAUSED ⏸️"
+        return (
+            "",
+            f"{PAUSE_COLORS[phase]}{Colors.BOLD}{pause_msg.center(60)}{Colors.RESET}",
+            f"{Colors.BRIGHT_WHITE}Press P to continue{Colors.RESET}".center(60),
+        )
+    if kind == 'game_over':
+        return (
+            "",
+            f"{GAME_OVER_COLORS[phase]}{Colors.BOLD}{'💀 GAME OVER! 💀'.center(60)}{Colors.RESET}",
+        )
+    if kind == 'cleared':
+        return (
+            "",
+            f"{CELEBRATION_COLORS[phase]}{Colors.BOLD}{'🏁 BOARD CLEARED! 🏁'.center(60)}{Colors.RESET}",
+        )
+    if kind == 'restart':
+        return (f"{Colors.BRIGHT_GREEN}Press R to restart or Q to quit{Colors.RESET}".center(60),)
+    if kind == 'celebration':
+        celebration = "🎉✨ NEW HIGH SCORE! ✨🎉"
+        return (
+            "",
+            f"{CELEBRATION_COLORS[phase]}{Colors.BOLD}{celebration.center(60)}{Colors.RESET}",
+        )
+    raise ValueError(f"Unknown HUD layer: {kind}")
+
+LAYER_CACHES = {
+    'title': title_layer,
+    'background': background_layer,
+    'level': level_layer,
+    'food': food_cell,
+    'hud': hud_layer,
+}
+
+def layer_cache_stats():
+    """Return hit/miss counters for every pre-rendered layer cache."""
+    stats = {}
+    for name, layer in LAYER_CACHES.items():
+        info = layer.cache_info()
+        stats[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+    return stats
+
+def paint_border(board, background, top, left):
+    """Copy a background's border cells into the board window at (top, left)."""
+    height, width = len(background), len(background[0])
+    for r, row in enumerate(board):
+        y = top + r
+        if y == 0 or y == height - 1:
+            row[:] = background[y][left:left + len(row)]
+            continue
+        if left == 0:
+            row[0] = background[y][0]
+        if left + len(row) == width:
+            row[-1] = background[y][width - 1]
+
+def paint_body(game, board, view):
+    """Draw the snake body into the board window, visiting whichever is smaller, the segments or the view."""
+    top, left, rows, cols = view
+    body_cell = BODY_CELLS[1]
+    if len(game.snake) <= rows * cols // 4:
+        for y, x in islice(game.snake, 4, None):
+            if top <= y < top + rows and left <= x < left + cols:
+                board[y - top][x - left] = body_cell
+    else:
+        grid = game.occupancy
+        for r, row in enumerate(board):
+            start = (top + r) * game.width + left
+            end = start + len(row)
+            x = grid.find(1, start, end)
+            while x != -1:
+                row[x - start] = body_cell
+                x = grid.find(1, x + 1, end)
+
+def compose_frame(game, overlay=(), camera=None, minimap=None):
+    """Compose the game state into frame rows for the renderer.
+
+    The frame is built from three layers: the board (the game's board model,
+    kept current by cell events, with the animated border painted over the
+    visible part of it), the animated sprites (head and food) drawn on it,
+    and the HUD.
+    Board rows are lists of cells (one string per board column) so the
+    renderer can diff them cell by cell; every other row is a plain string.
+    With a camera only its view of the board is composed, and a minimap is
+    drawn below the board. Overlay rows (like frame timings) are shown under
+    the stats box.
+    """
+    game.frame_count += 1
+    frame_count = game.frame_count
+    frame = [title_layer(frame_count % len(TITLE_COLORS)), ""]
+    if camera is None:
+        view = (0, 0, game.height, game.width)
+    else:
+        view = camera.follow(game)
+    top, left, rows, cols = view
+    
+    # Background and snake body. A board model is kept current by the game's
+    # cell events, so the view is cut from its rows and only the animated
+    # border is painted in; engines without one (like replays) get the body
+    # painted onto the cached background
+    model = getattr(game, 'board_model', None)
+    if game.level is None:
+        background = background_layer((frame_count // 5) % len(BORDER_CHARS),
+                                      (frame_count // 8) % len(BORDER_COLORS),
+                                      game.width, game.height)
+    else:
+        background = level_layer(game.level)
+    if model is not None:
+        board = [row[:] for row in model.view(top, left, rows, cols)]
+        if game.level is None:
+            paint_border(board, background, top, left)
+    else:
+        board = [list(row[left:left + cols]) for row in background[top:top + rows]]
+        paint_body(game, board, view)
+    
+    # Head with special animation; the first segments get a gradient
+    for i, (y, x) in enumerate(islice(game.snake, 4)):
+        if top <= y < top + rows and left <= x < left + cols:
+            if i == 0:
+                board[y - top][x - left] = HEAD_CELLS[(frame_count // 3) % len(HEAD_CELLS)]
+            else:
+                board[y - top][x - left] = BODY_CELLS[(i - 1) % 2]
+    
+    # Sprite layer: pulsing food (there is none once the board is cleared);
+    # the oldest food keeps the game's color, any others are colored by cell
+    pulse = frame_count % 6 < 3
+    color = game.current_food_color
+    for food_y, food_x in game.foods:
+        if top <= food_y < top + rows and left <= food_x < left + cols:
+            board[food_y - top][food_x - left] = food_cell(color, pulse)
+        color = (food_y + food_x) % len(SnakeGame.FOOD_COLORS)
+    
+    frame.extend(board)
+    
+    if minimap is not None:
+        frame.append("")
+        frame.extend(f"{Colors.BRIGHT_BLACK}{row}{Colors.RESET}" for row in minimap.rows(game, view))
+    
+    # HUD layer: only the stats line changes from frame to frame
+    frame.append("")
+    frame.extend(hud_layer('box_top', 0))
     score_text = f"🏆 SCORE: {Colors.BRIGHT_YELLOW}{game.score:04d}{Colors.RESET}"
     high_score_text = f"👑 HIGH: {Colors.BRIGHT_MAGENTA}{game.high_score:04d}{Colors.RESET}"
     length_text = f"📏 LENGTH: {Colors.BRIGHT_CYAN}{len(game.snake):02d}{Colors.RESET}"
-    
-    print(f"{stats_bg}{Colors.BRIGHT_WHITE}│ {score_text}    {high_score_text}    {length_text}      │{Colors.RESET}")
-    print(f"{stats_bg}{Colors.BRIGHT_WHITE}└────────────────────────────────────────────────────────────┘{Colors.RESET}")
-    
-    # Controls with colors
-    print(f"\n{Colors.BRIGHT_WHITE}🎮 CONTROLS:{Colors.RESET}")
-    print(f"  {Colors.BRIGHT_GREEN}W{Colors.RESET}↑  {Colors.BRIGHT_YELLOW}A{Colors.RESET}←  {Colors.BRIGHT_RED}S{Colors.RESET}↓  {Colors.BRIGHT_BLUE}D{Colors.RESET}→  "
-          f"{Colors.BRIGHT_MAGENTA}P{Colors.RESET}⏸  {Colors.BRIGHT_CYAN}R{Colors.RESET}🔄  {Colors.BRIGHT_RED}Q{Colors.RESET}❌")
+    frame.append(f"{Colors.BG_BLACK}{Colors.BRIGHT_WHITE}│ {score_text}    {high_score_text}    {length_text}      │{Colors.RESET}")
+    frame.extend(hud_layer('box_bottom', 0))
+    frame.extend(f"{Colors.BRIGHT_BLACK}{line}{Colors.RESET}" for line in overlay)
+    frame.extend(hud_layer('controls', 0))
     
     # Game state messages with animations
     if game.paused:
-        pause_msg = "⏸️  GAME PAUSED ⏸️"
-        color = [Colors.BRIGHT_YELLOW, Colors.YELLOW][(game.frame_count // 8) % 2]
-        print(f"\n{color}{Colors.BOLD}{pause_msg.center(60)}{Colors.RESET}")
-        print(f"{Colors.BRIGHT_WHITE}Press P to continue{Colors.RESET}".center(60))
+        frame.extend(hud_layer('paused', (frame_count // 8) % len(PAUSE_COLORS)))
     
     if game.game_over:
-        game_over_color = [Colors.BRIGHT_RED, Colors.RED][(game.frame_count // 5) % 2]
-        print(f"\n{game_over_color}{Colors.BOLD}{'💀 GAME OVER! 💀'.center(60)}{Colors.RESET}")
-        print(f"{Colors.BRIGHT_WHITE}Final Score: {Colors.BRIGHT_YELLOW}{game.score}{Colors.RESET}".center(60))
-        print(f"{Colors.BRIGHT_GREEN}Press R to restart or Q to quit{Colors.RESET}".center(60))
+        banner = 'cleared' if game.board_cleared else 'game_over'
+        frame.extend(hud_layer(banner, (frame_count // 5) % len(GAME_OVER_COLORS)))
+        frame.append(f"{Colors.BRIGHT_WHITE}Final Score: {Colors.BRIGHT_YELLOW}{game.score}{Colors.RESET}".center(60))
+        frame.extend(hud_layer('restart', 0))
         
         if game.score == game.high_score and game.score > 0:
-            celebration = "🎉✨ NEW HIGH SCORE! ✨🎉"
-            celebration_color = [Colors.BRIGHT_MAGENTA, Colors.BRIGHT_YELLOW, Colors.BRIGHT_GREEN]
-            color = celebration_color[(game.frame_count // 4) % len(celebration_color)]
-            print(f"\n{color}{Colors.BOLD}{celebration.center(60)}{Colors.RESET}")
-
-def get_key_input():
-    """Get keyboard input without blocking."""
-    if msvcrt.kbhit():
-        try:
-            key = msvcrt.getch()
-            if key == b'\xe0':
-                key = msvcrt.getch()
-                if key == b'H': return 'w'
-                elif key == b'P': return 's'
-                elif key == b'K': return 'a'
-                elif key == b'M': return 'd'
-            else:
-                return key.decode('utf-8').lower()
-        except UnicodeDecodeError:
-            return None
-    return None
+            frame.extend(hud_layer('celebration', (frame_count // 4) % len(CELEBRATION_COLORS)))
+    
+    return frame
+
+@lru_cache(maxsize=256)
+def cell_width(cell):
+    """Return how many terminal columns a rendered cell occupies."""
+    glyphs = ESCAPE_SEQUENCE.sub('', cell)
+    if not glyphs:
+        return 0
+    return 2 if unicodedata.east_asian_width(glyphs[-1]) in ('W', 'F') else 1
+
+@lru_cache(maxsize=1024)
+def style_runs(text):
+    """Split text into (style, chars) runs, style being the 16-color SGR parameters in effect."""
+    runs = []
+    style = ()
+    position = 0
+    for match in ESCAPE_SEQUENCE.finditer(text):
+        if match.start() > position:
+            runs.append((style, text[position:match.start()]))
+        position = match.end()
+        sequence = match.group()
+        if sequence[-1] != 'm':
+            continue
+        for param in sequence[2:-1].split(';'):
+            if param in ('', '0'):
+                style = ()
+            elif param in SGR_16 and param not in style:
+                style += (param,)
+    if position < len(text):
+        runs.append((style, text[position:]))
+    return tuple(runs)
+
+@lru_cache(maxsize=1024)
+def ascii_text(text):
+    """Strip colors from text and map its glyphs to plain ASCII."""
+    plain = ESCAPE_SEQUENCE.sub('', text).translate(ASCII_GLYPHS)
+    return plain.encode('ascii', 'ignore').decode('ascii')
+
+def sgr(style):
+    """One escape sequence that resets the pen and applies style."""
+    return f"\033[{';'.join(('0',) + style)}m"
+
+class DiffRenderer:
+    """Terminal renderer that only writes the cells that changed since the last frame.
+
+    The previous frame is kept as a framebuffer. Each call to render() moves
+    the cursor to the changed cells with ANSI positioning escapes and sends
+    everything in a single buffered write.
+
+    profile is one of RENDER_PROFILES: 'full' writes cells exactly as
+    composed, 'color16' only emits a color when it changes along the output,
+    and 'ascii' drops colors and maps every glyph to ASCII. With auto_profile
+    the time spent writing each frame is measured; when the link can't carry
+    a frame per 1/fps seconds the renderer steps down to a cheaper profile,
+    and steps back up once writes stay well inside the budget.
+    """
+    
+    # Share of the frame interval spent writing that triggers a switch
+    DOWNGRADE_BUSY = 0.5
+    UPGRADE_BUSY = 0.1
+    # Consecutive calm one-second windows before stepping back up
+    UPGRADE_WINDOWS = 10
+    
+    def __init__(self, stream=None, profile='full', auto_profile=False, fps=30,
+                 clock=time.perf_counter):
+        if profile not in RENDER_PROFILES:
+            raise ValueError(f"Unknown render profile: {profile}")
+        self.stream = stream if stream is not None else sys.stdout
+        self.previous = None
+        self.frame_bytes = 0   # Bytes written for the most recent frame
+        self.total_bytes = 0
+        self.frames = 0
+        self.profile = profile
+        self.auto_profile = auto_profile
+        self.fps = fps
+        self.clock = clock
+        self.frame_budget = float('inf')   # Bytes per frame the link carried at fps, last window
+        self.switches = 0
+        self._window_bytes = 0
+        self._window_seconds = 0.0
+        self._window_frames = 0
+        self._calm_windows = 0
+    
+    @property
+    def average_bytes(self):
+        """Average number of bytes written per frame so far."""
+        return self.total_bytes / self.frames if self.frames else 0.0
+    
+    def invalidate(self):
+        """Forget the framebuffer so the next frame is drawn in full."""
+        self.previous = None
+    
+    def set_profile(self, profile):
+        """Switch render profile; the next frame is drawn in full."""
+        if profile not in RENDER_PROFILES:
+            raise ValueError(f"Unknown render profile: {profile}")
+        if profile != self.profile:
+            self.profile = profile
+            self.switches += 1
+            self.invalidate()
+    
+    def _adapt(self, seconds):
+        """Measure this frame's write and switch profiles once per second of frames."""
+        self._window_bytes += self.frame_bytes
+        self._window_seconds += seconds
+        self._window_frames += 1
+        if self._window_frames < self.fps:
+            return
+        if self._window_seconds > 0:
+            self.frame_budget = self._window_bytes / self._window_seconds / self.fps
+        busy = self._window_seconds * self.fps / self._window_frames
+        self._window_bytes = 0
+        self._window_seconds = 0.0
+        self._window_frames = 0
+        
+        index = RENDER_PROFILES.index(self.profile)
+        if busy > self.DOWNGRADE_BUSY:
+            self._calm_windows = 0
+            if index < len(RENDER_PROFILES) - 1:
+                self.set_profile(RENDER_PROFILES[index + 1])
+        elif busy < self.UPGRADE_BUSY and index > 0:
+            self._calm_windows += 1
+            if self._calm_windows >= self.UPGRADE_WINDOWS:
+                self._calm_windows = 0
+                self.set_profile(RENDER_PROFILES[index - 1])
+        else:
+            self._calm_windows = 0
+    
+    def _styled(self, out, text, pen):
+        """Append text with colors only where they change from pen; returns the new pen."""
+        for style, chars in style_runs(text):
+            if style != pen and not (chars.isspace() and not SGR_BACKGROUNDS.intersection(style + pen)):
+                out.append(sgr(style))
+                pen = style
+            out.append(chars)
+        return pen
+    
+    def diff(self, frame):
+        """Return the output that turns the previous frame into frame ('' if nothing changed).
+
+        frame becomes the previous frame for the next call.
+        """
+        out = []
+        previous = self.previous
+        if previous is None:
+            out.append(HIDE_CURSOR + CLEAR_SCREEN)
+            previous = []
+        
+        coalesce = self.profile == 'color16'
+        if self.profile == 'ascii':
+            # Diff the ASCII frame, so color-only changes cost nothing
+            frame = [ascii_text(row) if isinstance(row, str) else [ascii_text(cell) for cell in row]
+                     for row in frame]
+        pen = ()
+        
+        for y, row in enumerate(frame):
+            old = previous[y] if y < len(previous) else None
+            if row == old:
+                continue
+            if isinstance(row, str):
+                if coalesce:
+                    out.append(f"\033[{y + 1};1H")
+                    pen = self._styled(out, row, pen)
+                    if SGR_BACKGROUNDS.intersection(pen):
+                        # Don't let the line clear paint the rest of the row
+                        out.append(sgr(()))
+                        pen = ()
+                    out.append(CLEAR_LINE)
+                else:
+                    out.append(f"\033[{y + 1};1H{row}{CLEAR_LINE}")
+                continue
+            
+            if not isinstance(old, list) or len(old) != len(row):
+                # Row shape changed: wipe it and repaint every cell
+                out.append(f"\033[{y + 1};1H{CLEAR_LINE}")
+                old = [None] * len(row)
+            
+            # Emit a cursor move at the start of each run of changed cells
+            # (the changed columns are found at C speed)
+            cursor = -1
+            for x in compress(range(len(row)), map(ne, row, old)):
+                cell = row[x]
+                if x != cursor:
+                    out.append(f"\033[{y + 1};{x + 1}H")
+                if coalesce:
+                    pen = self._styled(out, cell, pen)
+                else:
+                    out.append(cell)
+                # Wide glyphs push the cursor an extra column, so reposition after them
+                cursor = x + 1 if cell_width(cell) == 1 else -1
+        
+        if pen:
+            out.append(sgr(()))
+        
+        if len(frame) < len(previous):
+            out.append(f"\033[{len(frame) + 1};1H\033[J")
+        
+        self.previous = frame
+        if not out:
+            return ''
+        
+        # Park the cursor below the frame
+        out.append(f"\033[{len(frame) + 1};1H")
+        return ''.join(out)
+    
+    def render(self, frame):
+        """Write the differences between frame and the previous frame."""
+        data = self.diff(frame)
+        started = self.clock()
+        self.stream.write(data)
+        self.stream.flush()
+        seconds = self.clock() - started
+        
+        self.frame_bytes = len(data.encode('utf-8'))
+        self.total_bytes += self.frame_bytes
+        self.frames += 1
+        if self.auto_profile:
+            self._adapt(seconds)
+        return self.frame_bytes
+    
+    def summary(self):
+        """One-line description of the profile and byte budget for the overlay."""
+        mode = 'auto' if self.auto_profile else 'fixed'
+        budget = 'unmeasured' if self.frame_budget == float('inf') else f"{self.frame_budget:,.0f} B"
+        return (f"render {self.profile} ({mode}): {self.frame_bytes:,} B/frame, "
+                f"budget {budget}, {self.switches} switches")
+    
+    def close(self):
+        """Restore the cursor after the last frame."""
+        self.stream.write(SHOW_CURSOR)
+        self.stream.flush()
+        self.previous = None
+
+def draw_game(game, renderer):
+    """Draw the game state with beautiful visuals."""
+    renderer.render(compose_frame(game))
 
 def show_intro():
     """Display a beautiful intro animation."""
@@ -312,50 +702,191 @@ def show_intro():
     print(f"{Colors.BRIGHT_GREEN}{Colors.BOLD}GO! 🚀{Colors.RESET}")
     time.sleep(0.5)
 
-def main():
-    """Main game function with enhanced visuals."""
+def main(record_dir=None, profile_out=None, width=60, height=25, minimap=False, autopilot=False,
+         render='auto', leaderboard=None, player=None, outcomes=None, level=None, threaded_render=True):
+    """Main game function with enhanced visuals.
+
+    With record_dir set, every game is saved there as a replay file. With
+    profile_out set, frame timings are recorded from the start and written
+    there on exit. Boards bigger than the terminal scroll with the snake,
+    optionally with a minimap. autopilot starts the game under the
+    autopilot. render picks a render profile, or 'auto' to start in full
+    color and step down when the terminal can't keep up. With leaderboard
+    (a database path) set, every game is saved there under player and the
+    high score starts from the board's best. With outcomes (a directory)
+    set, every game's outcome is appended to that outcome log. level is a
+    level file to play instead of the open board (the autopilot and
+    replays need the open board). Frames are written to the terminal from
+    a render thread unless threaded_render is False. Returns the measured
+    keypress-to-tick latency.
+    """
     # Enable ANSI color support on Windows
     os.system('')
     
     show_intro()
     
-    game = SnakeGame()
-    last_move_time = time.time()
+    # Games copy the grid on every reset, so the level stays open until the end
+    level = Level.open(level) if level else None
+    try:
+        game = SnakeGame(width, height, level=level)
+        overview = Minimap() if minimap else None
+        reserved_rows = HUD_ROWS + (overview.height + 1 if overview else 0)
+        camera = Camera.for_terminal(reserved_rows)
+        if render == 'auto':
+            renderer = DiffRenderer(profile=RENDER_PROFILES[0], auto_profile=True)
+        else:
+            renderer = DiffRenderer(profile=render)
+        recorder = ReplayRecorder(game, directory=record_dir) if record_dir else None
+        latency = InputLatency()
+        profiler = FrameProfiler(enabled=profile_out is not None)
+        board = Leaderboard(leaderboard) if leaderboard else None
+        if board:
+            player = player or default_player()
+            game.high_score = board.high_score()
+            game.on_game_end = lambda ended: board.submit(GameRecord.from_game(ended, player, 'visual'))
+        log = OutcomeLog(outcomes) if outcomes else None
+        game.outcome_log = log
     
-    while True:
-        current_time = time.time()
-        
-        key = get_key_input()
-        
+        try:
+            with open_input() as keyboard:
+                run_game_loop(game, renderer, keyboard, latency, recorder, profiler,
+                              camera=camera, minimap=overview, autopilot=autopilot,
+                              threaded=threaded_render)
+        finally:
+            renderer.close()
+            try:
+                game.report_game()
+            finally:
+                if log is not None:
+                    log.close()
+                if recorder:
+                    recorder.save()
+                if profile_out:
+                    profiler.export(profile_out)
+                # Last, as it raises if the leaderboard writer failed
+                if board:
+                    board.close()
+    finally:
+        if level is not None:
+            level.close()
+    return latency
+
+def run_game_loop(game, renderer, keyboard, latency, recorder=None, profiler=None,
+                  camera=None, minimap=None, autopilot=False, threaded=False):
+    """Run the interactive loop until the player quits.
+
+    Ticks run at game.speed and frames at 30 FPS on a fixed-timestep
+    scheduler; paused and game-over screens redraw at a low idle rate.
+    Each phase is timed by profiler (F toggles its overlay). camera and
+    minimap are handed to compose_frame for boards bigger than the screen.
+    O toggles the autopilot (open boards only); a movement key takes
+    control back. With threaded set, frames are composed on this thread but
+    written by a RenderThread, so a slow terminal drops frames instead of
+    delaying ticks and keys.
+    """
+    if profiler is None:
+        profiler = FrameProfiler()
+    pilot = Autopilot(game) if autopilot and game.level is None else None
+    
+    def handle_input():
+        stamp = time.monotonic()
+        for key in keyboard.read_keys():
+            if not handle_key(key, stamp):
+                return False
+        return True
+    
+    def handle_key(key, stamp):
+        nonlocal pilot
         if key == 'q':
-            break
+            return False
         elif key == 'r':
+            if recorder:
+                recorder.save()
             game.reset_game()
+            if recorder:
+                recorder.start()
         elif key == 'p':
             game.paused = not game.paused
-        elif key == 'w' and not game.game_over:
-            game.change_direction(Direction.UP)
-        elif key == 's' and not game.game_over:
-            game.change_direction(Direction.DOWN)
-        elif key == 'a' and not game.game_over:
-            game.change_direction(Direction.LEFT)
-        elif key == 'd' and not game.game_over:
-            game.change_direction(Direction.RIGHT)
-        
-        if current_time - last_move_time > game.speed:
-            game.move_snake()
-            last_move_time = current_time
-        
-        draw_game(game)
-        time.sleep(0.03)  # Smooth animation
+        elif key == 'f':
+            profiler.toggle_overlay()
+        elif key == 'o' and game.level is None:
+            # Built on demand: its lookup tables are the size of the board
+            pilot = None if pilot else Autopilot(game)
+        elif key in KEY_DIRECTIONS and not game.game_over:
+            pilot = None
+            # Buffered: one queued turn is applied per tick
+            game.queue_direction(KEY_DIRECTIONS[key], stamp)
+        return True
+    
+    def tick():
+        if pilot:
+            pilot.steer()
+        game.move_snake()
+        latency.record_tick(game)
+        if recorder:
+            recorder.record_tick()
+    
+    compose = profiler.wrap('compose', compose_frame)
+    write = profiler.wrap('write', renderer.render)
+    writer = RenderThread(write) if threaded else None
+    
+    def render():
+        profiler.dropped_ticks = loop.dropped_ticks
+        profiler.late_ticks = loop.late_ticks
+        if writer:
+            profiler.dropped_frames = writer.dropped_frames
+        overlay = profiler.overlay_lines()
+        if profiler.show_overlay:
+            overlay = overlay + [f"   {renderer.summary()}"]
+        if pilot:
+            overlay = [f"🤖 {pilot.summary()}"] + overlay
+        frame = compose(game, overlay, camera, minimap)
+        if writer:
+            writer.submit(frame)
+        else:
+            write(frame)
+    
+    loop = GameLoop(lambda: game.speed, render_fps=30, wait=keyboard.wait,
+                    max_sleep=keyboard.max_sleep)
+    try:
+        loop.run(profiler.wrap('input', handle_input), profiler.wrap('tick', tick),
+                 render=render,
+                 animating=lambda: not (game.paused or game.game_over))
+    finally:
+        if writer:
+            writer.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Visual Snake Game")
+    parser.add_argument('--record', metavar='DIR', help="save every game as a replay in DIR")
+    parser.add_argument('--profile-out', metavar='FILE',
+                        help="record frame timings and write them to FILE (.json or .csv) on exit")
+    parser.add_argument('--size', default='60x25', metavar='WIDTHxHEIGHT',
+                        help="board size; boards bigger than the terminal scroll with the snake")
+    parser.add_argument('--minimap', action='store_true', help="show a scaled-down map of the whole board")
+    parser.add_argument('--autopilot', action='store_true', help="start with the autopilot steering (O toggles it)")
+    parser.add_argument('--render', default='auto', choices=('auto',) + RENDER_PROFILES,
+                        help="render profile; auto steps down from full color on slow terminals")
+    parser.add_argument('--leaderboard', metavar='DB', help="save every game's score to this SQLite leaderboard")
+    parser.add_argument('--player', help="name on the leaderboard (default: your login name)")
+    parser.add_argument('--outcomes', metavar='DIR',
+                        help="append every game's outcome to this log (see snake_analysis.py)")
+    parser.add_argument('--level', metavar='FILE', help="play a level file (see snake_level.py) instead of the open board")
+    parser.add_argument('--sync-render', action='store_true',
+                        help="write frames on the game loop thread instead of a render thread")
+    args = parser.parse_args()
+    width, height = (int(n) for n in args.size.lower().split('x'))
+    
     try:
-        main()
+        latency = main(record_dir=args.record, profile_out=args.profile_out,
+                       width=width, height=height, minimap=args.minimap, autopilot=args.autopilot,
+                       render=args.render, leaderboard=args.leaderboard, player=args.player,
+                       outcomes=args.outcomes, level=args.level, threaded_render=not args.sync_render)
         clear_screen()
         print(f"\n{Colors.BRIGHT_MAGENTA}🎮 Thanks for playing Visual Snake! 🎮{Colors.RESET}")
         print(f"{Colors.BRIGHT_CYAN}Hope you enjoyed the colorful experience! ✨{Colors.RESET}")
         print(f"{Colors.BRIGHT_YELLOW}👋 See you next time! 👋{Colors.RESET}")
+        print(f"{Colors.BRIGHT_BLACK}⏱️  {latency.summary()}{Colors.RESET}")
         
     except KeyboardInterrupt:
         clear_screen()
@@ -5,177 +5,134 @@ A classic Snake game that works perfectly on Windows!
 Use WASD keys to control the snake.
 """
 
+import argparse
 import os
 import time
-import random
-import msvcrt
-from enum import Enum
+from functools import lru_cache
 
-class Direction(Enum):
-    UP = (-1, 0)
-    DOWN = (1, 0)
-    LEFT = (0, -1)
-    RIGHT = (0, 1)
+try:
+    import msvcrt
+except ImportError:  # Not on Windows: the game logic still imports fine
+    msvcrt = None
 
-class SnakeGame:
+from snake_autopilot import Autopilot
+from snake_board import BODY, FOOD, HEAD, BoardModel, CellEvents
+from snake_engine import SnakeEngine
+from snake_input import KEY_DIRECTIONS, InputLatency, open_input
+from snake_leaderboard import GameRecord, Leaderboard, default_player
+from snake_loop import GameLoop, RenderThread
+from snake_outcomes import Outcome, OutcomeLog
+from snake_profiler import FrameProfiler
+from snake_replay import ReplayRecorder
+
+class SnakeGame(CellEvents, SnakeEngine):
+    """Interactive game: engine rules plus pause and high score tracking.
+
+    board_model follows the game's cell events and holds the board text
+    format_game shows.
+    """
+    
     def __init__(self, width=50, height=20):
-        self.width = width
-        self.height = height
-        self.score = 0
         self.high_score = 0
-        self.game_over = False
         self.paused = False
+        self.on_game_end = None   # Called with the game before it resets (e.g. to save the score)
+        self.outcome_log = None   # OutcomeLog every finished game is appended to
         
-        # Initialize snake in the center
-        center_y, center_x = height // 2, width // 2
-        self.snake = [(center_y, center_x), (center_y, center_x - 1), (center_y, center_x - 2)]
-        self.direction = Direction.RIGHT
-        
-        # Place first food
-        self.food = self.place_food()
-        
-        # Game speed (lower = faster)
-        self.speed = 0.15  # seconds between moves
-        
-    def place_food(self):
-        """Place food at a random location not occupied by the snake."""
-        while True:
-            food_pos = (random.randint(1, self.height - 2), 
-                       random.randint(1, self.width - 2))
-            if food_pos not in self.snake:
-                return food_pos
+        # Walls are the outer border; speed ramps from 0.15 down to 0.08
+        super().__init__(width, height, margin=1,
+                         start_speed=0.15, min_speed=0.08, speed_step=0.005)
+        self.board_model = BoardModel(self, {HEAD: '●', BODY: '○', FOOD: '★'}, board_background)
     
     def move_snake(self):
-        """Move the snake in the current direction."""
-        if self.paused or self.game_over:
+        """Move the snake in the current direction unless paused."""
+        if self.paused:
             return
-            
-        head_y, head_x = self.snake[0]
-        dy, dx = self.direction.value
-        new_head = (head_y + dy, head_x + dx)
-        
-        # Check wall collision
-        if (new_head[0] <= 0 or new_head[0] >= self.height - 1 or
-            new_head[1] <= 0 or new_head[1] >= self.width - 1):
-            self.game_over = True
-            return
-        
-        # Check self collision
-        if new_head in self.snake:
-            self.game_over = True
+        super().move_snake()
+    
+    def report_game(self):
+        """Hand the current game to on_game_end and the outcome log, if it got going."""
+        if not self.ticks:
             return
-        
-        # Add new head
-        self.snake.insert(0, new_head)
-        
-        # Check food collision
-        if new_head == self.food:
-            self.score += 10
-            self.food = self.place_food()
-            # Increase speed slightly (make game faster)
-            if self.speed > 0.08:
-                self.speed = max(0.08, self.speed - 0.005)
-        else:
-            # Remove tail if no food eaten
-            self.snake.pop()
-    
-    def change_direction(self, new_direction):
-        """Change snake direction, preventing reverse direction."""
-        # Prevent moving directly backwards
-        current_dy, current_dx = self.direction.value
-        new_dy, new_dx = new_direction.value
-        
-        if (current_dy, current_dx) != (-new_dy, -new_dx):
-            self.direction = new_direction
+        if self.on_game_end:
+            self.on_game_end(self)
+        if self.outcome_log is not None:
+            self.outcome_log.append(Outcome.from_game(self, 'windows'))
     
     def reset_game(self):
         """Reset the game to initial state."""
         if self.score > self.high_score:
             self.high_score = self.score
         
-        self.score = 0
-        self.game_over = False
+        self.report_game()
         self.paused = False
-        self.speed = 0.15
-        
-        # Reset snake position
-        center_y, center_x = self.height // 2, self.width // 2
-        self.snake = [(center_y, center_x), (center_y, center_x - 1), (center_y, center_x - 2)]
-        self.direction = Direction.RIGHT
-        self.food = self.place_food()
+        self.reset()
+
+@lru_cache(maxsize=4)
+def border_rows(width, height):
+    """An empty board of width x height inside a solid border."""
+    edge_row = ('█',) * width
+    inner_row = ('█',) + (' ',) * (width - 2) + ('█',)
+    return (edge_row,) + (inner_row,) * (height - 2) + (edge_row,)
+
+def board_background(game):
+    return border_rows(game.width, game.height)
 
 def clear_screen():
     """Clear the console screen."""
     os.system('cls' if os.name == 'nt' else 'clear')
 
-def draw_game(game):
-    """Draw the game state to the console."""
-    clear_screen()
-    
-    # Create the game board
-    board = [[' ' for _ in range(game.width)] for _ in range(game.height)]
-    
-    # Draw border
-    for i in range(game.height):
-        for j in range(game.width):
-            if i == 0 or i == game.height - 1 or j == 0 or j == game.width - 1:
-                board[i][j] = '█'
-    
-    # Draw snake
-    for i, (y, x) in enumerate(game.snake):
-        if i == 0:  # Head
-            board[y][x] = '●'
-        else:  # Body
-            board[y][x] = '○'
-    
-    # Draw food
-    food_y, food_x = game.food
-    board[food_y][food_x] = '★'
-    
-    # Print the board
-    for row in board:
-        print(''.join(row))
+def format_game(game, overlay=()):
+    """Return the game state as console text.
+
+    Overlay lines (like frame timings) are shown under the score line.
+    """
+    # The board: the model already has the border, snake and food, and
+    # only rejoins the rows the last ticks changed
+    lines = list(game.board_model.lines())
     
-    # Print score and info
-    print(f"\n🐍 Score: {game.score}  🏆 High Score: {game.high_score}  📏 Length: {len(game.snake)}")
-    print("─" * 70)
-    print("🎮 Controls: W(Up) A(Left) S(Down) D(Right) | P(Pause) | R(Restart) | Q(Quit)")
+    # Score and info
+    lines.append(f"\n🐍 Score: {game.score}  🏆 High Score: {game.high_score}  📏 Length: {len(game.snake)}")
+    lines.extend(overlay)
+    lines.append("─" * 70)
+    lines.append("🎮 Controls: W(Up) A(Left) S(Down) D(Right) | P(Pause) | R(Restart) | F(Timings) | O(Autopilot) | Q(Quit)")
     
     if game.paused:
-        print("\n⏸️  PAUSED - Press P to continue")
+        lines.append("\n⏸️  PAUSED - Press P to continue")
     
     if game.game_over:
-        print(f"\n💀 GAME OVER! Final Score: {game.score}")
-        print("🔄 Press R to restart or Q to quit")
+        if game.board_cleared:
+            lines.append(f"\n🏁 BOARD CLEARED! Final Score: {game.score}")
+        else:
+            lines.append(f"\n💀 GAME OVER! Final Score: {game.score}")
+        lines.append("🔄 Press R to restart or Q to quit")
         if game.score == game.high_score and game.score > 0:
-            print("🎉 NEW HIGH SCORE! Congratulations!")
+            lines.append("🎉 NEW HIGH SCORE! Congratulations!")
+    
+    return '\n'.join(lines)
 
-def get_key_input():
-    """Get keyboard input without blocking."""
-    if msvcrt.kbhit():
-        try:
-            key = msvcrt.getch()
-            # Handle special keys (like arrow keys)
-            if key == b'\xe0':
-                # Arrow key pressed, get the actual key code
-                key = msvcrt.getch()
-                if key == b'H':  # Up arrow
-                    return 'w'
-                elif key == b'P':  # Down arrow
-                    return 's'
-                elif key == b'K':  # Left arrow
-                    return 'a'
-                elif key == b'M':  # Right arrow
-                    return 'd'
-            else:
-                # Regular key
-                return key.decode('utf-8').lower()
-        except UnicodeDecodeError:
-            return None
-    return None
+def write_game(text):
+    """Print formatted game text to the console."""
+    print(text)
 
-def main():
-    """Main game function."""
+def draw_game(game):
+    """Draw the game state to the console."""
+    clear_screen()
+    write_game(format_game(game))
+
+def main(record_dir=None, profile_out=None, autopilot=False, leaderboard=None, player=None,
+         outcomes=None, threaded_render=True):
+    """Main game function.
+
+    With record_dir set, every game is saved there as a replay file. With
+    profile_out set, frame timings are recorded from the start and written
+    there on exit. autopilot starts the game under the autopilot (O toggles
+    it, a movement key takes control back). With leaderboard (a database
+    path) set, every game is saved there under player and the high score
+    starts from the board's best. With outcomes (a directory) set, every
+    game's outcome is appended to that outcome log. Frames are printed
+    from a render thread unless threaded_render is False. Returns the
+    measured keypress-to-tick latency.
+    """
     print("🐍✨ TERMINAL SNAKE GAME ✨🐍")
     print("=" * 50)
     print("Get ready to play the classic Snake game!")
@@ -192,53 +149,136 @@ def main():
     
     # Initialize game
     game = SnakeGame()
-    last_move_time = time.time()
+    recorder = ReplayRecorder(game, directory=record_dir) if record_dir else None
+    latency = InputLatency()
+    profiler = FrameProfiler(enabled=profile_out is not None)
+    pilot = Autopilot(game) if autopilot else None
+    board = Leaderboard(leaderboard) if leaderboard else None
+    if board:
+        player = player or default_player()
+        game.high_score = board.high_score()
+        game.on_game_end = lambda ended: board.submit(GameRecord.from_game(ended, player, 'windows'))
+    log = OutcomeLog(outcomes) if outcomes else None
+    game.outcome_log = log
     
-    # Game loop
-    while True:
-        current_time = time.time()
-        
-        # Handle input
-        key = get_key_input()
-        
+    # Handle input
+    def handle_input():
+        stamp = time.monotonic()
+        for key in keyboard.read_keys():
+            if not handle_key(key, stamp):
+                return False
+        return True
+    
+    def handle_key(key, stamp):
+        nonlocal pilot
         if key == 'q':
-            break
+            if recorder:
+                recorder.save()
+            return False
         elif key == 'r':
+            if recorder:
+                recorder.save()
             game.reset_game()
+            if recorder:
+                recorder.start()
         elif key == 'p':
             game.paused = not game.paused
-        elif key == 'w' and not game.game_over:
-            game.change_direction(Direction.UP)
-        elif key == 's' and not game.game_over:
-            game.change_direction(Direction.DOWN)
-        elif key == 'a' and not game.game_over:
-            game.change_direction(Direction.LEFT)
-        elif key == 'd' and not game.game_over:
-            game.change_direction(Direction.RIGHT)
-        
-        # Move snake based on game speed
-        if current_time - last_move_time > game.speed:
-            game.move_snake()
-            last_move_time = current_time
-        
-        # Draw everything
-        draw_game(game)
-        
-        # Small delay to prevent excessive CPU usage
-        time.sleep(0.05)
+        elif key == 'f':
+            profiler.toggle_overlay()
+        elif key == 'o':
+            pilot = None if pilot else Autopilot(game)
+        elif key in KEY_DIRECTIONS and not game.game_over:
+            pilot = None
+            # Buffered: one queued turn is applied per tick
+            game.queue_direction(KEY_DIRECTIONS[key], stamp)
+        return True
+    
+    # Move snake based on game speed
+    def tick():
+        if pilot:
+            pilot.steer()
+        game.move_snake()
+        latency.record_tick(game)
+        if recorder:
+            recorder.record_tick()
+    
+    # Draw in timed phases: compose the text, clear the console, write it out
+    compose = profiler.wrap('compose', format_game)
+    clear = profiler.wrap('clear', clear_screen)
+    write = profiler.wrap('write', write_game)
+    
+    def show(text):
+        clear()
+        write(text)
+    
+    # The console is cleared and printed on a render thread, so a slow console drops frames
+    writer = RenderThread(show) if threaded_render else None
+    
+    def render():
+        profiler.dropped_ticks = loop.dropped_ticks
+        profiler.late_ticks = loop.late_ticks
+        if writer:
+            profiler.dropped_frames = writer.dropped_frames
+        overlay = profiler.overlay_lines()
+        if pilot:
+            overlay = [f"🤖 {pilot.summary()}"] + overlay
+        text = compose(game, overlay)
+        if writer:
+            writer.submit(text)
+        else:
+            show(text)
+    
+    # Game loop: fixed-timestep ticks, 20 FPS drawing, idle redraws when paused or over
+    try:
+        with open_input() as keyboard:
+            loop = GameLoop(lambda: game.speed, render_fps=20, wait=keyboard.wait,
+                            max_sleep=keyboard.max_sleep)
+            loop.run(profiler.wrap('input', handle_input), profiler.wrap('tick', tick),
+                     render=render,
+                     animating=lambda: not (game.paused or game.game_over))
+    finally:
+        if writer:
+            writer.close()
+        try:
+            game.report_game()
+        finally:
+            if log is not None:
+                log.close()
+            if profile_out:
+                profiler.export(profile_out)
+            # Last, as it raises if the leaderboard writer failed
+            if board:
+                board.close()
+    return latency
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Terminal Snake Game")
+    parser.add_argument('--record', metavar='DIR', help="save every game as a replay in DIR")
+    parser.add_argument('--profile-out', metavar='FILE',
+                        help="record frame timings and write them to FILE (.json or .csv) on exit")
+    parser.add_argument('--autopilot', action='store_true', help="start with the autopilot steering (O toggles it)")
+    parser.add_argument('--leaderboard', metavar='DB', help="save every game's score to this SQLite leaderboard")
+    parser.add_argument('--player', help="name on the leaderboard (default: your login name)")
+    parser.add_argument('--outcomes', metavar='DIR',
+                        help="append every game's outcome to this log (see snake_analysis.py)")
+    parser.add_argument('--sync-render', action='store_true',
+                        help="print frames on the game loop thread instead of a render thread")
+    args = parser.parse_args()
+    
     try:
-        main()
+        latency = main(record_dir=args.record, profile_out=args.profile_out, autopilot=args.autopilot,
+                       leaderboard=args.leaderboard, player=args.player, outcomes=args.outcomes,
+                       threaded_render=not args.sync_render)
         print("\n🎮 Thanks for playing Snake! Hope you had an awesome time!")
         print("👋 See you next time!")
+        print(f"⏱️  {latency.summary()}")
         
     except KeyboardInterrupt:
         clear_screen()
         print("🐍 Game interrupted. Thanks for playing!")
     except Exception as e:
         print(f"\n❌ An error occurred: {e}")
-        print("Please make sure you're running this on Windows with Python 3.6+")
+        print("Please make sure you're running this in a terminal with Python 3.6+")
     
     # Wait for user to press any key before closing
     print("\nPress any key to exit...")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Keyboard input backends.
+Reads every pending key without blocking: msvcrt on Windows, and a termios
+raw-mode backend driven by selectors on Linux/macOS. Arrow keys are mapped
+to WASD so the games only deal with single-letter keys. parse_keys() turns
+terminal text into keys for the termios backend and the game server alike.
+
+    with open_input() as keyboard:
+        for key in keyboard.read_keys():
+            ...
+        keyboard.wait(0.05)  # Returns early when a key arrives
+"""
+
+import codecs
+import os
+import sys
+import time
+
+try:
+    import msvcrt
+except ImportError:  # POSIX: use termios instead
+    msvcrt = None
+    import selectors
+    import termios
+    import tty
+
+from snake_engine import Direction
+
+# Movement keys
+KEY_DIRECTIONS = {'w': Direction.UP, 's': Direction.DOWN, 'a': Direction.LEFT, 'd': Direction.RIGHT}
+
+# Arrow keys -> WASD
+MSVCRT_ARROWS = {b'H': 'w', b'P': 's', b'K': 'a', b'M': 'd'}
+ANSI_ARROWS = {'A': 'w', 'B': 's', 'D': 'a', 'C': 'd'}
+
+ESC = '\x1b'
+# An unfinished escape sequence longer than this is garbage, not a key still arriving
+MAX_ESCAPE = 32
+
+def utf8_decoder():
+    """Incremental UTF-8 decoder: a character split across reads is kept, not lost."""
+    return codecs.getincrementaldecoder('utf-8')(errors='ignore')
+
+def parse_keys(text):
+    """Split terminal input into keys; returns (keys, unparsed rest).
+
+    Arrow keys (ESC [ A or ESC O A, also with modifier parameters like the
+    Ctrl+Up ESC [ 1 ; 5 A) become WASD. Other escape sequences are dropped
+    whole (CSI sequences up to their final byte), and an ESC that starts
+    no sequence is dropped on its own. A sequence cut off at the end is
+    returned as the rest, to be put in front of the next input.
+    """
+    keys = []
+    i = 0
+    n = len(text)
+    while i < n:
+        char = text[i]
+        if char != ESC:
+            keys.append(char.lower())
+            i += 1
+            continue
+        if i + 1 == n:
+            break  # Wait for what follows the ESC
+        kind = text[i + 1]
+        if kind == 'O':
+            if i + 2 == n:
+                break
+            key = ANSI_ARROWS.get(text[i + 2])
+            if key:
+                keys.append(key)
+            i += 3
+        elif kind == '[':
+            # Parameter and intermediate bytes, then one final byte
+            end = i + 2
+            while end < n and ' ' <= text[end] <= '?':
+                end += 1
+            if end == n:
+                if n - i > MAX_ESCAPE:
+                    i = n
+                break
+            if '@' <= text[end] <= '~':
+                key = ANSI_ARROWS.get(text[end])
+                if key:
+                    keys.append(key)
+                end += 1
+            # Anything else ends a malformed sequence and is read as a key
+            i = end
+        else:
+            i += 1
+    return keys, text[i:]
+
+class MsvcrtInput:
+    """Windows console input through msvcrt."""
+
+    # wait() can't wake on a key, so loops cap their sleeps to poll often enough
+    max_sleep = 0.05
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read_keys(self):
+        """Return every key pressed since the last call."""
+        keys = []
+        while msvcrt.kbhit():
+            key = msvcrt.getch()
+            # Handle special keys (like arrow keys)
+            if key in (b'\x00', b'\xe0'):
+                key = MSVCRT_ARROWS.get(msvcrt.getch())
+                if key:
+                    keys.append(key)
+                continue
+            try:
+                keys.append(key.decode('utf-8').lower())
+            except UnicodeDecodeError:
+                pass
+        return keys
+
+    def wait(self, timeout):
+        """Sleep for timeout seconds (the console has no waitable handle here)."""
+        time.sleep(timeout)
+
+    def close(self):
+        pass
+
+class TermiosInput:
+    """POSIX terminal input in cbreak mode, multiplexed with selectors."""
+
+    # wait() returns as soon as a key arrives, so sleeps need no cap
+    max_sleep = None
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdin
+        self.fd = self.stream.fileno()
+        self.pending = ''
+        self.decoder = utf8_decoder()
+        self.saved_mode = None
+        self.selector = None
+
+    def __enter__(self):
+        self.saved_mode = termios.tcgetattr(self.fd)
+        # cbreak: no line buffering or echo, but Ctrl+C still interrupts
+        tty.setcbreak(self.fd)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.fd, selectors.EVENT_READ)
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _readable(self, timeout):
+        return bool(self.selector.select(timeout))
+
+    def read_keys(self):
+        """Return every key pressed since the last call."""
+        while self._readable(0):
+            data = os.read(self.fd, 1024)
+            if not data:
+                break
+            self.pending += self.decoder.decode(data)
+        keys, self.pending = parse_keys(self.pending)
+        return keys
+
+    def wait(self, timeout):
+        """Sleep up to timeout seconds, waking as soon as a key is pressed."""
+        self._readable(timeout)
+
+    def close(self):
+        if self.selector is not None:
+            self.selector.close()
+            self.selector = None
+        if self.saved_mode is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved_mode)
+            self.saved_mode = None
+
+def open_input():
+    """Return the input backend for this platform."""
+    if msvcrt is not None:
+        return MsvcrtInput()
+    return TermiosInput()
+
+class InputLatency:
+    """Keypress-to-tick latency: time from reading a turn to the tick that applies it."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.last = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.worst = max(self.worst, seconds)
+        self.last = seconds
+
+    def record_tick(self, game, now=None):
+        """Record the latency of the turn the last tick applied, if any."""
+        if game.last_turn_stamp is None:
+            return
+        now = time.monotonic() if now is None else now
+        self.record(now - game.last_turn_stamp)
+        game.last_turn_stamp = None
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        return (f"input latency: {self.count} turns, mean {self.mean * 1000:.1f} ms, "
+                f"worst {self.worst * 1000:.1f} ms")
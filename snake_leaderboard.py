@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Shared snake leaderboard.
+Game results go into an SQLite database in WAL mode, so any number of local
+processes can write while others read. Results are queued in memory and a
+background thread writes them in batches (one transaction per batch), so
+finishing a game never waits on the disk. Indexes on score and on
+(player, score) keep top-N and per-player best queries fast on tables with
+millions of rows, and a per-player best table makes player rankings cheap.
+
+    with Leaderboard('scores.db') as board:
+        board.submit(GameRecord.from_game(game, 'ada', 'visual'))
+        board.top(10)
+
+    python snake_leaderboard.py top --db scores.db
+    python snake_leaderboard.py bench --db /tmp/bench.db --rows 2000000
+"""
+
+import argparse
+import os
+import queue
+import random
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    cause TEXT,
+    seed INTEGER,
+    rules TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_score ON results (score DESC);
+CREATE INDEX IF NOT EXISTS results_by_player ON results (player, score DESC);
+CREATE TABLE IF NOT EXISTS player_best (
+    player TEXT PRIMARY KEY,
+    score INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS player_best_by_score ON player_best (score DESC);
+"""
+
+INSERT = ("INSERT INTO results (player, score, length, ticks, cause, seed, rules, created) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+# Kept in the same transaction, so ranking players never scans the results
+UPDATE_BEST = ("INSERT INTO player_best (player, score) VALUES (?, ?) "
+               "ON CONFLICT (player) DO UPDATE SET score = excluded.score "
+               "WHERE excluded.score > player_best.score")
+
+# How long a connection waits for another process's write lock
+BUSY_TIMEOUT_MS = 5000
+# Attempts at a batch while the database stays locked past the busy timeout
+WRITE_ATTEMPTS = 10
+
+class GameRecord(namedtuple('GameRecord', 'player score length ticks cause seed rules created')):
+    """One finished game, as stored in the results table."""
+
+    @classmethod
+    def from_game(cls, game, player, rules=None):
+        """Record the game an engine just played (call before it resets)."""
+        return cls(player, game.score, len(game.snake), game.ticks, game.death_cause,
+                   game.seed, rules, time.time())
+
+def connect(path):
+    """Open a connection with WAL journaling and a busy timeout.
+
+    Each connection is used by one thread, but may be closed from another.
+    """
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                                 check_same_thread=False)
+    connection.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    connection.execute("PRAGMA journal_mode = WAL")
+    # WAL keeps the database consistent without syncing every commit
+    connection.execute("PRAGMA synchronous = NORMAL")
+    return connection
+
+def is_locked(error):
+    """Is an OperationalError only another connection holding the database?"""
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+class Leaderboard:
+    """Batched writer and top-N / per-player queries over one database file.
+
+    submit() only appends to an in-memory queue; a daemon thread drains it in
+    batches of up to batch_size records, waiting at most flush_interval
+    seconds to fill a batch. Each batch is one BEGIN IMMEDIATE transaction,
+    retried (counted in retries) while another connection holds the lock
+    past the busy timeout. Any other error, or a lock that outlasts every
+    attempt, stops the writer with the batch still pending: it is kept in error and raised by the
+    next submit(), flush() or close(). Queries run on a per-thread
+    connection and see every committed batch; close() closes them all.
+    """
+
+    def __init__(self, path='snake_scores.db', batch_size=500, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.retries = 0
+        self.error = None
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        self._queue = queue.SimpleQueue()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._writer = threading.Thread(target=self._write_loop, name='leaderboard-writer', daemon=True)
+        self._writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = connect(self.path)
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def submit(self, record):
+        """Queue a GameRecord for writing; never blocks on the database."""
+        if self.error is not None:
+            raise self.error
+        with self._idle:
+            self._pending += 1
+        self._queue.put(record)
+
+    def flush(self, timeout=None):
+        """Wait until every submitted record is committed; returns False on timeout.
+
+        Raises the writer's error if it stopped with records still queued.
+        """
+        with self._idle:
+            done = self._idle.wait_for(lambda: self._pending == 0 or self.error is not None, timeout)
+        if self.error is not None:
+            raise self.error
+        return done
+
+    def close(self):
+        """Write what is queued, stop the writer thread and close every connection.
+
+        Raises the writer's error if it failed.
+        """
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+        if self.error is not None:
+            raise self.error
+
+    def _write_loop(self):
+        connection = connect(self.path)
+        try:
+            self._drain(connection)
+        except Exception as error:
+            # Raised on the game's side by the next submit(), flush() or close()
+            print(f"Leaderboard writer stopped: {error!r}", file=sys.stderr)
+            with self._idle:
+                self.error = error
+                self._idle.notify_all()
+        finally:
+            connection.close()
+
+    def _drain(self, connection):
+        running = True
+        while running:
+            record = self._queue.get()
+            if record is None:
+                break
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is None:
+                    running = False
+                    break
+                batch.append(record)
+            self._write_batch(connection, batch)
+            with self._idle:
+                self._pending -= len(batch)
+                self._idle.notify_all()
+
+    def _write_batch(self, connection, batch):
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.executemany(INSERT, batch)
+                connection.executemany(UPDATE_BEST, ((r.player, r.score) for r in batch))
+                connection.execute("COMMIT")
+                self.written += len(batch)
+                return
+            except sqlite3.OperationalError as error:
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+                if not is_locked(error) or attempt == WRITE_ATTEMPTS - 1:
+                    raise
+                # Locked past the busy timeout: back off and try again
+                self.retries += 1
+                time.sleep(0.05 * (attempt + 1) * random.random())
+
+    def top(self, n=10):
+        """The n best results as (player, score, length, ticks, created) rows."""
+        return self._connection().execute(
+            "SELECT player, score, length, ticks, created FROM results "
+            "ORDER BY score DESC LIMIT ?", (n,)).fetchall()
+
+    def top_players(self, n=10):
+        """The n best players by their best score, as (player, best) rows."""
+        return self._connection().execute(
+            "SELECT player, score FROM player_best ORDER BY score DESC LIMIT ?", (n,)).fetchall()
+
+    def best(self, player):
+        """A player's best score, or 0 if they have no results."""
+        row = self._connection().execute(
+            "SELECT score FROM player_best WHERE player = ?", (player,)).fetchone()
+        return row[0] if row else 0
+
+    def high_score(self):
+        """The best score anyone has recorded, or 0."""
+        row = self._connection().execute("SELECT MAX(score) FROM results").fetchone()
+        return row[0] or 0
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+def default_player():
+    """Player name for local games: the login name."""
+    try:
+        return os.getlogin()
+    except OSError:
+        return os.environ.get('USER') or os.environ.get('USERNAME') or 'player'
+
+def write_worker(path, rows, players, seed):
+    """Bench worker: submit rows random results from its own process."""
+    rng = random.Random(seed)
+    with Leaderboard(path, batch_size=1000) as board:
+        for _ in range(rows):
+            score = int(rng.expovariate(1 / 300)) // 10 * 10
+            board.submit(GameRecord(f"player{rng.randrange(players)}", score, score // 10 + 3,
+                                    score * 3, 'self', rng.randrange(2 ** 32), 'visual', time.time()))
+        board.flush()
+        return board.written, board.retries
+
+def bench(path, rows, processes, players, queries):
+    """Fill path from several processes at once, then time the queries."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    Leaderboard(path).close()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(processes) as pool:
+        futures = [pool.submit(write_worker, path, rows // processes, players, seed)
+                   for seed in range(processes)]
+        outcomes = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+    written = sum(w for w, _ in outcomes)
+    retries = sum(r for _, r in outcomes)
+    print(f"{written:,} rows written by {processes} processes in {elapsed:.1f}s "
+          f"({written / elapsed:,.0f} rows/s, {retries} batches retried on a lock)")
+
+    with Leaderboard(path) as board:
+        print(f"table holds {board.count():,} rows")
+        rng = random.Random(0)
+        for name, query in (('top 10', lambda: board.top(10)),
+                            ('top players', lambda: board.top_players(10)),
+                            ('player best', lambda: board.best(f"player{rng.randrange(players)}")),
+                            ('high score', board.high_score)):
+            timings = []
+            for _ in range(queries):
+                started = time.perf_counter()
+                query()
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            print(f"  {name:<12} p50 {timings[len(timings) // 2] * 1000:.3f} ms  "
+                  f"max {timings[-1] * 1000:.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Query or benchmark the snake leaderboard.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    top = commands.add_parser('top', help="show the best results")
+    top.add_argument('--db', default='snake_scores.db')
+    top.add_argument('-n', type=int, default=10)
+    top.add_argument('--players', action='store_true', help="one row per player")
+
+    best = commands.add_parser('best', help="show one player's best score")
+    best.add_argument('player')
+    best.add_argument('--db', default='snake_scores.db')
+
+    bench_command = commands.add_parser('bench', help="concurrent writes and query timings")
+    bench_command.add_argument('--db', required=True)
+    bench_command.add_argument('--rows', type=int, default=1_000_000)
+    bench_command.add_argument('--processes', type=int, default=4)
+    bench_command.add_argument('--players', type=int, default=10_000)
+    bench_command.add_argument('--queries', type=int, default=200)
+
+    args = parser.parse_args()
+    if args.command == 'bench':
+        bench(args.db, args.rows, args.processes, args.players, args.queries)
+        return
+    with Leaderboard(args.db) as board:
+        if args.command == 'best':
+            print(f"{args.player}: {board.best(args.player)}")
+        elif args.players:
+            for rank, (player, score) in enumerate(board.top_players(args.n), 1):
+                print(f"{rank:>3}. {player:<20} {score:>8}")
+        else:
+            for rank, (player, score, length, ticks, created) in enumerate(board.top(args.n), 1):
+                when = time.strftime('%Y-%m-%d %H:%M', time.localtime(created))
+                print(f"{rank:>3}. {player:<20} {score:>8}  length {length:>5}  {when}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Snake levels.
+A level is a board of walls and portal pairs, a start position and the
+number of foods on the board at once, stored as a small header, a portal
+table and one byte per cell. Level.open() memory-maps the file, so huge
+maps load instantly and every process playing the same level shares one
+copy of the grid in the page cache. Engines copy the grid once per game
+and check collisions with a single byte lookup, however many walls the
+level has.
+
+    level = Level.open('maze.snkl')
+    engine = SnakeEngine(seed=1, level=level)
+
+    python snake_level.py generate --size 200x100 --walls 0.1 --portals 8 --foods 5 --out big.snkl
+    python snake_level.py info big.snkl
+"""
+
+import argparse
+import mmap
+import random
+import struct
+
+from snake_engine import CELL_EMPTY, CELL_PORTAL, CELL_WALL, Direction
+
+MAGIC = b'SNKL'
+VERSION = 1
+
+# Magic, version, width, height, foods at once, start direction code, start cell, portal pairs
+HEADER = struct.Struct('<4sBHHBBIH')
+PORTAL_PAIR = struct.Struct('<II')
+
+DIRECTIONS = list(Direction)
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+class Level:
+    """Walls, portals, start position and food count for one board.
+
+    grid is any buffer of width * height bytes (CELL_EMPTY, CELL_WALL or
+    CELL_PORTAL); for a level from open() it is a read-only view of the
+    mapped file. portals is a list of flat cell pairs, and exits maps each
+    portal cell to its partner. The snake starts with its head on start,
+    facing direction, and its body on the two cells behind it; a level
+    whose starting snake is off the board or on a wall or portal raises
+    ValueError.
+    """
+
+    def __init__(self, width, height, grid, portals=(), food_count=1,
+                 start=None, direction=Direction.RIGHT):
+        if len(grid) != width * height:
+            raise ValueError(f"Grid has {len(grid)} cells, not {width}x{height}")
+        self.width = width
+        self.height = height
+        self.grid = grid
+        self.portals = list(portals)
+        self.exits = {}
+        for a, b in self.portals:
+            self.exits[a] = b
+            self.exits[b] = a
+        self.food_count = food_count
+        self.start = start or (height // 2, width // 2)
+        self.direction = direction
+        self._mapped = None
+        for y, x in self.start_body():
+            if not (0 <= y < height and 0 <= x < width):
+                raise ValueError(f"Start snake cell {(y, x)} is off the {width}x{height} board")
+            if grid[y * width + x] != CELL_EMPTY:
+                raise ValueError(f"Start snake cell {(y, x)} is on a wall or portal")
+
+    def start_body(self):
+        """The starting snake's cells, head first."""
+        (head_y, head_x), (dy, dx) = self.start, self.direction.value
+        return [(head_y - dy * i, head_x - dx * i) for i in range(3)]
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a level file (read-only)."""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        grid = None
+        try:
+            magic, version, width, height, food_count, direction, start, portal_count = \
+                HEADER.unpack_from(view)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a snake level")
+            if version != VERSION:
+                raise ValueError(f"Unsupported level version {version}")
+            offset = HEADER.size
+            portals = [PORTAL_PAIR.unpack_from(view, offset + i * PORTAL_PAIR.size)
+                       for i in range(portal_count)]
+            offset += portal_count * PORTAL_PAIR.size
+            grid = view[offset:offset + width * height]
+            level = cls(width, height, grid, portals, food_count,
+                        divmod(start, width), DIRECTIONS[direction])
+        except Exception:
+            # Views of the map must go before the map can be closed
+            if grid is not None:
+                grid.release()
+            view.release()
+            mapped.close()
+            raise
+        level._mapped = mapped
+        return level
+
+    def close(self):
+        """Unmap the file (engines keep their own copies of the grid)."""
+        if self._mapped is not None:
+            self.grid.release()
+            self._mapped.close()
+            self._mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save(self, path):
+        start_y, start_x = self.start
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.width, self.height, self.food_count,
+                                DIRECTION_CODES[self.direction], start_y * self.width + start_x,
+                                len(self.portals)))
+            for pair in self.portals:
+                f.write(PORTAL_PAIR.pack(*pair))
+            f.write(self.grid)
+
+    def walls(self):
+        """Number of wall cells."""
+        return bytes(self.grid).count(CELL_WALL)
+
+    @classmethod
+    def generate(cls, width, height, walls=0.05, portals=0, food_count=1, seed=None):
+        """A random level: a border, walls on about walls of the inside and portal pairs.
+
+        The start row around the centre is kept clear so the snake has room
+        to get going.
+        """
+        rng = random.Random(seed)
+        grid = bytearray(width * height)
+        for x in range(width):
+            grid[x] = grid[(height - 1) * width + x] = CELL_WALL
+        for y in range(height):
+            grid[y * width] = grid[y * width + width - 1] = CELL_WALL
+
+        start_y, start_x = height // 2, width // 2
+        clear = set(start_y * width + x for x in range(max(1, start_x - 4), min(width - 1, start_x + 6)))
+        inside = [y * width + x for y in range(1, height - 1) for x in range(1, width - 1)
+                  if y * width + x not in clear]
+        rng.shuffle(inside)
+        wall_count = int(walls * len(inside))
+        for cell in inside[:wall_count]:
+            grid[cell] = CELL_WALL
+
+        # Portals go on open cells, their exits are whatever lies beyond them
+        spare = inside[wall_count:]
+        pairs = []
+        for i in range(min(portals, len(spare) // 2)):
+            a, b = spare[2 * i], spare[2 * i + 1]
+            grid[a] = grid[b] = CELL_PORTAL
+            pairs.append((a, b))
+        return cls(width, height, grid, pairs, food_count, (start_y, start_x))
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or inspect snake level files.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help="write a random level")
+    generate.add_argument('--size', default='60x25', help="board size as WIDTHxHEIGHT")
+    generate.add_argument('--walls', type=float, default=0.05, help="share of inner cells that are walls")
+    generate.add_argument('--portals', type=int, default=0, help="portal pairs")
+    generate.add_argument('--foods', type=int, default=1, help="foods on the board at once")
+    generate.add_argument('--seed', type=int)
+    generate.add_argument('--out', required=True)
+
+    info = commands.add_parser('info', help="describe a level file")
+    info.add_argument('path')
+
+    args = parser.parse_args()
+    if args.command == 'generate':
+        width, height = parse_size(args.size)
+        level = Level.generate(width, height, args.walls, args.portals, args.foods, args.seed)
+        level.save(args.out)
+        print(f"Saved {args.out}: {width}x{height}, {level.walls()} walls, "
+              f"{len(level.portals)} portal pairs, {level.food_count} foods")
+    else:
+        with Level.open(args.path) as level:
+            print(f"{args.path}: {level.width}x{level.height}, {level.walls()} walls, "
+                  f"{len(level.portals)} portal pairs, {level.food_count} foods, "
+                  f"start {level.start} facing {level.direction.name.lower()}")
+
+if __name__ == "__main__":
+    main()
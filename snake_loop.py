@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Fixed-timestep game loop.
+Runs the simulation at the game's own tick rate and rendering at a separate
+target FPS, both scheduled on time.monotonic(). Missed ticks are caught up
+(up to a cap), and the loop sleeps until the next deadline instead of
+polling. When nothing is animating, rendering drops to a low idle rate.
+A RenderThread takes terminal output off the loop: the loop hands it
+finished frames and the thread writes the newest one, so a slow terminal
+drops frames instead of delaying ticks and input.
+"""
+
+import threading
+import time
+
+class GameLoop:
+    """Schedule input polling, simulation ticks and rendering.
+
+    tick_interval is a callable returning the current seconds per tick, so
+    speed changes (like the speed-up after eating) take effect immediately.
+    wait(seconds) sleeps between deadlines; max_sleep caps each wait so a
+    wait that can't wake on input still polls it often enough. Pass None
+    when wait returns as soon as a key arrives, so an idle loop sleeps
+    until its next frame.
+    """
+
+    def __init__(self, tick_interval, render_fps=30, idle_fps=4, max_catchup=5,
+                 max_sleep=0.05, clock=time.monotonic, wait=time.sleep):
+        self.tick_interval = tick_interval
+        self.render_fps = render_fps
+        self.idle_fps = idle_fps
+        self.max_catchup = max_catchup    # Ticks run back to back before dropping the backlog
+        self.max_sleep = max_sleep        # Upper bound on input latency while sleeping (None: no cap)
+        self.clock = clock
+        self.wait = wait
+
+        self.ticks = 0
+        self.frames = 0
+        self.dropped_ticks = 0
+        self.late_ticks = 0      # Tick deadlines that passed while a frame was rendering
+        self.running = False
+
+    def run(self, poll_input, update, render, animating):
+        """Run until poll_input() returns False.
+
+        poll_input() handles pending input, update() advances the simulation
+        one tick, render() draws a frame, and animating() says whether the
+        simulation is currently moving (not paused or over).
+        """
+        clock = self.clock
+        self.running = True
+        previous = clock()
+        accumulator = 0.0
+        next_render = previous
+
+        while self.running:
+            if poll_input() is False:
+                break
+
+            now = clock()
+            active = animating()
+            interval = self.tick_interval()
+            if active:
+                accumulator += now - previous
+                steps = 0
+                while accumulator >= interval and steps < self.max_catchup:
+                    update()
+                    accumulator -= interval
+                    steps += 1
+                    self.ticks += 1
+                    interval = self.tick_interval()
+                    if not animating():
+                        accumulator = 0.0
+                        break
+                if accumulator >= interval:
+                    # Too far behind to catch up: drop the backlog instead of spiralling
+                    dropped = int(accumulator // interval)
+                    self.dropped_ticks += dropped
+                    accumulator -= dropped * interval
+                active = animating()
+            else:
+                accumulator = 0.0
+            previous = now
+
+            if now >= next_render:
+                render()
+                self.frames += 1
+                if active:
+                    late = clock() - (now + interval - accumulator)
+                    if late > 0:
+                        self.late_ticks += 1 + int(late // interval)
+                frame_interval = 1.0 / (self.render_fps if active else self.idle_fps)
+                next_render += frame_interval
+                if next_render <= now:
+                    next_render = now + frame_interval
+
+            # Sleep until the next tick or frame is due
+            deadline = next_render
+            if active:
+                deadline = min(deadline, now + interval - accumulator)
+            delay = deadline - clock()
+            if self.max_sleep is not None:
+                delay = min(delay, self.max_sleep)
+            if delay > 0:
+                self.wait(delay)
+
+        self.running = False
+
+    def stop(self):
+        """Ask the loop to exit after the current iteration."""
+        self.running = False
+
+class RenderThread:
+    """Double-buffered frame writer running on its own thread.
+
+    submit() puts a finished frame in the back buffer and returns at once;
+    the thread swaps it out and calls write(frame) with it while the loop
+    carries on. A frame still waiting when a newer one arrives is dropped
+    (counted in dropped_frames), so the writer always skips to the newest
+    frame. Frames must not be changed after they are submitted.
+    """
+
+    def __init__(self, write, name='render'):
+        self.write = write
+        self.written = 0
+        self.dropped_frames = 0
+        self.error = None
+        self._pending = None
+        self._busy = False
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame):
+        """Hand over the newest frame; never waits for the terminal."""
+        if self.error is not None:
+            raise self.error
+        with self._condition:
+            if self._pending is not None:
+                self.dropped_frames += 1
+            self._pending = frame
+            self._condition.notify()
+
+    def _run(self):
+        condition = self._condition
+        while True:
+            with condition:
+                condition.wait_for(lambda: self._pending is not None or self._stopping)
+                frame, self._pending = self._pending, None
+                if frame is None:
+                    return
+                self._busy = True
+            try:
+                self.write(frame)
+            except BaseException as error:
+                # Raised on the loop thread by the next submit()
+                self.error = error
+                return
+            finally:
+                with condition:
+                    self._busy = False
+                    condition.notify_all()
+            self.written += 1
+
+    def flush(self, timeout=None):
+        """Wait until the newest frame is written; returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: (self._pending is None and not self._busy) or self.error is not None, timeout)
+
+    def close(self):
+        """Write the last pending frame and stop the thread."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Game outcome log.
+Every finished game can be appended to an outcome log: how long it lasted,
+its score, length and final speed, how it ended, which rules it was played
+under and the board size. The log is stored column by column, as a
+directory with one file per column, each a flat little-endian array that
+only ever grows. Appends are buffered and written a batch at a time, and
+snake_analysis.py memory-maps the columns to scan millions of games as
+arrays, without a Python object per game.
+
+    with OutcomeLog('outcomes') as log:
+        game.outcome_log = log
+        ...
+
+One process writes a log at a time; give parallel writers their own logs.
+"""
+
+import os
+import sys
+from array import array
+from collections import namedtuple
+
+from snake_engine import DEATH_CLEARED, DEATH_SELF, DEATH_WALL
+
+# Column name and array typecode; files are named <column>.<NumPy dtype>
+COLUMNS = (
+    ('ticks', 'I'),
+    ('score', 'I'),
+    ('length', 'I'),
+    ('speed', 'f'),
+    ('cause', 'B'),
+    ('rules', 'B'),
+    ('width', 'H'),
+    ('height', 'H'),
+)
+DTYPES = {'B': 'u1', 'H': 'u2', 'I': 'u4', 'f': 'f4'}
+
+# Code order is part of the file format: only ever add to the end
+CAUSE_QUIT = 'quit'          # Restarted or quit before the game ended
+CAUSES = (CAUSE_QUIT, DEATH_WALL, DEATH_SELF, DEATH_CLEARED, 'timeout')
+RULE_NAMES = ('other', 'visual', 'windows')
+
+CAUSE_CODES = {cause: code for code, cause in enumerate(CAUSES)}
+RULE_CODES = {name: code for code, name in enumerate(RULE_NAMES)}
+
+class Outcome(namedtuple('Outcome', [name for name, _ in COLUMNS])):
+    """One game's row in the log, with cause and rules as codes."""
+
+    @classmethod
+    def from_game(cls, game, rules=None, cause=None):
+        """The outcome of the game an engine just played (call before it resets).
+
+        cause overrides the engine's death cause (e.g. a tick limit); a game
+        that has not ended counts as quit.
+        """
+        cause = cause or game.death_cause or CAUSE_QUIT
+        return cls(game.ticks, game.score, len(game.snake), game.speed,
+                   CAUSE_CODES[cause], RULE_CODES.get(rules, 0), game.width, game.height)
+
+def column_path(path, name):
+    typecode = dict(COLUMNS)[name]
+    return os.path.join(path, f"{name}.{DTYPES[typecode]}")
+
+def column_sizes(path):
+    """Whole records in each column file (0 for a missing file)."""
+    sizes = {}
+    for name, typecode in COLUMNS:
+        file_path = column_path(path, name)
+        size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        sizes[name] = size // array(typecode).itemsize
+    return sizes
+
+def record_count(path):
+    """Records in the log: a write cut short leaves some columns longer, and they are ignored."""
+    return min(column_sizes(path).values())
+
+class OutcomeLog:
+    """Buffered appender for one outcome log directory.
+
+    Records are kept in per-column arrays and written once batch_size have
+    piled up, on flush() and on close(). Opening a log trims any column
+    left longer than the others by an interrupted write.
+    """
+
+    def __init__(self, path, batch_size=4096):
+        self.path = path
+        self.batch_size = batch_size
+        os.makedirs(path, exist_ok=True)
+        self.written = record_count(path)
+        for name, typecode in COLUMNS:
+            with open(column_path(path, name), 'ab') as f:
+                f.truncate(self.written * array(typecode).itemsize)
+        self._buffers = [array(typecode) for _, typecode in COLUMNS]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.written + len(self._buffers[0])
+
+    def append(self, outcome):
+        """Add one Outcome."""
+        for buffer, value in zip(self._buffers, outcome):
+            buffer.append(value)
+        if len(self._buffers[0]) >= self.batch_size:
+            self.flush()
+
+    def extend(self, columns):
+        """Add many records at once from a mapping of column name to values.
+
+        Contiguous buffers of the column's own type (arrays, NumPy arrays)
+        are copied in bulk; anything else is converted value by value.
+        """
+        lengths = {len(columns[name]) for name, _ in COLUMNS}
+        if len(lengths) != 1:
+            raise ValueError("Columns have different lengths")
+        for buffer, (name, typecode) in zip(self._buffers, COLUMNS):
+            values = columns[name]
+            try:
+                view = memoryview(values)
+            except TypeError:
+                view = None
+            if view is not None and view.format.lstrip('@=') == typecode and view.c_contiguous:
+                buffer.frombytes(view.cast('B'))
+            else:
+                buffer.extend(values)
+        if len(self._buffers[0]) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Append the buffered records to the column files."""
+        count = len(self._buffers[0])
+        if not count:
+            return
+        for buffer, (name, _) in zip(self._buffers, COLUMNS):
+            if sys.byteorder == 'big':
+                buffer.byteswap()
+            with open(column_path(self.path, name), 'ab') as f:
+                buffer.tofile(f)
+            del buffer[:]
+        self.written += count
+
+    def close(self):
+        self.flush()
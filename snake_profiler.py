@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Frame timing instrumentation.
+Records how long each phase of the game loop takes (input polling, ticks,
+frame composition, screen clearing, terminal writes) in fixed-size ring
+buffers, and reports rolling p50/p95/p99 as an overlay or an exported file.
+
+    profiler = FrameProfiler()
+    tick = profiler.wrap('tick', game.move_snake)
+    ...
+    profiler.export('timings.json')   # or .csv
+"""
+
+import csv
+import json
+import time
+from array import array
+
+PHASES = ('input', 'tick', 'compose', 'clear', 'write')
+
+class PhaseTimings:
+    """Ring buffer of the most recent durations (seconds) for one phase."""
+
+    def __init__(self, size):
+        self.samples = array('d', bytes(8 * size))
+        self.size = size
+        self.index = 0
+        self.count = 0
+        self.total = 0
+
+    def add(self, seconds):
+        self.samples[self.index] = seconds
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.total += 1
+
+    def recent(self):
+        """Samples currently in the buffer, oldest first."""
+        if self.count < self.size:
+            return list(self.samples[:self.count])
+        return list(self.samples[self.index:]) + list(self.samples[:self.index])
+
+    def percentiles(self, points=(50, 95, 99)):
+        ordered = sorted(self.samples[:self.count])
+        if not ordered:
+            return tuple(0.0 for _ in points)
+        last = len(ordered) - 1
+        return tuple(ordered[min(last, int(round(p / 100 * last)))] for p in points)
+
+class FrameProfiler:
+    """Per-phase timings for the game loop.
+
+    Wrapped callables check the enabled flag first, so with instrumentation
+    off they cost one attribute lookup per call.
+    """
+
+    def __init__(self, phases=PHASES, size=1024, enabled=False, clock=time.perf_counter):
+        self.phases = {name: PhaseTimings(size) for name in phases}
+        self.enabled = enabled
+        self.show_overlay = False
+        self.clock = clock
+        self.dropped_ticks = 0
+        self.dropped_frames = 0   # Frames a render thread skipped to catch up
+        self.late_ticks = 0       # Tick deadlines missed while a frame was rendering
+        self._overlay = []
+        self._overlay_time = 0.0
+
+    def wrap(self, phase, func):
+        """Return func instrumented to record its duration under phase."""
+        timings = self.phases[phase]
+        clock = self.clock
+        def timed(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.add(clock() - start)
+        return timed
+
+    def toggle_overlay(self):
+        """Show or hide the overlay; showing it also turns recording on."""
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay:
+            self.enabled = True
+        self._overlay_time = 0.0
+
+    def overlay_lines(self, refresh=0.25):
+        """Text rows for the overlay (recomputed at most every refresh seconds)."""
+        if not self.show_overlay:
+            return []
+        now = self.clock()
+        if now - self._overlay_time >= refresh:
+            self._overlay_time = now
+            self._overlay = self.summary_lines()
+        return self._overlay
+
+    def summary_lines(self):
+        lines = [f"⏱️  phase        p50      p95      p99   (ms)   dropped ticks: {self.dropped_ticks}",
+                 f"   dropped frames: {self.dropped_frames}   ticks late from rendering: {self.late_ticks}"]
+        for name, timings in self.phases.items():
+            if not timings.count:
+                continue
+            p50, p95, p99 = (value * 1000 for value in timings.percentiles())
+            lines.append(f"   {name:<9} {p50:8.3f} {p95:8.3f} {p99:8.3f}")
+        return lines
+
+    def to_dict(self):
+        report = {'dropped_ticks': self.dropped_ticks, 'dropped_frames': self.dropped_frames,
+                  'late_ticks': self.late_ticks, 'phases': {}}
+        for name, timings in self.phases.items():
+            p50, p95, p99 = timings.percentiles()
+            report['phases'][name] = {
+                'count': timings.total,
+                'p50': p50,
+                'p95': p95,
+                'p99': p99,
+                'samples': timings.recent(),
+            }
+        return report
+
+    def export(self, path):
+        """Write the recorded timings as JSON, or CSV when path ends in .csv."""
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['phase', 'sample', 'seconds'])
+                for name, timings in self.phases.items():
+                    for index, seconds in enumerate(timings.recent()):
+                        writer.writerow([name, index, f"{seconds:.9f}"])
+                writer.writerow(['dropped_ticks', 0, self.dropped_ticks])
+                writer.writerow(['dropped_frames', 0, self.dropped_frames])
+                writer.writerow(['late_ticks', 0, self.late_ticks])
+        else:
+            with open(path, 'w') as f:
+                json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Snake replays.
+A replay stores the game seed and rules, the ticks where the direction
+changed (as varint deltas), every food spawn, and an index of periodic
+full-state keyframes. Seeking to tick N restores the nearest keyframe and
+re-simulates at most one keyframe interval.
+
+    python snake_replay.py record --policy greedy --seed 7 --out game.snkr
+    python snake_replay.py info game.snkr
+    python snake_replay.py play game.snkr --speed 4 --start 2000
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from itertools import islice
+
+from snake_engine import RULES, Direction, SnakeEngine
+
+MAGIC = b'SNKR'
+VERSION = 1
+
+# Rules and sizes: width, height, margin, start/min speed, speed step, seed
+HEADER = struct.Struct('<4sBHHBdddQ')
+SPEED = struct.Struct('<d')
+
+DIRECTIONS = list(Direction)
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+STEP_CODES = {direction.value: code for code, direction in enumerate(DIRECTIONS)}
+
+# State at the end of a tick, plus where to resume reading events and foods
+Keyframe = namedtuple('Keyframe', 'tick event_index food_index score speed direction food body')
+
+def write_varint(buf, value):
+    """Append an unsigned LEB128 varint to buf."""
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+def read_varint(data, offset):
+    """Read a varint from data at offset and return (value, new offset)."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def pack_body(body):
+    """Pack segments (head first, a list or deque) as the head cell plus a 2-bit direction chain."""
+    codes = [STEP_CODES[(y - prev_y, x - prev_x)]
+             for (prev_y, prev_x), (y, x) in zip(body, islice(body, 1, None))]
+    chain = bytearray((len(codes) + 3) // 4)
+    for i, code in enumerate(codes):
+        chain[i >> 2] |= code << ((i & 3) * 2)
+    return body[0], bytes(chain)
+
+def unpack_body(head, chain, length):
+    """Inverse of pack_body."""
+    body = [head]
+    y, x = head
+    steps = [direction.value for direction in DIRECTIONS]
+    for i in range(length - 1):
+        dy, dx = steps[(chain[i >> 2] >> ((i & 3) * 2)) & 3]
+        y, x = y + dy, x + dx
+        body.append((y, x))
+    return body
+
+class Replay:
+    """A recorded game: rules, seed, direction changes, food spawns and keyframes."""
+
+    def __init__(self, width, height, margin, start_speed, min_speed, speed_step, seed,
+                 ticks=0, events=None, foods=None, keyframes=None, keyframe_interval=500):
+        self.width = width
+        self.height = height
+        self.margin = margin
+        self.start_speed = start_speed
+        self.min_speed = min_speed
+        self.speed_step = speed_step
+        self.seed = seed
+        self.ticks = ticks
+        self.events = events if events is not None else []          # (tick, Direction)
+        self.foods = foods if foods is not None else []              # food cell or None
+        self.keyframes = keyframes if keyframes is not None else []  # Keyframe, by tick
+        self.keyframe_interval = keyframe_interval
+
+    @property
+    def rules(self):
+        return dict(width=self.width, height=self.height, margin=self.margin,
+                    start_speed=self.start_speed, min_speed=self.min_speed,
+                    speed_step=self.speed_step)
+
+    def _cell(self, cell):
+        """Encode a cell (or None) as a varint-friendly integer."""
+        return 0 if cell is None else cell[0] * self.width + cell[1] + 1
+
+    def _uncell(self, value):
+        return None if value == 0 else divmod(value - 1, self.width)
+
+    def to_bytes(self):
+        buf = bytearray(HEADER.pack(MAGIC, VERSION, self.width, self.height, self.margin,
+                                    self.start_speed, self.min_speed, self.speed_step, self.seed))
+        write_varint(buf, self.ticks)
+        write_varint(buf, self.keyframe_interval)
+
+        # Direction changes: tick delta and direction code share one varint
+        write_varint(buf, len(self.events))
+        last_tick = 0
+        for tick, direction in self.events:
+            write_varint(buf, (tick - last_tick) << 2 | DIRECTION_CODES[direction])
+            last_tick = tick
+
+        write_varint(buf, len(self.foods))
+        for food in self.foods:
+            write_varint(buf, self._cell(food))
+
+        write_varint(buf, len(self.keyframes))
+        for frame in self.keyframes:
+            write_varint(buf, frame.tick)
+            write_varint(buf, frame.event_index)
+            write_varint(buf, frame.food_index)
+            write_varint(buf, frame.score)
+            buf += SPEED.pack(frame.speed)
+            buf.append(DIRECTION_CODES[frame.direction])
+            write_varint(buf, self._cell(frame.food))
+            write_varint(buf, len(frame.body))
+            head, chain = pack_body(frame.body)
+            write_varint(buf, self._cell(head))
+            buf += chain
+        return bytes(buf)
+
+    @classmethod
+    def from_bytes(cls, data):
+        view = memoryview(data)
+        magic, version, width, height, margin, start_speed, min_speed, speed_step, seed = \
+            HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a snake replay file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported replay version {version}")
+        replay = cls(width, height, margin, start_speed, min_speed, speed_step, seed)
+        offset = HEADER.size
+        replay.ticks, offset = read_varint(view, offset)
+        replay.keyframe_interval, offset = read_varint(view, offset)
+
+        count, offset = read_varint(view, offset)
+        tick = 0
+        for _ in range(count):
+            value, offset = read_varint(view, offset)
+            tick += value >> 2
+            replay.events.append((tick, DIRECTIONS[value & 3]))
+
+        count, offset = read_varint(view, offset)
+        for _ in range(count):
+            value, offset = read_varint(view, offset)
+            replay.foods.append(replay._uncell(value))
+
+        count, offset = read_varint(view, offset)
+        for _ in range(count):
+            tick, offset = read_varint(view, offset)
+            event_index, offset = read_varint(view, offset)
+            food_index, offset = read_varint(view, offset)
+            score, offset = read_varint(view, offset)
+            speed, = SPEED.unpack_from(view, offset)
+            offset += SPEED.size
+            direction = DIRECTIONS[view[offset]]
+            offset += 1
+            value, offset = read_varint(view, offset)
+            food = replay._uncell(value)
+            length, offset = read_varint(view, offset)
+            value, offset = read_varint(view, offset)
+            chain_size = (length - 1 + 3) // 4
+            body = unpack_body(replay._uncell(value), view[offset:offset + chain_size], length)
+            offset += chain_size
+            replay.keyframes.append(Keyframe(tick, event_index, food_index, score, speed,
+                                             direction, food, body))
+        return replay
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+class ReplayRecorder:
+    """Record a game as it is played.
+
+    Call record_tick() after every move_snake()/step() on the engine; it
+    notes direction changes, food spawns and periodic keyframes.
+    """
+
+    def __init__(self, engine, keyframe_interval=500, directory=None):
+        self.engine = engine
+        self.keyframe_interval = keyframe_interval
+        self.directory = directory
+        self.start()
+
+    def start(self):
+        """Begin a new recording from the engine's current (freshly reset) game."""
+        engine = self.engine
+        if engine.level is not None:
+            raise ValueError("Replays cover the open-board rules; level games can't be recorded")
+        self.replay = Replay(engine.width, engine.height, engine.margin, engine.start_speed,
+                             engine.min_speed, engine.speed_step, engine.seed,
+                             keyframe_interval=self.keyframe_interval)
+        self.replay.foods.append(engine.food)
+        self.last_direction = engine.direction
+        self.last_food = engine.food
+        self.last_tick = engine.ticks
+        self._keyframe()
+
+    def _keyframe(self):
+        engine = self.engine
+        self.replay.keyframes.append(Keyframe(engine.ticks, len(self.replay.events),
+                                              len(self.replay.foods), engine.score, engine.speed,
+                                              engine.direction, engine.food, list(engine.snake)))
+
+    def record_tick(self):
+        """Note what changed on the tick that just ran."""
+        engine = self.engine
+        if engine.ticks == self.last_tick:
+            return
+        self.last_tick = engine.ticks
+        if engine.direction != self.last_direction:
+            self.replay.events.append((engine.ticks, engine.direction))
+            self.last_direction = engine.direction
+        if engine.food != self.last_food:
+            self.replay.foods.append(engine.food)
+            self.last_food = engine.food
+        self.replay.ticks = engine.ticks
+        if engine.ticks % self.keyframe_interval == 0 and not engine.game_over:
+            self._keyframe()
+
+    def finish(self):
+        """Return the finished Replay."""
+        return self.replay
+
+    def save(self, directory=None):
+        """Write the recording as game-<seed>.snkr and return its path.
+
+        Games that never ticked are skipped and return None.
+        """
+        directory = directory or self.directory
+        if not self.replay.ticks:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"game-{self.replay.seed}.snkr")
+        self.replay.save(path)
+        return path
+
+class ReplayEngine(SnakeEngine):
+    """Engine that takes food spawns from a replay instead of its RNG."""
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.food_index = 0
+        super().__init__(seed=replay.seed, **replay.rules)
+
+    def place_food(self):
+        food = self.replay.foods[self.food_index]
+        self.food_index += 1
+        return food
+
+class ReplayPlayer:
+    """Step through a replay and jump to any tick."""
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.engine = ReplayEngine(replay)
+        self.event_index = 0
+        self.keyframe_ticks = [frame.tick for frame in replay.keyframes]
+
+    @property
+    def tick(self):
+        return self.engine.ticks
+
+    def seek(self, tick):
+        """Jump to the end of the given tick via the nearest earlier keyframe."""
+        tick = max(0, min(tick, self.replay.ticks))
+        frame = self.replay.keyframes[bisect_right(self.keyframe_ticks, tick) - 1]
+        engine = self.engine
+        engine.restore(frame.body, frame.direction, frame.food,
+                       frame.score, frame.speed, frame.tick)
+        engine.food_index = frame.food_index
+        self.event_index = frame.event_index
+        while engine.ticks < tick:
+            self.advance()
+        return engine
+
+    def advance(self):
+        """Play the next recorded tick; returns False at the end of the replay."""
+        engine = self.engine
+        if engine.game_over or engine.ticks >= self.replay.ticks:
+            return False
+        events = self.replay.events
+        next_tick = engine.ticks + 1
+        while self.event_index < len(events) and events[self.event_index][0] == next_tick:
+            engine.direction = events[self.event_index][1]
+            self.event_index += 1
+        engine.move_snake()
+        return True
+
+def record_game(policy_name, seed, rules='visual', keyframe_interval=500, max_ticks=100_000):
+    """Play a bot game on the headless engine and return its Replay."""
+    from snake_tournament import POLICIES
+
+    engine = SnakeEngine(seed=seed, **RULES[rules])
+    choose = POLICIES[policy_name](random.Random(seed))
+    recorder = ReplayRecorder(engine, keyframe_interval)
+    while not engine.game_over and engine.ticks < max_ticks:
+        engine.step(choose(engine))
+        recorder.record_tick()
+    return recorder.finish()
+
+def play(replay, speed=1.0, start=0):
+    """Render a replay in the terminal, fast-forwarding at the given speed."""
+    import snake_game_visual as visual
+
+    player = ReplayPlayer(replay)
+    engine = player.seek(start)
+    # Presentation state the visual renderer expects
+    engine.high_score = 0
+    engine.paused = False
+    engine.frame_count = 0
+    engine.current_food_color = 0
+
+    renderer = visual.DiffRenderer()
+    try:
+        while True:
+            tick_started = time.perf_counter()
+            visual.draw_game(engine, renderer)
+            if not player.advance():
+                break
+            delay = engine.speed / speed - (time.perf_counter() - tick_started)
+            if delay > 0:
+                time.sleep(delay)
+        visual.draw_game(engine, renderer)
+    finally:
+        renderer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Record, inspect and play snake replays.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help="record a bot game")
+    record.add_argument('--policy', default='greedy')
+    record.add_argument('--seed', type=int, default=0)
+    record.add_argument('--rules', default='visual', choices=sorted(RULES))
+    record.add_argument('--keyframe-interval', type=int, default=500)
+    record.add_argument('--out', required=True)
+
+    info = commands.add_parser('info', help="describe a replay file")
+    info.add_argument('path')
+
+    play_command = commands.add_parser('play', help="play a replay in the terminal")
+    play_command.add_argument('path')
+    play_command.add_argument('--speed', type=float, default=1.0, help="fast-forward factor")
+    play_command.add_argument('--start', type=int, default=0, help="tick to start from")
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        replay = record_game(args.policy, args.seed, args.rules, args.keyframe_interval)
+        replay.save(args.out)
+        print(f"Recorded {replay.ticks} ticks to {args.out} ({len(replay.to_bytes())} bytes)")
+    elif args.command == 'info':
+        replay = Replay.load(args.path)
+        print(f"{args.path}: {replay.width}x{replay.height}, seed {replay.seed}, "
+              f"{replay.ticks} ticks, {len(replay.events)} turns, {len(replay.foods)} foods, "
+              f"{len(replay.keyframes)} keyframes every {replay.keyframe_interval} ticks, "
+              f"{len(replay.to_bytes())} bytes")
+    else:
+        play(Replay.load(args.path), args.speed, args.start)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(130)
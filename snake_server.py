@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+Snake game server.
+Hosts many games in one process and serves them to terminal clients over TCP
+or Unix sockets. All sessions are ticked from one asyncio task: sessions with
+the same speed share a tick group, and a heap of group deadlines (the tick
+wheel) wakes the loop only when some group is due. Input is read as it
+arrives, and after each tick a client is sent just the cells that changed.
+A client that can't keep up has its frames dropped and gets one full redraw
+once its socket drains, so it never stalls the other sessions.
+
+    python snake_server.py serve --port 7777
+    python snake_server.py connect --port 7777
+    python snake_server.py load --port 7777 --clients 2000 --slow 0.1
+"""
+
+import argparse
+import asyncio
+import heapq
+import os
+import random
+import socket
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: keep the default descriptor limit
+    resource = None
+
+from snake_autopilot import Autopilot
+from snake_game_windows import SnakeGame, format_game
+from snake_input import KEY_DIRECTIONS, parse_keys, utf8_decoder
+from snake_leaderboard import GameRecord, Leaderboard
+from snake_profiler import PhaseTimings
+
+# Terminal control sequences
+CLEAR = '\x1b[H\x1b[2J'
+HIDE_CURSOR = '\x1b[?25l'
+SHOW_CURSOR = '\x1b[?25h'
+
+# Bytes queued for one client before its frames are dropped
+WRITE_HIGH_WATER = 16 * 1024
+
+def cursor(y, x):
+    return f'\x1b[{y + 1};{x + 1}H'
+
+def raise_descriptor_limit():
+    """Allow as many open sockets as the hard limit permits."""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+class TickGroup:
+    """Sessions ticking at the same interval, on one shared cadence."""
+
+    def __init__(self, interval, deadline):
+        self.interval = interval
+        self.deadline = deadline
+        self.sessions = set()
+
+class TickWheel:
+    """Tick groups keyed by interval, with a heap of their next deadlines.
+
+    Game speeds come in a handful of discrete steps, so thousands of sessions
+    share a few groups and the loop wakes once per group tick rather than
+    once per session.
+    """
+
+    def __init__(self):
+        self.groups = {}
+        self._deadlines = []
+
+    def __len__(self):
+        return sum(len(group.sessions) for group in self.groups.values())
+
+    def add(self, session, interval, now):
+        """Put session in the group for interval, creating it if needed."""
+        interval = round(interval, 6)
+        group = self.groups.get(interval)
+        if group is None:
+            group = self.groups[interval] = TickGroup(interval, now + interval)
+            heapq.heappush(self._deadlines, (group.deadline, interval))
+        group.sessions.add(session)
+        session.group = group
+
+    def remove(self, session):
+        if session.group is not None:
+            session.group.sessions.discard(session)
+            session.group = None
+
+    def next_deadline(self):
+        """Earliest group deadline, or None when nothing is scheduled."""
+        return self._deadlines[0][0] if self._deadlines else None
+
+    def pop_due(self, now):
+        """Remove and return the groups due by now; call schedule() on each afterwards."""
+        due = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, interval = heapq.heappop(self._deadlines)
+            group = self.groups[interval]
+            if group.sessions:
+                due.append(group)
+            else:
+                del self.groups[interval]
+        return due
+
+    def schedule(self, group, now):
+        """Advance a ticked group to its next deadline; returns the ticks skipped."""
+        group.deadline += group.interval
+        skipped = 0
+        if group.deadline <= now:
+            # Too far behind: drop the backlog instead of ticking back to back
+            skipped = int((now - group.deadline) // group.interval) + 1
+            group.deadline += skipped * group.interval
+        if group.sessions:
+            heapq.heappush(self._deadlines, (group.deadline, group.interval))
+        else:
+            del self.groups[group.interval]
+        return skipped
+
+class Session(asyncio.Protocol):
+    """One client connection and its game.
+
+    The client's screen is tracked by the tick it last showed: one tick later
+    only the old head, new head and freed tail cell are redrawn; anything
+    else (eating, pausing, restarts, dropped frames) gets a full redraw.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.game = SnakeGame()
+        self.pilot = None
+        self.group = None
+        self.transport = None
+        self.writable = True
+        self.player = 'guest'
+        self._pending = ''
+        self._decoder = utf8_decoder()
+        self._shown = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        peer = transport.get_extra_info('peername')
+        if peer:
+            self.player = peer if isinstance(peer, str) else f"{peer[0]}:{peer[1]}"
+        transport.set_write_buffer_limits(high=WRITE_HIGH_WATER)
+        sock = transport.get_extra_info('socket')
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.join(self)
+        transport.write(HIDE_CURSOR.encode())
+        self.send()
+
+    def connection_lost(self, exc):
+        self.server.leave(self)
+
+    def pause_writing(self):
+        self.writable = False
+
+    def resume_writing(self):
+        self.writable = True
+        self._shown = None
+        self.send()
+
+    def data_received(self, data):
+        keys, self._pending = parse_keys(self._pending + self._decoder.decode(data))
+        for key in keys:
+            if not self.handle_key(key):
+                return
+        self.send()
+
+    def handle_key(self, key):
+        game = self.game
+        if key == 'q':
+            self.transport.write((SHOW_CURSOR + CLEAR + "👋 Bye!\r\n").encode())
+            self.transport.close()
+            return False
+        elif key == 'r':
+            game.reset_game()
+            self.server.regroup(self)
+        elif key == 'p':
+            game.paused = not game.paused
+        elif key == 'o':
+            self.pilot = None if self.pilot else Autopilot(game)
+        elif key in KEY_DIRECTIONS and not game.game_over:
+            self.pilot = None
+            game.queue_direction(KEY_DIRECTIONS[key])
+        return True
+
+    def tick(self):
+        if self.pilot and not (self.game.paused or self.game.game_over):
+            self.pilot.steer()
+        self.game.move_snake()
+
+    def frame(self):
+        """Return the text that brings the client's screen up to date, or None."""
+        game = self.game
+        state = (game.ticks, game.score, game.paused, game.game_over)
+        shown = self._shown
+        if shown is not None and shown[0] == state:
+            return None
+        head_y, head_x = head = game.snake[0]
+        tail = game.snake[-1]
+        if shown is not None and state[1:] == shown[0][1:] and state[0] == shown[0][0] + 1:
+            _, (old_y, old_x), (tail_y, tail_x) = shown
+            parts = []
+            if not game.occupancy[tail_y * game.width + tail_x]:
+                parts.append(cursor(tail_y, tail_x) + ' ')
+            parts.append(cursor(old_y, old_x) + '○')
+            parts.append(cursor(head_y, head_x) + '●')
+            parts.append(cursor(game.height + 3, 0))
+            text = ''.join(parts)
+        else:
+            text = CLEAR + format_game(game).replace('\n', '\r\n')
+        self._shown = (state, head, tail)
+        return text
+
+    def send(self):
+        """Write the next frame, or drop it while the client is backed up."""
+        if not self.writable:
+            self.server.frames_dropped += 1
+            return
+        text = self.frame()
+        if text is not None:
+            data = text.encode()
+            self.transport.write(data)
+            self.server.frames_sent += 1
+            self.server.bytes_sent += len(data)
+
+class GameServer:
+    """Accepts clients and ticks every session from a single task.
+
+    With a leaderboard every finished game is submitted to it, under the
+    client's address as the player name.
+    """
+
+    def __init__(self, leaderboard=None, clock=time.monotonic):
+        self.leaderboard = leaderboard
+        self.clock = clock
+        self.wheel = TickWheel()
+        self.sessions = set()
+        self.jitter = PhaseTimings(4096)     # Seconds between a group's deadline and its tick
+        self.batch = PhaseTimings(4096)      # Seconds spent ticking one group
+        self.ticks = 0
+        self.skipped_ticks = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+        self._wake = asyncio.Event()
+
+    def join(self, session):
+        self.sessions.add(session)
+        self.wheel.add(session, session.game.speed, self.clock())
+        if self.leaderboard:
+            board = self.leaderboard
+            player = session.player
+            session.game.high_score = board.high_score()
+            session.game.on_game_end = lambda ended: board.submit(
+                GameRecord.from_game(ended, player, 'windows'))
+        self._wake.set()
+
+    def leave(self, session):
+        self.sessions.discard(session)
+        self.wheel.remove(session)
+        session.game.report_game()
+
+    def regroup(self, session):
+        """Move session to the group for its current speed."""
+        interval = round(session.game.speed, 6)
+        if session.group is None or session.group.interval != interval:
+            self.wheel.remove(session)
+            self.wheel.add(session, interval, self.clock())
+
+    async def run(self):
+        """Tick due groups forever, sleeping until the next deadline."""
+        clock = self.clock
+        wheel = self.wheel
+        while True:
+            deadline = wheel.next_deadline()
+            if deadline is None:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            delay = deadline - clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.tick_due(clock())
+
+    def tick_due(self, now):
+        """Tick every group due by now, then move the sessions whose speed changed.
+
+        Sessions change groups only after the whole batch, or a group later
+        in it could tick them a second time.
+        """
+        clock = self.clock
+        wheel = self.wheel
+        moved = []
+        for group in wheel.pop_due(now):
+            started = clock()
+            self.jitter.add(started - group.deadline)
+            self.ticks += len(group.sessions)
+            for session in group.sessions:
+                session.tick()
+                session.send()
+                if round(session.game.speed, 6) != group.interval:
+                    moved.append(session)
+            self.batch.add(clock() - started)
+            self.skipped_ticks += wheel.schedule(group, clock())
+        for session in moved:
+            if session.group is not None:
+                self.regroup(session)
+
+    async def report(self, interval):
+        """Print load statistics every interval seconds."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        ticks = frames = dropped = sent = 0
+        while True:
+            await asyncio.sleep(interval)
+            now_wall, now_cpu = time.perf_counter(), time.process_time()
+            elapsed = now_wall - wall
+            busy = (now_cpu - cpu) / elapsed
+            sessions = len(self.sessions)
+            p50, p99, worst = (value * 1000 for value in self.jitter.percentiles((50, 99, 100)))
+            per_core = f"~{sessions / busy:,.0f}" if busy > 0 else "-"
+            print(f"{sessions} sessions in {len(self.wheel.groups)} groups  "
+                  f"cpu {busy:4.0%} ({per_core} sessions/core)  "
+                  f"ticks/s {(self.ticks - ticks) / elapsed:,.0f}  "
+                  f"frames/s {(self.frames_sent - frames) / elapsed:,.0f} "
+                  f"(dropped {(self.frames_dropped - dropped) / elapsed:,.0f})  "
+                  f"{(self.bytes_sent - sent) / elapsed / 1024:,.0f} KiB/s  "
+                  f"jitter p50 {p50:.2f} p99 {p99:.2f} max {worst:.2f} ms  "
+                  f"skipped {self.skipped_ticks}", flush=True)
+            wall, cpu = now_wall, now_cpu
+            ticks, frames = self.ticks, self.frames_sent
+            dropped, sent = self.frames_dropped, self.bytes_sent
+
+async def serve(host='127.0.0.1', port=7777, unix=None, report_interval=5.0, leaderboard=None):
+    """Run the server until cancelled, saving scores to the leaderboard database if given."""
+    raise_descriptor_limit()
+    board = Leaderboard(leaderboard) if leaderboard else None
+    server = GameServer(board)
+    loop = asyncio.get_running_loop()
+    if unix:
+        listener = await loop.create_unix_server(lambda: Session(server), unix, backlog=4096)
+    else:
+        listener = await loop.create_server(lambda: Session(server), host, port, backlog=4096)
+    address = unix or f"{host}:{port}"
+    print(f"🐍 Serving snake on {address} ({os.cpu_count()} cores, one in use)", flush=True)
+    try:
+        async with listener:
+            tasks = [asyncio.ensure_future(server.run())]
+            if report_interval:
+                tasks.append(asyncio.ensure_future(server.report(report_interval)))
+            await asyncio.gather(*tasks)
+    finally:
+        if board:
+            board.close()
+
+class LoadClient(asyncio.Protocol):
+    """Simulated player that counts what it receives; slow ones stop reading."""
+
+    def __init__(self, stats, slow):
+        self.stats = stats
+        self.slow = slow
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.stats['connected'] += 1
+        if self.slow:
+            transport.pause_reading()
+
+    def data_received(self, data):
+        self.stats['bytes'] += len(data)
+
+    def connection_lost(self, exc):
+        self.stats['connected'] -= 1
+
+async def load(host='127.0.0.1', port=7777, unix=None, clients=1000, slow=0.0,
+               duration=30.0, key_rate=2.0, seed=0):
+    """Open clients connections that steer at random for duration seconds."""
+    raise_descriptor_limit()
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    stats = {'connected': 0, 'bytes': 0}
+    players = []
+    for index in range(clients):
+        factory = lambda: LoadClient(stats, rng.random() < slow)
+        if unix:
+            _, player = await loop.create_unix_connection(factory, unix)
+        else:
+            _, player = await loop.create_connection(factory, host, port)
+        players.append(player)
+    slow_count = sum(player.slow for player in players)
+    print(f"{len(players)} clients connected ({slow_count} not reading)", flush=True)
+
+    # Each tick of this loop, every client presses a key with probability key_rate / 10
+    keys = 'wasd' * 8 + 'r'
+    start = time.perf_counter()
+    received = 0
+    last_report = start
+    while time.perf_counter() - start < duration:
+        await asyncio.sleep(0.1)
+        for player in players:
+            if not player.transport.is_closing() and rng.random() < key_rate / 10:
+                player.transport.write(rng.choice(keys).encode())
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            print(f"  {stats['connected']} connected  "
+                  f"{(stats['bytes'] - received) / (now - last_report) / 1024:,.0f} KiB/s received",
+                  flush=True)
+            received = stats['bytes']
+            last_report = now
+    for player in players:
+        player.transport.close()
+
+def connect(host='127.0.0.1', port=7777, unix=None):
+    """Play on a server from this terminal."""
+    from snake_input import open_input
+
+    if unix:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(unix)
+    else:
+        sock = socket.create_connection((host, port))
+    sock.setblocking(False)
+    out = sys.stdout.buffer
+    try:
+        with open_input() as keyboard:
+            while True:
+                keys = keyboard.read_keys()
+                if keys:
+                    sock.sendall(''.join(keys).encode())
+                try:
+                    data = sock.recv(65536)
+                except BlockingIOError:
+                    keyboard.wait(0.01)
+                    continue
+                if not data:
+                    break
+                out.write(data)
+                out.flush()
+    finally:
+        sock.close()
+        out.write(SHOW_CURSOR.encode())
+        out.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description="Host snake games for terminal clients.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_address(command):
+        command.add_argument('--host', default='127.0.0.1')
+        command.add_argument('--port', type=int, default=7777)
+        command.add_argument('--unix', metavar='PATH', help="use a Unix socket instead of TCP")
+
+    serve_command = commands.add_parser('serve', help="run the game server")
+    add_address(serve_command)
+    serve_command.add_argument('--report', type=float, default=5.0,
+                               help="seconds between load reports (0 disables them)")
+    serve_command.add_argument('--leaderboard', metavar='DB', help="save every game's score to this SQLite leaderboard")
+
+    connect_command = commands.add_parser('connect', help="play on a server from this terminal")
+    add_address(connect_command)
+
+    load_command = commands.add_parser('load', help="connect many simulated players")
+    add_address(load_command)
+    load_command.add_argument('--clients', type=int, default=1000)
+    load_command.add_argument('--slow', type=float, default=0.0,
+                              help="fraction of clients that never read (to test back-pressure)")
+    load_command.add_argument('--duration', type=float, default=30.0)
+    load_command.add_argument('--key-rate', type=float, default=2.0, help="keys per second per client")
+    load_command.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        asyncio.run(serve(args.host, args.port, args.unix, args.report, args.leaderboard))
+    elif args.command == 'connect':
+        connect(args.host, args.port, args.unix)
+    else:
+        asyncio.run(load(args.host, args.port, args.unix, args.clients, args.slow,
+                         args.duration, args.key_rate, args.seed))
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(130)
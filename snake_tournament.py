@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Snake policy tournament.
+Plays many seeded games per policy on the headless engine, fanned out over a
+process pool in chunks, and aggregates score, length, survival time and
+death cause per policy. With a level file, every worker memory-maps the
+same level, so the grid is loaded once however many processes play it.
+
+    python snake_tournament.py --games 20000 --policies random greedy
+    python snake_tournament.py --games 20000 --level maze.snkl
+"""
+
+import argparse
+import os
+import random
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from snake_autopilot import Autopilot
+from snake_engine import RULES, Direction, SnakeEngine
+from snake_leaderboard import GameRecord, Leaderboard
+from snake_level import Level
+from snake_outcomes import CAUSE_CODES, RULE_CODES, Outcome, OutcomeLog
+
+# Death cause recorded when a game hits the tick limit
+DEATH_TIMEOUT = 'timeout'
+
+GameResult = namedtuple('GameResult', 'policy seed score length ticks cause speed width height')
+
+def straight_policy(rng):
+    """Never turn."""
+    def choose(engine):
+        return None
+    return choose
+
+def random_policy(rng):
+    """Turn in a random direction one tick in four."""
+    directions = list(Direction)
+    def choose(engine):
+        if rng.random() < 0.25:
+            return directions[rng.randrange(len(directions))]
+        return None
+    return choose
+
+def greedy_policy(rng):
+    """Head for the food, preferring moves that don't die on the next tick."""
+    directions = list(Direction)
+    def choose(engine):
+        head_y, head_x = engine.snake[0]
+        food = engine.food
+        if food is None:
+            return None
+        best = None
+        best_distance = None
+        for direction in directions:
+            dy, dx = direction.value
+            if (dy, dx) == tuple(-v for v in engine.direction.value):
+                continue
+            y, x = head_y + dy, head_x + dx
+            if engine.is_blocked((y, x)):
+                continue
+            distance = abs(food[0] - y) + abs(food[1] - x)
+            if best is None or distance < best_distance:
+                best, best_distance = direction, distance
+        return best
+    return choose
+
+def autopilot_policy(rng):
+    """Distance-field autopilot with tail checks and a Hamiltonian-cycle fallback."""
+    pilot = None
+    def choose(engine):
+        nonlocal pilot
+        if pilot is None:
+            pilot = Autopilot(engine, seed=rng.randrange(2 ** 32))
+        return pilot.decide()
+    return choose
+
+POLICIES = {
+    'straight': straight_policy,
+    'random': random_policy,
+    'greedy': greedy_policy,
+    'autopilot': autopilot_policy,
+}
+
+def game_seed(base_seed, index):
+    """Deterministic seed for the index-th game of a tournament."""
+    return (base_seed * 1_000_003 + index) & 0xFFFFFFFF
+
+def play_game(policy_name, seed, rules='visual', max_ticks=100_000, level=None):
+    """Play one game (on level, if given) to the end and return its GameResult."""
+    engine = SnakeEngine(seed=seed, level=level, **RULES[rules])
+    choose = POLICIES[policy_name](random.Random(seed))
+    while not engine.game_over and engine.ticks < max_ticks:
+        engine.step(choose(engine))
+    cause = engine.death_cause if engine.game_over else DEATH_TIMEOUT
+    return GameResult(policy_name, seed, engine.score, len(engine.snake), engine.ticks, cause,
+                      engine.speed, engine.width, engine.height)
+
+def play_chunk(policy_name, seeds, rules, max_ticks, level_path=None):
+    """Worker entry point: play a chunk of games for one policy."""
+    if level_path is None:
+        return [play_game(policy_name, seed, rules, max_ticks) for seed in seeds]
+    with Level.open(level_path) as level:
+        return [play_game(policy_name, seed, rules, max_ticks, level) for seed in seeds]
+
+class PolicyStats:
+    """Running aggregate of one policy's results."""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.games = 0
+        self.total_score = 0
+        self.best_score = 0
+        self.total_length = 0
+        self.total_ticks = 0
+        self.causes = Counter()
+
+    def add(self, result):
+        self.games += 1
+        self.total_score += result.score
+        self.best_score = max(self.best_score, result.score)
+        self.total_length += result.length
+        self.total_ticks += result.ticks
+        self.causes[result.cause] += 1
+
+    def mean(self, total):
+        return total / self.games if self.games else 0.0
+
+    def summary(self):
+        """One-line report for the CLI."""
+        causes = ', '.join(f"{cause} {count / self.games:.0%}"
+                           for cause, count in self.causes.most_common())
+        return (f"{self.policy:<10} games {self.games:>7}  "
+                f"score {self.mean(self.total_score):8.1f} (best {self.best_score})  "
+                f"length {self.mean(self.total_length):6.1f}  "
+                f"ticks {self.mean(self.total_ticks):8.1f}  [{causes}]")
+
+def run_tournament(policies, games, workers=None, chunk_size=250, base_seed=0,
+                   rules='visual', max_ticks=100_000, level_path=None):
+    """Play games seeded games per policy and yield GameResults as chunks finish.
+
+    Every policy plays the same seeds, so results are directly comparable and
+    reproducible regardless of worker count or completion order. level_path
+    plays a level file instead of the rules' open board (speeds still come
+    from rules).
+    """
+    seeds = [game_seed(base_seed, index) for index in range(games)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_chunk, policy, seeds[start:start + chunk_size], rules, max_ticks,
+                               level_path)
+                   for policy in policies
+                   for start in range(0, games, chunk_size)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate snake policies over many seeded games.")
+    parser.add_argument('--policies', nargs='+', default=['greedy', 'random', 'straight'],
+                        choices=sorted(POLICIES),
+                        help="autopilot games last far longer, so it only runs when listed")
+    parser.add_argument('--games', type=int, default=10_000, help="games per policy")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=250)
+    parser.add_argument('--seed', type=int, default=0, help="base seed for per-game seeds")
+    parser.add_argument('--rules', default='visual', choices=sorted(RULES))
+    parser.add_argument('--max-ticks', type=int, default=100_000)
+    parser.add_argument('--leaderboard', metavar='DB',
+                        help="also save every game to this SQLite leaderboard, with the policy as player")
+    parser.add_argument('--level', metavar='FILE', help="play a level file (see snake_level.py)")
+    parser.add_argument('--outcomes', metavar='DIR',
+                        help="also append every game to this outcome log (see snake_analysis.py)")
+    args = parser.parse_args()
+    if args.level and 'autopilot' in args.policies:
+        parser.error("the autopilot only plays open boards, not levels")
+
+    stats = {policy: PolicyStats(policy) for policy in args.policies}
+    board = Leaderboard(args.leaderboard) if args.leaderboard else None
+    log = OutcomeLog(args.outcomes) if args.outcomes else None
+    total = args.games * len(args.policies)
+    done = 0
+    start = time.perf_counter()
+    for result in run_tournament(args.policies, args.games, args.workers, args.chunk_size,
+                                 args.seed, args.rules, args.max_ticks, args.level):
+        stats[result.policy].add(result)
+        if board:
+            board.submit(GameRecord(result.policy, result.score, result.length, result.ticks,
+                                    result.cause, result.seed, args.rules, time.time()))
+        if log is not None:
+            log.append(Outcome(result.ticks, result.score, result.length, result.speed,
+                               CAUSE_CODES[result.cause], RULE_CODES[args.rules],
+                               result.width, result.height))
+        done += 1
+        if done % max(1, total // 10) == 0:
+            elapsed = time.perf_counter() - start
+            print(f"  {done}/{total} games  {done / elapsed:,.0f} games/sec", flush=True)
+    elapsed = time.perf_counter() - start
+    if log is not None:
+        log.close()
+    if board:
+        board.close()
+
+    print()
+    for policy in args.policies:
+        print(stats[policy].summary())
+    print(f"\n{total} games in {elapsed:.2f}s on {args.workers} workers: "
+          f"{total / elapsed:,.0f} games/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Scrolling viewport for boards bigger than the terminal.
+A camera follows the snake's head so only the visible window of the board is
+composed each frame, and an optional minimap shows the whole board scaled
+down. Both read the engine's occupancy grid instead of walking the body, so
+the cost per frame depends on the view size, not the board or snake size.
+
+    camera = Camera.for_terminal(reserved_rows=16)
+    top, left, rows, cols = camera.follow(game)
+"""
+
+import shutil
+
+MINIMAP_EMPTY = ' '
+MINIMAP_VIEW = '·'
+MINIMAP_BODY = '▪'
+MINIMAP_HEAD = '●'
+MINIMAP_FOOD = '★'
+
+def scroll(start, position, size, limit, edge):
+    """Return the new start of a 1-D window so position sits at least edge cells inside it."""
+    edge = min(edge, (size - 1) // 2)
+    if position < start + edge:
+        start = position - edge
+    elif position >= start + size - edge:
+        start = position - size + edge + 1
+    return max(0, min(start, limit - size))
+
+class Camera:
+    """A view_width x view_height window onto the board that follows the head.
+
+    The view only scrolls once the head comes within a quarter of the view
+    from its edge, so most frames keep the same window (and diff cheaply).
+    """
+
+    def __init__(self, view_width, view_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.top = 0
+        self.left = 0
+
+    @classmethod
+    def for_terminal(cls, reserved_rows=0, min_width=20, min_height=10):
+        """Size the view to the terminal, leaving reserved_rows for the HUD."""
+        size = shutil.get_terminal_size()
+        return cls(max(min_width, size.columns - 1), max(min_height, size.lines - reserved_rows))
+
+    def follow(self, game):
+        """Scroll towards the head and return the view as (top, left, rows, cols)."""
+        rows = min(self.view_height, game.height)
+        cols = min(self.view_width, game.width)
+        head_y, head_x = game.snake[0]
+        self.top = scroll(self.top, head_y, rows, game.height, rows // 4)
+        self.left = scroll(self.left, head_x, cols, game.width, cols // 4)
+        return self.top, self.left, rows, cols
+
+class Minimap:
+    """The whole board scaled down to at most width x height characters.
+
+    A minimap cell is marked when any board cell in its block holds the
+    snake. Finding those is a scan of the occupancy grid, so the snake layer
+    is only rebuilt every refresh frames; the head, food and the camera's
+    view are placed fresh on every frame.
+    """
+
+    def __init__(self, width=30, height=8, refresh=15):
+        self.width = width
+        self.height = height
+        self.refresh = refresh
+        self._body_rows = None
+        self._age = 0
+
+    def _blocks(self, game):
+        cols = min(self.width, game.width)
+        rows = min(self.height, game.height)
+        return -(-game.height // rows), -(-game.width // cols), rows, cols
+
+    def _scan(self, game):
+        """Mark every block that contains part of the snake."""
+        block_h, block_w, rows, cols = self._blocks(game)
+        grid = game.occupancy
+        width = game.width
+        marks = [bytearray(cols) for _ in range(rows)]
+        for y in range(game.height):
+            marked = marks[y // block_h]
+            start = y * width
+            end = start + width
+            x = grid.find(1, start, end)
+            while x != -1:
+                block = (x - start) // block_w
+                marked[block] = 1
+                # Skip the rest of this block: it is already marked
+                x = grid.find(1, start + (block + 1) * block_w, end)
+        return marks
+
+    def rows(self, game, view=None):
+        """Return the minimap as a list of strings."""
+        if self._body_rows is None or self._age >= self.refresh:
+            self._body_rows = self._scan(game)
+            self._age = 0
+        self._age += 1
+
+        block_h, block_w, rows, cols = self._blocks(game)
+        chars = [[MINIMAP_BODY if marked else MINIMAP_EMPTY for marked in row]
+                 for row in self._body_rows]
+        if view is not None:
+            top, left, view_rows, view_cols = view
+            for r in range(top // block_h, min(rows, -(-(top + view_rows) // block_h))):
+                row = chars[r]
+                for c in range(left // block_w, min(cols, -(-(left + view_cols) // block_w))):
+                    if row[c] == MINIMAP_EMPTY:
+                        row[c] = MINIMAP_VIEW
+        for food_y, food_x in game.foods:
+            chars[food_y // block_h][food_x // block_w] = MINIMAP_FOOD
+        head_y, head_x = game.snake[0]
+        chars[head_y // block_h][head_x // block_w] = MINIMAP_HEAD
+        return [''.join(row) for row in chars]
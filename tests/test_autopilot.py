@@ -0,0 +1,109 @@
+import gc
+import time
+
+import pytest
+
+from snake_autopilot import Autopilot, DistanceField
+from snake_engine import RULES, Direction, SnakeEngine
+
+def flood_from_tail(engine):
+    """Cells reachable from the tail through free cells, tail included."""
+    width, grid = engine.width, engine.occupancy
+    tail_y, tail_x = engine.snake[-1]
+    seen = {tail_y * width + tail_x}
+    frontier = [(tail_y, tail_x)]
+    while frontier:
+        y, x = frontier.pop()
+        for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            n_y, n_x = y + dy, x + dx
+            cell = n_y * width + n_x
+            if (engine.margin <= n_y < engine.height - engine.margin
+                    and engine.margin <= n_x < width - engine.margin
+                    and not grid[cell] and cell not in seen):
+                seen.add(cell)
+                frontier.append((n_y, n_x))
+    return seen
+
+@pytest.mark.parametrize('seed', range(3))
+def test_patched_field_and_component_match_a_full_search(seed):
+    engine = SnakeEngine(seed=seed, **dict(RULES['visual'], width=16, height=10))
+    pilot = Autopilot(engine)
+    reference = DistanceField(engine.width, engine.height, engine.margin)
+    field_answers = 0
+    while not engine.game_over:
+        pilot.steer()
+        reference.rebuild(engine.occupancy, pilot.field.source)
+        assert pilot.field.dist == reference.dist
+        assert pilot.field.reached == reference.reached
+
+        tail = pilot._flat(engine.snake[-1])
+        field_answers += pilot._field_component(tail) is not None
+        pilot._component = None
+        contains, size = pilot._tail_component(tail)
+        component = flood_from_tail(engine)
+        assert size == len(component)
+        assert all(contains(cell) == (cell in component)
+                   for cell, taken in enumerate(engine.occupancy) if not taken)
+        engine.move_snake()
+    assert field_answers
+
+def test_tail_sealed_off_from_the_food_falls_back_to_a_flood():
+    # The body walls the tail into the top-left corner, away from the food
+    engine = SnakeEngine(16, 10, 1, seed=0)
+    body = [(5, 1), (4, 1), (4, 2), (4, 3), (4, 4), (3, 4), (2, 4), (1, 4), (1, 3)]
+    engine.restore(body, Direction.DOWN, (5, 10))
+    pilot = Autopilot(engine)
+    tail = pilot._flat(engine.snake[-1])
+    pilot.sync()
+    assert pilot._field_component(tail) is None
+
+    # No move reaches the tail, so the pilot takes the move closest to the food
+    assert pilot.decide() == Direction.RIGHT
+    contains, size = pilot._component
+    pocket = flood_from_tail(engine)
+    assert size == len(pocket) == 9
+    assert all(contains(cell) == (cell in pocket)
+               for cell, taken in enumerate(engine.occupancy) if not taken)
+
+def test_no_garbage_collection_runs_inside_a_decision():
+    engine = SnakeEngine(seed=2, **RULES['visual'])
+    pilot = Autopilot(engine)
+    deciding = False
+    collections = []
+
+    def watch(phase, info):
+        if phase == 'start':
+            collections.append(deciding)
+
+    frames = []
+    threshold = gc.get_threshold()
+    gc.callbacks.append(watch)
+    gc.set_threshold(1)
+    try:
+        for _ in range(300):
+            deciding = True
+            direction = pilot.decide()
+            deciding = False
+            if direction is not None:
+                engine.change_direction(direction)
+            # Keep containers alive between decisions, as a game's frames do
+            frames.append([[n] for n in range(5)])
+            engine.move_snake()
+            if engine.game_over:
+                engine.reset()
+    finally:
+        gc.set_threshold(*threshold)
+        gc.callbacks.remove(watch)
+    assert len(collections) > 100 and not any(collections)
+
+def test_decision_latency_stays_within_a_tick_budget():
+    # Thread CPU time leaves out time the OS gave to other processes
+    engine = SnakeEngine(seed=1, **RULES['visual'])
+    pilot = Autopilot(engine, clock=time.thread_time)
+    while not engine.game_over and engine.ticks < 3000:
+        pilot.steer()
+        engine.move_snake()
+    p50, p99 = pilot.latency.percentiles((50, 99))
+    # A tick is 60 ms at full speed; a decision should take a small slice of that
+    assert p50 < 0.001
+    assert p99 < 0.005
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from snake_batch import DIRECTIONS, KEEP, BatchSnakeEngine
+from snake_engine import Direction, SnakeEngine
+
+def batch_body(batch, game):
+    """A batch game's body as (y, x) cells, head first like SnakeEngine.snake."""
+    ptr, length = batch.head_ptr[game], batch.length[game]
+    cells = batch.body[game, (ptr - np.arange(length)) % batch.capacity]
+    return [divmod(int(cell), batch.width) for cell in cells]
+
+def copy_food(batch, game, engine):
+    """Batch games draw food from NumPy's RNG, so the engine is handed the same cell."""
+    food = int(batch.food[game])
+    engine.food = divmod(food, batch.width) if food >= 0 else None
+
+def pick_action(engine, rng):
+    """Keep going, turn at random (reverses included) or head for the food."""
+    roll = rng.random()
+    if roll < 0.2:
+        return KEEP
+    if roll < 0.5 or engine.food is None:
+        return rng.randrange(len(DIRECTIONS))
+    (head_y, head_x), (food_y, food_x) = engine.snake[0], engine.food
+    return min(range(len(DIRECTIONS)), key=lambda a: abs(head_y + DIRECTIONS[a].value[0] - food_y)
+                                                    + abs(head_x + DIRECTIONS[a].value[1] - food_x))
+
+@pytest.mark.parametrize('width, height, margin', [(10, 8, 0), (12, 9, 1), (20, 12, 2), (6, 3, 1)])
+@pytest.mark.parametrize('auto_reset', [True, False])
+def test_batch_games_match_scalar_engines(width, height, margin, auto_reset):
+    games = 24
+    rules = dict(width=width, height=height, margin=margin,
+                 start_speed=0.12, min_speed=0.1, speed_step=0.007)
+    batch = BatchSnakeEngine(games, seed=5, auto_reset=auto_reset, **rules)
+    engines = [SnakeEngine(seed=game, **rules) for game in range(games)]
+    for game, engine in enumerate(engines):
+        copy_food(batch, game, engine)
+    rng = random.Random(width * height + margin)
+    finished = cleared = eaten = 0
+    for tick in range(300):
+        actions = [pick_action(engine, rng) for engine in engines]
+        _, reward, done = batch.step(actions)
+        for game, (engine, action) in enumerate(zip(engines, actions)):
+            was_over = engine.game_over
+            _, engine_reward, _ = engine.step(None if action == KEEP else DIRECTIONS[action])
+            assert reward[game] == engine_reward
+            assert done[game] == (engine.game_over and not was_over)
+            eaten += engine_reward > 0
+            if done[game]:
+                finished += 1
+                cleared += engine.board_cleared
+                assert batch.final_score[game] == engine.score
+                assert batch.final_length[game] == len(engine.snake)
+                assert batch.final_ticks[game] == engine.ticks
+                if auto_reset:
+                    engine.reset()
+                else:
+                    assert batch.board_cleared[game] == engine.board_cleared
+                    continue
+                copy_food(batch, game, engine)
+            elif engine_reward:
+                copy_food(batch, game, engine)
+            assert batch.done[game] == engine.game_over
+            if engine.game_over:
+                continue
+            assert batch_body(batch, game) == list(engine.snake)
+            assert DIRECTIONS[batch.direction[game]] == engine.direction
+            assert batch.score[game] == engine.score
+            assert batch.speed[game] == engine.speed
+            assert batch.ticks[game] == engine.ticks
+            assert bytes(batch.occupancy[game]) == bytes(engine.occupancy)
+            assert divmod(int(batch.food[game]), width) == engine.food
+    assert finished and eaten
+    if (width, height) == (6, 3):
+        assert cleared
+
+def test_moving_onto_the_tail_is_a_collision_in_both():
+    # Grow to four cells, then turn in a tight square so the head meets the tail's cell
+    batch = BatchSnakeEngine(1, 10, 8, 1, seed=0, auto_reset=False)
+    engine = SnakeEngine(10, 8, 1, seed=0)
+    head_y, head_x = engine.snake[0]
+    batch.food[0] = head_y * 10 + head_x + 1
+    engine.food = (head_y, head_x + 1)
+    up, left, down = (DIRECTIONS.index(d) for d in (Direction.UP, Direction.LEFT, Direction.DOWN))
+    for action in (KEEP, up, left, down):
+        _, _, done = batch.step([action])
+        engine.step(None if action == KEEP else DIRECTIONS[action])
+    assert done[0] and engine.game_over and engine.death_cause == 'self'
+    assert batch.length[0] == len(engine.snake) == 4
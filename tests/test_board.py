@@ -0,0 +1,58 @@
+import random
+
+from snake_board import BODY, FOOD, HEAD, BoardModel, CellEvents
+from snake_engine import Direction, SnakeEngine
+
+class BoardGame(CellEvents, SnakeEngine):
+    pass
+
+CELLS = {HEAD: '@', BODY: 'o', FOOD: '*'}
+
+def border(game):
+    edge = ('#',) * game.width
+    inner = ('#',) + ('.',) * (game.width - 2) + ('#',)
+    return (edge,) + (inner,) * (game.height - 2) + (edge,)
+
+def expected_window(game, top, left, height, width):
+    rows = [list(row[left:left + width]) for row in border(game)[top:top + height]]
+    marks = [(y, x, CELLS[BODY]) for y, x in game.snake]
+    marks.append((*game.snake[0], CELLS[HEAD]))
+    marks.extend((y, x, CELLS[FOOD]) for y, x in game.foods)
+    for y, x, cell in marks:
+        if top <= y < top + height and left <= x < left + width:
+            rows[y - top][x - left] = cell
+    return rows
+
+def test_window_follows_events_and_scrolls():
+    game = BoardGame(width=40, height=30, margin=1, seed=4)
+    game.food_count = 5
+    model = BoardModel(game, CELLS, border)
+    assert model.lines() == [''.join(row) for row in expected_window(game, 0, 0, 30, 40)]
+    rng = random.Random(4)
+    window = (0, 0, 30, 40)
+    for tick in range(3000):
+        if tick % 50 == 0:
+            window = (rng.randrange(20), rng.randrange(25), 10, 15)
+            model.view(*window)
+        elif tick % 5 == 0:
+            # Scroll by a few cells, as a camera does
+            top, left = window[:2]
+            window = (min(max(top + rng.randint(-3, 3), 0), 20),
+                      min(max(left + rng.randint(-3, 3), 0), 25), 10, 15)
+            model.view(*window)
+        game.queue_direction(rng.choice(list(Direction)))
+        game.move_snake()
+        if game.game_over:
+            game.reset(tick)
+        assert model.rows == expected_window(game, *window)
+    assert model.lines() == [''.join(row) for row in model.rows]
+
+def test_only_the_window_is_kept_on_a_huge_board():
+    game = BoardGame(width=1000, height=1000, margin=1, seed=1)
+    model = BoardModel(game, CELLS, border)
+    assert model.rows is None
+    rows = model.view(480, 470, 20, 60)
+    assert len(rows) == 20 and all(len(row) == 60 for row in rows)
+    game.reset(2)
+    assert len(model.rows) == 20
+    assert model.rows == expected_window(game, 480, 470, 20, 60)
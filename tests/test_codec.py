@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from snake_codec import (DeltaEncoder, apply_delta, decode_snapshot, encode_snapshot, round_trip,
+                         same_state)
+from snake_engine import SnakeEngine
+from snake_tournament import greedy_policy
+
+def play_until_meals(engine, choose, meals):
+    score = engine.score
+    while not engine.game_over and engine.score < score + 10 * meals:
+        engine.step(choose(engine))
+
+@pytest.mark.parametrize('seed', range(30))
+def test_decoded_snapshot_places_the_same_food(seed):
+    engine = SnakeEngine(30, 20, margin=1, seed=seed)
+    choose = greedy_policy(random.Random(seed))
+    play_until_meals(engine, choose, 3)
+    copy, _ = decode_snapshot(encode_snapshot(engine))
+    assert same_state(copy, engine)
+
+    meals = 0
+    while not engine.game_over and meals < 5:
+        action = choose(engine)
+        score = engine.score
+        engine.step(action)
+        copy.step(action)
+        assert copy.food == engine.food
+        assert same_state(copy, engine)
+        meals += engine.score > score
+
+def test_deltas_from_a_decoded_snapshot_keep_in_step():
+    engine = SnakeEngine(30, 20, margin=1, seed=7)
+    choose = greedy_policy(random.Random(7))
+    play_until_meals(engine, choose, 2)
+    copy, _ = decode_snapshot(encode_snapshot(engine))
+    encoder = DeltaEncoder(engine)
+    buf = bytearray()
+    for _ in range(300):
+        if engine.game_over:
+            break
+        engine.step(choose(engine))
+        buf.clear()
+        encoder.encode(buf)
+        apply_delta(copy, buf)
+        assert same_state(copy, engine)
+
+def test_delta_with_other_food_is_rejected():
+    engine = SnakeEngine(30, 20, margin=1, seed=1)
+    copy, _ = decode_snapshot(encode_snapshot(engine))
+    copy.rng.seed(99)
+    encoder = DeltaEncoder(engine)
+    choose = greedy_policy(random.Random(1))
+    with pytest.raises(ValueError):
+        while not engine.game_over:
+            engine.step(choose(engine))
+            buf = bytearray()
+            encoder.encode(buf)
+            apply_delta(copy, buf)
+
+@pytest.mark.parametrize('width, height, margin, max_ticks', [
+    (6, 3, 1, 200),        # the smallest board the starting snake fits: one 4-cell row
+    (7, 5, 1, 200),
+    (8, 8, 1, 400),
+    (9, 7, 1, 400),
+    (21, 13, 2, 600),
+    (60, 25, 2, 1500),
+    (256, 257, 1, 300),    # more than 65536 cells: wide free-cell order
+    (1000, 1000, 2, 120),
+])
+def test_round_trip_on_board_sizes(width, height, margin, max_ticks):
+    stats = dict(snapshots=0, snapshot_bytes=0, pickle_bytes=0, delta_bytes=0)
+    for seed in range(2):
+        assert round_trip(width, height, margin, seed, max_ticks, 50, stats)
+    assert stats['snapshots'] >= 2
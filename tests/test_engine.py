@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from snake_engine import Direction, SnakeEngine
+from snake_level import Level
+
+DIRECTIONS = list(Direction)
+
+@pytest.mark.parametrize('width, height, margin', [(5, 5, 1), (7, 8, 2), (6, 2, 1), (3, 9, 0)])
+def test_board_too_small_for_the_starting_snake_is_rejected(width, height, margin):
+    with pytest.raises(ValueError, match='too small'):
+        SnakeEngine(width, height, margin)
+
+@pytest.mark.parametrize('width, height, margin', [(6, 3, 1), (4, 1, 0), (10, 5, 2)])
+def test_smallest_boards_keep_the_snake_and_food_inside(width, height, margin):
+    engine = SnakeEngine(width, height, margin, seed=0)
+    inside = [(y, x) for y in range(margin, height - margin) for x in range(margin, width - margin)]
+    assert set(engine.snake) <= set(inside)
+    assert engine.food in inside
+
+def engine_state(engine):
+    return (list(engine.snake), engine.direction, engine.ticks, engine.score, engine.speed,
+            engine.game_over, engine.board_cleared, engine.death_cause, list(engine.foods),
+            bytes(engine.occupancy), engine._free.cells.tobytes(), engine._free.slots.tobytes(),
+            engine.rng.getstate())
+
+def random_board(seed):
+    """An engine a few moves into a game, on the open board or a level with portals."""
+    rng = random.Random(seed)
+    if seed % 2:
+        level = Level.generate(14, 10, walls=0.08, portals=2, food_count=3, seed=seed)
+        engine = SnakeEngine(seed=seed, level=level)
+    else:
+        engine = SnakeEngine(10, 8, 1, seed=seed)
+    for _ in range(rng.randrange(30)):
+        if engine.game_over:
+            break
+        engine.apply(pick_move(engine, rng))
+    return engine, rng
+
+def pick_move(engine, rng):
+    """Mostly head for a food (so games eat and grow), sometimes turn at random."""
+    foods = list(engine.foods)
+    if not foods or rng.random() < 0.15:
+        return rng.choice(DIRECTIONS)
+    (head_y, head_x), (food_y, food_x) = engine.snake[0], foods[0]
+    dy, dx = engine.direction.value
+    turns = [d for d in DIRECTIONS if d.value != (-dy, -dx)]
+    return min(turns, key=lambda d: abs(head_y + d.value[0] - food_y) + abs(head_x + d.value[1] - food_x))
+
+def undo_random_moves(seed, moves=80):
+    """Apply moves, undo them in reverse checking every state; returns (eats, deaths)."""
+    engine, rng = random_board(seed)
+    states, records = [engine_state(engine)], []
+    eats = deaths = 0
+    for _ in range(moves):
+        score, over = engine.score, engine.game_over
+        records.append(engine.apply(pick_move(engine, rng)))
+        states.append(engine_state(engine))
+        eats += engine.score > score
+        deaths += engine.game_over and not over
+    while records:
+        states.pop()
+        engine.undo(records.pop())
+        assert engine_state(engine) == states[-1]
+    return eats, deaths
+
+@pytest.mark.parametrize('seed', range(40))
+def test_undo_reverses_random_moves_exactly(seed):
+    undo_random_moves(seed)
+
+def test_undo_covers_eating_and_dying():
+    totals = [undo_random_moves(seed) for seed in range(40)]
+    assert sum(eats for eats, _ in totals) > 20
+    assert sum(deaths for _, deaths in totals) > 10
+
+@pytest.mark.parametrize('seed', range(10))
+def test_clone_is_independent_and_plays_the_same(seed):
+    engine, rng = random_board(seed)
+    before = engine_state(engine)
+    copy = engine.clone()
+    assert engine_state(copy) == before
+    moves = [pick_move(engine, rng) for _ in range(40)]
+    for direction in moves:
+        copy.apply(direction)
+    assert engine_state(engine) == before
+    for direction in moves:
+        engine.apply(direction)
+    assert engine_state(engine) == engine_state(copy)
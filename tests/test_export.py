@@ -0,0 +1,30 @@
+import os
+import random
+
+import pytest
+
+from snake_export import export_game
+from snake_level import Level
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason="needs /proc to count open files")
+def test_export_game_closes_the_level(tmp_path):
+    level_path = tmp_path / 'maze.snkl'
+    Level.generate(30, 15, walls=0.05, food_count=2, seed=1).save(level_path)
+    open_files = len(os.listdir('/proc/self/fd'))
+    for seed in range(3):
+        frames = export_game(seed, tmp_path / f'game-{seed}.ndjson', 'ndjson', max_ticks=50,
+                             level_path=str(level_path))
+        assert frames > 0
+    assert len(os.listdir('/proc/self/fd')) == open_files
+
+def test_export_is_repeatable_without_touching_the_global_rng(tmp_path):
+    random.seed(7)
+    expected = random.getstate()
+    first = tmp_path / 'first.ndjson'
+    export_game(3, first, 'ndjson', max_ticks=300)
+    assert random.getstate() == expected
+
+    random.random()
+    second = tmp_path / 'second.ndjson'
+    export_game(3, second, 'ndjson', max_ticks=300)
+    assert first.read_bytes() == second.read_bytes()
@@ -0,0 +1,48 @@
+import os
+import pty
+
+import pytest
+
+from snake_input import TermiosInput, parse_keys
+
+@pytest.mark.parametrize('text, keys, rest', [
+    ('wasd', ['w', 'a', 's', 'd'], ''),
+    ('WQ', ['w', 'q'], ''),
+    ('\x1b[A\x1b[B\x1b[C\x1b[D', ['w', 's', 'd', 'a'], ''),
+    ('\x1bOA\x1bOD', ['w', 'a'], ''),
+    ('\x1b[1;5A\x1b[1;2D', ['w', 'a'], ''),       # Ctrl+Up, Shift+Left
+    ('\x1b[2~\x1b[3~p', ['p'], ''),                # Insert and Delete are dropped whole
+    ('\x1b[15;2~\x1bOPw', ['w'], ''),              # Shift+F5, F1
+    ('\x1bw', ['w'], ''),                          # A lone ESC before a key
+    ('\x1b\x1b[A', ['w'], ''),
+    ('d\x1b', ['d'], '\x1b'),                      # Cut off: wait for the rest
+    ('d\x1b[', ['d'], '\x1b['),
+    ('d\x1b[1;5', ['d'], '\x1b[1;5'),
+    ('\x1bO', [], '\x1bO'),
+    ('\x1b[\x01w', ['\x01', 'w'], ''),             # Malformed: the stray byte is read as a key
+    ('\x1b[' + '1;' * 40, [], ''),                 # Runaway sequence is dropped
+])
+def test_parse_keys(text, keys, rest):
+    assert parse_keys(text) == (keys, rest)
+
+def test_sequences_split_anywhere_give_the_same_keys():
+    text = 'w\x1b[1;5Ad\x1bOB\x1b[3~s\x1bq'
+    whole, _ = parse_keys(text)
+    for cut in range(len(text) + 1):
+        first, rest = parse_keys(text[:cut])
+        second, rest = parse_keys(rest + text[cut:])
+        assert first + second == whole and rest == ''
+
+def test_termios_input_keeps_split_sequences_and_characters():
+    master, slave = pty.openpty()
+    try:
+        with open(slave, 'rb', buffering=0, closefd=False) as stream, TermiosInput(stream) as keyboard:
+            os.write(master, b'w\x1b[1;')
+            assert keyboard.read_keys() == ['w']
+            os.write(master, b'5A\xc3')               # First byte of 'é'
+            assert keyboard.read_keys() == ['w']
+            os.write(master, b'\xa9d')
+            assert keyboard.read_keys() == ['é', 'd']
+    finally:
+        os.close(master)
+        os.close(slave)
@@ -0,0 +1,67 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import snake_leaderboard
+from snake_leaderboard import GameRecord, Leaderboard
+
+def record(score, player='ada'):
+    return GameRecord(player, score, score // 10 + 3, score * 3, 'self', 1, 'visual', time.time())
+
+def test_close_closes_connections_from_every_thread(tmp_path):
+    board = Leaderboard(str(tmp_path / 'scores.db'), flush_interval=0.01)
+    board.submit(record(50))
+    board.flush()
+    results = []
+    worker = threading.Thread(target=lambda: results.append(board.high_score()))
+    worker.start()
+    worker.join()
+    assert results == [50]
+    connections = list(board._connections)
+    assert len(connections) == 2
+    board.close()
+    for connection in connections:
+        with pytest.raises(Exception):
+            connection.execute("SELECT 1")
+
+def test_writer_error_is_raised_instead_of_hanging(tmp_path):
+    board = Leaderboard(str(tmp_path / 'scores.db'), flush_interval=0.01)
+    board.submit(record(10))
+    board.submit(('not', 'a', 'record'))
+    with pytest.raises(Exception):
+        board.flush(timeout=5)
+    assert board.error is not None
+    with pytest.raises(Exception):
+        board.submit(record(20))
+    with pytest.raises(Exception):
+        board.close()
+
+def test_schema_error_is_raised_from_flush_not_dropped(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    board = Leaderboard(path, flush_interval=0.01)
+    other = sqlite3.connect(path)
+    other.execute("DROP TABLE results")
+    other.close()
+    board.submit(record(10))
+    with pytest.raises(sqlite3.OperationalError, match='no such table'):
+        board.flush(timeout=5)
+    assert board.written == 0
+    with pytest.raises(sqlite3.OperationalError):
+        board.close()
+
+def test_lock_is_retried_until_released(tmp_path, monkeypatch):
+    monkeypatch.setattr(snake_leaderboard, 'BUSY_TIMEOUT_MS', 20)
+    path = str(tmp_path / 'scores.db')
+    board = Leaderboard(path, flush_interval=0.01)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    board.submit(record(30))
+    time.sleep(0.2)
+    other.execute("COMMIT")
+    other.close()
+    assert board.flush(timeout=10)
+    assert board.retries > 0
+    assert board.high_score() == 30
+    board.close()
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from snake_engine import CELL_PORTAL, CELL_WALL, Direction, SnakeEngine
+from snake_level import HEADER, Level
+
+def open_grid(width, height):
+    return bytearray(width * height)
+
+@pytest.mark.parametrize('start, direction, reason', [
+    ((2, 1), Direction.RIGHT, 'off the'),
+    ((0, 5), Direction.DOWN, 'off the'),
+    ((9, 5), Direction.LEFT, 'off the'),
+    ((3, 4), Direction.RIGHT, 'wall'),
+    ((5, 4), Direction.DOWN, 'wall'),
+    ((6, 6), Direction.RIGHT, 'portal'),
+])
+def test_start_snake_must_be_on_open_cells(start, direction, reason):
+    grid = open_grid(10, 8)
+    grid[3 * 10 + 3] = CELL_WALL
+    grid[3 * 10 + 4] = CELL_WALL
+    grid[6 * 10 + 5] = grid[1 * 10 + 8] = CELL_PORTAL
+    with pytest.raises(ValueError, match=reason):
+        Level(10, 8, grid, [(65, 18)], start=start, direction=direction)
+
+def test_engine_starts_on_the_level_body():
+    level = Level(10, 8, open_grid(10, 8), start=(5, 2), direction=Direction.UP)
+    engine = SnakeEngine(seed=1, level=level)
+    assert list(engine.snake) == level.start_body() == [(5, 2), (6, 2), (7, 2)]
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason="needs /proc to count open files")
+def test_open_rejects_a_bad_start_and_unmaps_the_file(tmp_path):
+    path = tmp_path / 'bad.snkl'
+    Level.generate(20, 10, walls=0, seed=1).save(path)
+    data = bytearray(path.read_bytes())
+    head_y, head_x = 10 // 2, 20 // 2
+    data[HEADER.size + head_y * 20 + head_x - 1] = CELL_WALL
+    path.write_bytes(data)
+    open_files = len(os.listdir('/proc/self/fd'))
+    for _ in range(3):
+        with pytest.raises(ValueError, match='wall'):
+            Level.open(path)
+    assert len(os.listdir('/proc/self/fd')) == open_files
@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from snake_loop import GameLoop, RenderThread
+
+class FakeClock:
+    """A clock that only moves when the loop waits."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.waits = []
+
+    def __call__(self):
+        return self.now
+
+    def wait(self, seconds):
+        self.waits.append(seconds)
+        self.now += seconds
+
+def run_idle(max_sleep, seconds=2.0):
+    """Run a paused loop for the given simulated time; returns the clock."""
+    clock = FakeClock()
+    loop = GameLoop(lambda: 0.1, render_fps=30, idle_fps=4, max_sleep=max_sleep,
+                    clock=clock, wait=clock.wait)
+    loop.run(lambda: clock.now < seconds, lambda: None, lambda: None, animating=lambda: False)
+    return clock
+
+def test_idle_loop_sleeps_until_the_next_frame_without_a_cap():
+    clock = run_idle(max_sleep=None)
+    assert len(clock.waits) == 8
+    assert all(abs(wait - 0.25) < 1e-9 for wait in clock.waits)
+
+def test_polling_cap_wakes_the_idle_loop_more_often():
+    clock = run_idle(max_sleep=0.05)
+    assert 40 <= len(clock.waits) <= 41
+    assert max(clock.waits) <= 0.05
+
+class SlowTerminal:
+    """A write() that holds each frame until released, recording what it wrote."""
+
+    def __init__(self):
+        self.frames = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, frame):
+        self.started.set()
+        self.release.wait(5)
+        self.frames.append(frame)
+
+def test_render_thread_skips_to_the_newest_frame():
+    terminal = SlowTerminal()
+    writer = RenderThread(terminal)
+    writer.submit(0)
+    assert terminal.started.wait(5)
+    for frame in range(1, 10):
+        writer.submit(frame)
+    assert writer.flush(timeout=0.05) is False
+    terminal.release.set()
+    assert writer.flush(timeout=5)
+    assert terminal.frames == [0, 9]
+    assert writer.written == 2
+    assert writer.dropped_frames == 8
+    writer.close()
+
+def test_render_thread_close_writes_the_last_frame_and_stops():
+    terminal = SlowTerminal()
+    writer = RenderThread(terminal)
+    writer.submit('first')
+    assert terminal.started.wait(5)
+    writer.submit('last')
+    terminal.release.set()
+    writer.close()
+    assert terminal.frames == ['first', 'last']
+    assert not writer._thread.is_alive()
+
+def test_render_thread_raises_write_errors_on_the_next_submit():
+    def broken(frame):
+        raise OSError("terminal gone")
+
+    writer = RenderThread(broken)
+    writer.submit('frame')
+    assert writer.flush(timeout=5)
+    with pytest.raises(OSError, match="terminal gone"):
+        writer.submit('next')
+    writer.close()
@@ -0,0 +1,127 @@
+import random
+from array import array
+from collections import Counter, defaultdict
+
+import pytest
+
+from snake_engine import Direction, SnakeEngine
+from snake_outcomes import CAUSE_CODES, COLUMNS, Outcome, OutcomeLog, column_path, record_count
+
+np = pytest.importorskip('numpy')
+
+from snake_analysis import aggregate, death_causes, open_log, report, score_vs_ticks, survival
+
+def played_outcomes(games, seed=0):
+    """Outcomes of short random games under both rule names (and a quit or two)."""
+    rng = random.Random(seed)
+    outcomes = []
+    for game in range(games):
+        engine = SnakeEngine(20, 12, 1, seed=seed * 1000 + game)
+        for _ in range(rng.randrange(1, 200)):
+            engine.step(rng.choice(list(Direction)))
+            if engine.game_over:
+                break
+        outcomes.append(Outcome.from_game(engine, rng.choice(['visual', 'windows', None])))
+    return outcomes
+
+def test_appended_outcomes_read_back_column_by_column(tmp_path):
+    outcomes = played_outcomes(50)
+    with OutcomeLog(tmp_path / 'log', batch_size=16) as log:
+        for outcome in outcomes:
+            log.append(outcome)
+        assert len(log) == 50
+        assert log.written == 48
+    columns = open_log(tmp_path / 'log')
+    for index, (name, _) in enumerate(COLUMNS):
+        expected = [outcome[index] for outcome in outcomes]
+        if name == 'speed':
+            assert np.allclose(columns[name], expected)
+        else:
+            assert columns[name].tolist() == expected
+
+def test_reopening_trims_a_cut_short_write_and_appends_after_it(tmp_path):
+    path = tmp_path / 'log'
+    first, second = played_outcomes(10, seed=1), played_outcomes(5, seed=2)
+    with OutcomeLog(path) as log:
+        for outcome in first:
+            log.append(outcome)
+    # An interrupted flush: two whole records in one column, half of one in another
+    with open(column_path(path, 'ticks'), 'ab') as f:
+        array('I', [7, 8]).tofile(f)
+    with open(column_path(path, 'width'), 'ab') as f:
+        f.write(b'\x01')
+    assert record_count(path) == 10
+
+    with OutcomeLog(path) as log:
+        assert len(log) == 10
+        for outcome in second:
+            log.append(outcome)
+    columns = open_log(path)
+    assert columns['ticks'].tolist() == [outcome.ticks for outcome in first + second]
+    assert columns['width'].tolist() == [outcome.width for outcome in first + second]
+
+def test_extend_takes_arrays_in_bulk_and_sequences_by_value(tmp_path):
+    records = 1000
+    columns = {
+        'ticks': np.arange(records, dtype=np.uint32),
+        'score': list(range(0, records * 10, 10)),
+        'length': array('I', range(3, records + 3)),
+        'speed': np.full(records, 0.1, dtype=np.float32),
+        'cause': np.ones(records, dtype=np.uint8),
+        'rules': [1] * records,
+        'width': np.full(records, 60, dtype=np.uint16),
+        'height': np.full(records, 25, dtype=np.int64),
+    }
+    with OutcomeLog(tmp_path / 'log', batch_size=256) as log:
+        log.extend(columns)
+        with pytest.raises(ValueError):
+            log.extend(dict(columns, score=[0]))
+    read = open_log(tmp_path / 'log')
+    for name, values in columns.items():
+        assert np.array_equal(read[name], np.asarray(values, dtype=read[name].dtype))
+
+def test_aggregates_match_plain_python(tmp_path):
+    outcomes = played_outcomes(300, seed=3)
+    with OutcomeLog(tmp_path / 'log') as log:
+        for outcome in outcomes:
+            log.append(outcome)
+    columns = open_log(tmp_path / 'log')
+
+    # Grouped stats of ticks by cause (a small code key) and by speed (a float key)
+    for key_name in ('cause', 'speed'):
+        groups = defaultdict(list)
+        for key, ticks in zip(columns[key_name].tolist(), columns['ticks'].tolist()):
+            groups[key].append(ticks)
+        stats = aggregate(columns[key_name], columns['ticks'])
+        assert stats['key'].tolist() == sorted(groups)
+        for i, key in enumerate(stats['key'].tolist()):
+            values = groups[key]
+            assert stats['count'][i] == len(values)
+            assert stats['mean'][i] == pytest.approx(sum(values) / len(values))
+            assert stats['std'][i] == pytest.approx(np.std(values), abs=1e-6)
+            assert (stats['min'][i], stats['max'][i]) == (min(values), max(values))
+
+    counts = Counter((outcome.rules, outcome.cause) for outcome in outcomes)
+    matrix = death_causes(columns['cause'], columns['rules'])
+    assert {(r, c): int(n) for (r, c), n in np.ndenumerate(matrix) if n} == dict(counts)
+    assert matrix.sum() == len(outcomes)
+    assert counts[(1, CAUSE_CODES['wall'])] or counts[(2, CAUSE_CODES['wall'])]
+
+    ticks = columns['ticks']
+    edges, games, alive = survival(ticks, bins=10)
+    assert games.sum() == len(outcomes)
+    for edge, share in zip(edges, alive):
+        assert share == pytest.approx(sum(t >= edge for t in ticks.tolist()) / len(outcomes))
+    _, games, mean_score = score_vs_ticks(ticks, columns['score'], bins=10)
+    assert games.sum() == len(outcomes)
+    assert (mean_score * games).sum() == pytest.approx(sum(o.score for o in outcomes))
+
+    lines = report(columns, bins=10)
+    assert lines[0] == "300 games"
+    assert any(line.startswith("  visual") for line in lines)
+
+def test_empty_log_reports_no_games(tmp_path):
+    OutcomeLog(tmp_path / 'log').close()
+    columns = open_log(tmp_path / 'log')
+    assert all(len(values) == 0 for values in columns.values())
+    assert report(columns) == ["0 games"]
@@ -0,0 +1,32 @@
+import io
+
+import snake_game_visual as visual
+from snake_replay import Replay, ReplayPlayer, play, record_game
+
+def test_play_draws_a_recorded_replay(tmp_path, capsys):
+    replay = record_game('greedy', seed=3, max_ticks=300)
+    path = tmp_path / 'game.snkr'
+    replay.save(path)
+
+    final_score = ReplayPlayer(replay).seek(replay.ticks).score
+    play(Replay.load(path), speed=1e9)
+    output = visual.ESCAPE_SEQUENCE.sub('', capsys.readouterr().out)
+    assert f"SCORE: {final_score:04d}" in output
+
+def test_replay_frames_follow_the_recorded_game():
+    replay = record_game('greedy', seed=5, max_ticks=200)
+    player = ReplayPlayer(replay)
+    engine = player.seek(0)
+    engine.high_score = 0
+    engine.paused = False
+    engine.frame_count = 0
+    engine.current_food_color = 0
+    renderer = visual.DiffRenderer(io.StringIO())
+    frames = 0
+    while True:
+        visual.draw_game(engine, renderer)
+        frames += 1
+        if not player.advance():
+            break
+    assert frames == replay.ticks + 1
+    assert engine.score == ReplayPlayer(replay).seek(replay.ticks).score
@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+from snake_engine import Direction
+from snake_server import GameServer, Session
+
+async def wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+def test_client_keys_steer_a_ticking_game():
+    async def play():
+        server = GameServer()
+        listener = await asyncio.get_running_loop().create_server(
+            lambda: Session(server), '127.0.0.1', 0)
+        runner = asyncio.ensure_future(server.run())
+        try:
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            await wait_for(lambda: server.sessions)
+            session, = server.sessions
+            game = session.game
+            # Ctrl+Down, split inside the sequence
+            writer.write(b'\x1b[1;')
+            await writer.drain()
+            await asyncio.sleep(0.01)
+            writer.write(b'5B')
+            await writer.drain()
+            start = game.ticks
+            await wait_for(lambda: game.ticks >= start + 3)
+            assert game.direction == Direction.DOWN
+            assert server.ticks >= 3
+            assert await reader.read(65536)
+
+            writer.write(b'q')
+            await writer.drain()
+            farewell = b''
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                farewell += data
+            assert 'Bye' in farewell.decode()
+            writer.close()
+            await wait_for(lambda: not server.sessions)
+        finally:
+            runner.cancel()
+            listener.close()
+            await listener.wait_closed()
+    asyncio.run(play())
+
+class StubSession:
+    """Counts ticks and switches to another speed on its first one."""
+
+    def __init__(self, speed, next_speed):
+        self.game = SimpleNamespace(speed=speed)
+        self.next_speed = next_speed
+        self.group = None
+        self.player = 'stub'
+        self.ticks = 0
+
+    def tick(self):
+        self.ticks += 1
+        self.game.speed = self.next_speed
+
+    def send(self):
+        pass
+
+def test_session_changing_groups_ticks_once_per_batch():
+    now = 0.0
+    server = GameServer(clock=lambda: now)
+    speeding = StubSession(0.05, 0.1)     # Its group is due first, then it joins the 0.1 group
+    steady = StubSession(0.1, 0.1)
+    server.join(speeding)
+    server.join(steady)
+    now = 0.2
+    server.tick_due(now)
+    assert (speeding.ticks, steady.ticks) == (1, 1)
+    assert speeding.group is steady.group